@@ -0,0 +1,317 @@
+"""
+Benchmarks for Yacana tools
+
+This script measures the latency, the throughput and the peak memory of the
+FileReadTool, FileWriteTool and FileListTool tools across file and directory sizes,
+and compares two measurements to flag regressions.
+
+Run:
+    $ python benchmarks/bench_tools.py run --output baseline.json
+    $ python benchmarks/bench_tools.py run --output current.json --target-dir /dev/shm --target-dir /tmp
+    $ python benchmarks/bench_tools.py compare baseline.json current.json
+
+Each case runs in its own process, so its peak RSS is not polluted by the other cases.
+A case whose process crashes or exceeds the timeout is reported as failed.
+"""
+
+# pylint: disable=C0301
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import re
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from yacana_tools import FileListTool, FileReadTool, FileWriteTool # pylint: disable=C0413
+
+KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
+QUICK_FILE_SIZES = [KB, MB, 64 * MB]
+FULL_FILE_SIZES = [KB, 64 * KB, MB, 64 * MB, GB]
+QUICK_DIR_SIZES = [10, 1000, 100000]
+FULL_DIR_SIZES = [10, 1000, 100000, 1000000]
+LINE = b"0123456789abcdefghijklmnopqrstuvwxyz0123456789abcdefghijklmnopqrstuvwxyz0123456789abcdefghijklmnopqrstuvwxyz\n"
+BASELINE_FORMAT_VERSION = 2
+CURSOR_PATTERN = re.compile(r'cursor="([^"]*)"')
+
+
+def peak_rss() -> int:
+    """
+    Return the peak resident set size of the current process in bytes.
+    """
+
+    try:
+        import resource # pylint: disable=C0415
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def make_file(path: str, size: int) -> None:
+    """
+    Create a text file of the given size, made of lines of 108 bytes.
+    """
+
+    with open(path, mode='wb') as fd:
+        chunk = LINE * (MB // len(LINE))
+        remaining = size
+        while remaining > 0:
+            data = chunk[:remaining]
+            fd.write(data)
+            remaining -= len(data)
+
+
+def make_dir(path: str, entries: int) -> None:
+    """
+    Create a directory holding the given number of empty files.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    for index in range(entries):
+        with open(os.path.join(path, f"file{index:07d}.txt"), mode='wb'):
+            pass
+
+
+def run_case(case: dict, repeat: int, queue) -> None:
+    """
+    Run a benchmark case in the current process and put its measurements in the queue.
+    """
+
+    work_dir = case["work_dir"]
+    kind = case["kind"]
+    size = case["size"]
+    if kind in ("read", "read_lines"):
+        tool = FileReadTool(work_dir)
+        kwargs = {"limit": 100} if kind == "read_lines" else {}
+        # The throughput counts the bytes actually returned, not the size of the file
+        call = lambda: len(tool.read_content(case["name"], **kwargs).encode("utf-8")) # pylint: disable=C3001
+    elif kind == "write":
+        tool = FileWriteTool(work_dir, force=True)
+        content = (LINE * (size // len(LINE) + 1))[:size].decode("ascii")
+        call = lambda: tool.write_content(f"written_{size}.txt", content) and size # pylint: disable=C3001
+    else:
+        tool = FileListTool(work_dir)
+        call = lambda: list_all(tool, case["name"]) # pylint: disable=C3001
+
+    rss_before = peak_rss()
+    volume = call()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    queue.put({"latencies": latencies, "volume": volume, "peak_rss": peak_rss(), "rss_before": rss_before})
+
+
+def list_all(tool: FileListTool, dir_name: str) -> int:
+    """
+    List a whole directory, following the continuation cursors, and return the number of entries listed.
+    """
+
+    entries = 0
+    cursor = None
+    while True:
+        listing = tool.get_file_list(dir_name, cursor=cursor)
+        lines = listing.split("\n")
+        entries += sum(1 for line in lines if line.startswith("* "))
+        match = CURSOR_PATTERN.search(lines[-1])
+        if match is None:
+            return entries
+        cursor = match.group(1)
+
+
+def percentile(values: list[float], ratio: float) -> float:
+    """
+    Return the percentile of a list of values, with linear interpolation.
+    """
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * ratio
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(case: dict, repeat: int, timeout: float) -> dict:
+    """
+    Run a benchmark case in a child process and summarise its measurements.
+    """
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run_case, args=(case, repeat, results))
+    process.start()
+
+    # Wait for the measurements, giving up if the process crashed or exceeded the timeout
+    summary = {"kind": case["kind"], "size": case["size"], "target": case["target"], "repeat": repeat}
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue_module.Empty:
+            if not process.is_alive():
+                # The measurements may still be in the pipe of a process which just exited
+                try:
+                    result = results.get(timeout=1.0)
+                except queue_module.Empty:
+                    summary["error"] = f"process exited with code {process.exitcode}"
+                    return summary
+            elif time.monotonic() >= deadline:
+                process.terminate()
+                process.join()
+                summary["error"] = f"timed out after {timeout:g} s"
+                return summary
+    process.join()
+
+    latencies = result["latencies"]
+    p50 = percentile(latencies, 0.5)
+    summary.update({
+        "p50_s": p50,
+        "p90_s": percentile(latencies, 0.9),
+        "p99_s": percentile(latencies, 0.99),
+        "mean_s": statistics.fmean(latencies),
+        "peak_rss_bytes": result["peak_rss"],
+        "peak_rss_delta_bytes": result["peak_rss"] - result["rss_before"],
+    })
+    unit = "entries_per_s" if case["kind"] == "list" else "bytes_per_s"
+    summary[unit] = result["volume"] / p50 if p50 > 0 else 0.0
+    return summary
+
+
+def report(key: str, summary: dict) -> None:
+    """
+    Print the summary of a benchmark case.
+    """
+
+    if "error" in summary:
+        print(f"{key:<50} FAILED: {summary['error']}")
+    else:
+        print(f"{key:<50} p50={summary['p50_s'] * 1000:10.3f} ms  peak_rss={summary['peak_rss_bytes'] // MB} MiB")
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Run all benchmark cases and write the measurements to a JSON file.
+    """
+
+    file_sizes = FULL_FILE_SIZES if args.full else QUICK_FILE_SIZES
+    dir_sizes = FULL_DIR_SIZES if args.full else QUICK_DIR_SIZES
+    if args.max_file_size is not None:
+        file_sizes = [size for size in file_sizes if size <= args.max_file_size]
+    if args.max_dir_size is not None:
+        dir_sizes = [size for size in dir_sizes if size <= args.max_dir_size]
+
+    results = {}
+    for target in args.target_dir or [os.getcwd()]:
+        work_dir = os.path.join(os.path.abspath(target), "yacana_tools_bench")
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            for size in file_sizes:
+                name = f"file_{size}.txt"
+                make_file(os.path.join(work_dir, name), size)
+                for kind in ("read", "read_lines", "write"):
+                    case = {"kind": kind, "size": size, "name": name, "work_dir": work_dir, "target": target}
+                    key = f"{kind}/{size}/{target}"
+                    results[key] = measure(case, args.repeat, args.timeout)
+                    report(key, results[key])
+                os.remove(os.path.join(work_dir, name))
+            for size in dir_sizes:
+                name = f"dir_{size}"
+                make_dir(os.path.join(work_dir, name), size)
+                case = {"kind": "list", "size": size, "name": name, "work_dir": work_dir, "target": target}
+                key = f"list/{size}/{target}"
+                results[key] = measure(case, args.repeat, args.timeout)
+                report(key, results[key])
+                shutil.rmtree(os.path.join(work_dir, name))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = {
+        "version": BASELINE_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, mode='w', encoding='utf-8') as fd:
+        json.dump(baseline, fd, indent=2)
+    print(f"Measurements written to '{args.output}'")
+    return 1 if any("error" in summary for summary in results.values()) else 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """
+    Compare two measurements and flag the cases which regressed.
+    """
+
+    with open(args.baseline, mode='r', encoding='utf-8') as fd:
+        baseline = json.load(fd)["results"]
+    with open(args.current, mode='r', encoding='utf-8') as fd:
+        current = json.load(fd)["results"]
+
+    regressions = 0
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key], current[key]
+        if "error" in before or "error" in after:
+            # A failed case has no measurement to compare, and is a regression if it only fails now
+            regressions += "error" in after
+            print(f"{key:<50} FAILED in {'current' if 'error' in after else 'baseline'}")
+            continue
+        latency_ratio = after["p50_s"] / before["p50_s"] if before["p50_s"] > 0 else 1.0
+        rss_ratio = after["peak_rss_bytes"] / before["peak_rss_bytes"] if before["peak_rss_bytes"] > 0 else 1.0
+        flags = []
+        if latency_ratio > 1 + args.threshold:
+            flags.append("LATENCY")
+        if rss_ratio > 1 + args.threshold:
+            flags.append("RSS")
+        regressions += bool(flags)
+        print(f"{key:<50} p50 x{latency_ratio:6.2f}  peak_rss x{rss_ratio:6.2f}  {' '.join(flags) or 'ok'}")
+    for key in sorted(set(baseline) ^ set(current)):
+        print(f"{key:<50} only in {'baseline' if key in baseline else 'current'}")
+
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    """
+    Parse the command line and run the requested command.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write the measurements to a JSON file")
+    run_parser.add_argument("--output", default="bench_baseline.json", help="the JSON file to write")
+    run_parser.add_argument("--target-dir", action="append", help="a directory where to create the test files, e.g. a tmpfs and a disk; can be repeated")
+    run_parser.add_argument("--repeat", type=int, default=20, help="the number of measured calls per case")
+    run_parser.add_argument("--full", action="store_true", help="run up to 1 GiB files and 1M entries directories")
+    run_parser.add_argument("--max-file-size", type=int, help="skip files larger than this size in bytes")
+    run_parser.add_argument("--max-dir-size", type=int, help="skip directories with more entries than this")
+    run_parser.add_argument("--timeout", type=float, default=600, help="the number of seconds after which a case is reported as failed")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON files and flag regressions")
+    compare_parser.add_argument("baseline", help="the reference JSON file")
+    compare_parser.add_argument("current", help="the JSON file to check")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="the relative slowdown flagged as a regression")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
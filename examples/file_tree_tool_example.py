@@ -0,0 +1,17 @@
+import pathlib
+from yacana import OllamaAgent, Task
+from yacana_tools import FileTreeTool
+
+if not pathlib.Path('docs').exists():
+    pathlib.Path('docs').mkdir(parents=True, exist_ok=True)
+    pathlib.Path('docs/sources').mkdir(parents=True, exist_ok=True)
+    pathlib.Path('docs/build/html').mkdir(parents=True, exist_ok=True)
+    with open('docs/alice.txt', mode='w', encoding='utf-8') as fd:
+        fd.write('alice')
+    with open('docs/build/html/bob.txt', mode='w', encoding='utf-8') as fd:
+        fd.write('bob')
+
+agent = OllamaAgent("example", "qwen3:4b-instruct")
+file_tree_tool = FileTreeTool(".")
+content = Task("Get the tree of files and directories under the directory 'docs' and output only the content.", agent, tools=[file_tree_tool]).solve().content
+print(f"The tree of 'docs' is:\n{content}")
@@ -2,6 +2,23 @@
 TBC
 """
 
+from .async_executor import AsyncExecutor, shared_executor
+from .directory_index import DirectoryIndex, IndexEntry
+from .file_content_cache import FileContentCache
+from .file_glob_tool import FileGlobTool
 from .file_list_tool import FileListTool
-from .file_read_tool import FileReadTool
+from .file_read_many_tool import FileReadManyTool
+from .file_read_tool import FileReadTool, estimate_tokens
+from .file_search_tool import FileSearchTool
+from .file_tree_tool import FileTreeTool
+from .file_usage_tool import FileUsageTool
 from .file_write_tool import FileWriteTool
+from .filesystem import ArchiveFileSystem, FileSystem, LocalFileSystem, MemoryFileSystem
+from .full_text_index import FullTextIndex
+from .full_text_search_tool import FullTextSearchTool
+from .overlay_filesystem import OverlayFileSystem
+from .path_resolver import PathResolver, ResolvedPath
+from .read_session import ReadSession
+from .tool_metrics import CallRecord, ToolMetrics
+from .trigram_index import TrigramIndex
+from .write_buffer import WriteBuffer
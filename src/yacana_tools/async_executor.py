@@ -0,0 +1,159 @@
+"""
+Async Executor for Yacana
+
+This module provides a bounded executor running the blocking I/O of the tools from asyncio code.
+"""
+
+# pylint: disable=C0301
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+class AsyncExecutor:
+    """
+    A bounded executor running blocking calls from asyncio code.
+
+    This class offloads the blocking I/O of the tools to a pool of threads, so the
+    event loop keeps serving the other agents while a file is read or written.
+    The number of calls admitted at once is bounded: once 'max_pending' calls are
+    running or queued, the next callers wait without blocking the event loop until
+    a call completes. This backpressure keeps a slow filesystem from piling up an
+    unbounded queue of calls. An executor can be shared by several tools, the tools
+    created without an executor sharing the one returned by 'shared_executor'. The
+    threads are only started by the first call, and stopped by 'close' or at the end
+    of a 'with' block. A closed executor starts new threads on its next call.
+
+    Parameters
+    ----------
+    max_workers : int
+        The number of threads running the calls.
+        Defaults to 8.
+    max_pending : int | None
+        The maximum number of calls running or queued at once. None means twice 'max_workers'.
+        Defaults to None.
+
+    Attributes
+    ----------
+    max_workers : int
+        The number of threads running the calls.
+    max_pending : int
+        The maximum number of calls running or queued at once.
+
+    Raises
+    ------
+    ValueError
+        If 'max_workers' is not a positive integer.
+        If 'max_pending' is lower than 'max_workers'.
+    """
+
+    def __init__(self, max_workers: int = 8, max_pending: int | None = None):
+
+        # Validate the limits
+        if max_workers < 1:
+            raise ValueError("Parameter 'max_workers' expected a positive integer")
+        if max_pending is None:
+            max_pending = 2 * max_workers
+        if max_pending < max_workers:
+            raise ValueError("Parameter 'max_pending' expected an integer not lower than 'max_workers'")
+
+        # Set all attributes
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        # The threads are started on first use, and the semaphore is bound to the event loop of the calls
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call in the pool of threads, waiting first for a free slot.
+
+        Parameters
+        ----------
+        func : Callable[..., Any]
+            The blocking function to call.
+        *args
+            The positional arguments of the function.
+        **kwargs
+            The keyword arguments of the function.
+
+        Returns
+        -------
+        Any
+            The result of the function. Its exceptions are raised unchanged.
+        """
+
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._loop = loop
+        async with self._semaphore:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="yacana_tools")
+                executor = self._executor
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """
+        Stop the pool of threads once the running calls complete.
+
+        Returns
+        -------
+        None
+        """
+
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the pool of threads once the running calls complete.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for the running calls to complete.
+            Defaults to True.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'AsyncExecutor':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+# The executor shared by the tools, created on first use
+_SHARED: list[AsyncExecutor] = []
+_SHARED_LOCK = threading.Lock()
+
+def shared_executor() -> AsyncExecutor:
+    """
+    Get the executor shared by the tools created without an executor.
+
+    The executor is created on first use, with the default limits, and its threads
+    are only started by the first asynchronous call of a tool.
+
+    Returns
+    -------
+    AsyncExecutor
+        The shared executor.
+    """
+
+    with _SHARED_LOCK:
+        if not _SHARED:
+            _SHARED.append(AsyncExecutor())
+        return _SHARED[0]
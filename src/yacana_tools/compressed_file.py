@@ -0,0 +1,131 @@
+"""
+Compressed Files for Yacana
+
+This module provides the reading of compressed files and of the members of archives
+as streams, and the listing of the members of archives.
+"""
+
+# pylint: disable=C0301
+
+import bz2
+import contextlib
+import gzip
+import itertools
+import lzma
+import posixpath
+import tarfile
+import zipfile
+from yacana import ToolError
+
+# The suffixes of the archives whose members can be read, and of the compressed files read transparently
+ARCHIVE_SUFFIXES = ((".zip", "zip"), (".tar", "tar"), (".tar.gz", "tar"), (".tgz", "tar"), (".tar.xz", "tar"),
+                    (".txz", "tar"), (".tar.bz2", "tar"), (".tbz2", "tar"), (".gz", "gz"), (".xz", "xz"), (".bz2", "bz2"))
+_STREAM_OPENERS = {"gz": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+# The maximum number of members listed when an archive itself is read
+MAX_ARCHIVE_MEMBERS = 1000
+# The errors raised when a compressed file or an archive is corrupted
+ERRORS = (OSError, EOFError, RuntimeError, lzma.LZMAError, zipfile.BadZipFile, tarfile.TarError)
+
+def archive_kind(file_name: str) -> str | None:
+    """
+    Get the kind of an archive or of a compressed file from its name.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the file.
+
+    Returns
+    -------
+    str | None
+        'zip' or 'tar' for an archive, 'gz', 'xz' or 'bz2' for a compressed file,
+        or None for any other file.
+    """
+
+    lower_name = file_name.lower()
+    return next((kind for suffix, kind in ARCHIVE_SUFFIXES if lower_name.endswith(suffix)), None)
+
+
+@contextlib.contextmanager
+def open_compressed(long_file_name: str, kind: str, member: str | None):
+    """
+    Open the decompressed content of a compressed file or of an archive member as a stream.
+
+    Parameters
+    ----------
+    long_file_name : str
+        The full path of the compressed file or of the archive.
+    kind : str
+        The kind of compression, as returned by 'archive_kind'.
+    member : str | None
+        The name of the member inside the archive, or None for a compressed file.
+
+    Yields
+    ------
+    tuple[BinaryIO, int | None]
+        The decompressed stream, seekable, and its size in bytes if known.
+
+    Raises
+    ------
+    ToolError
+        If the member does not exist or is not a regular file.
+    """
+
+    if kind == "zip":
+        with zipfile.ZipFile(long_file_name) as archive:
+            # The central directory gives the member without decompressing the others
+            try:
+                info = archive.getinfo(member)
+            except KeyError:
+                info = None
+            if info is None or info.is_dir():
+                raise ToolError("File does not exist.")
+            with archive.open(info) as source:
+                yield source, info.file_size
+    elif kind == "tar":
+        with tarfile.open(long_file_name, mode='r:*') as archive:
+            # Scan the headers up to the member only, so the rest of the archive is not decompressed
+            info = next((info for info in archive if posixpath.normpath(info.name) == member), None)
+            if info is None or not info.isfile():
+                raise ToolError("File does not exist.")
+            with archive.extractfile(info) as source:
+                yield source, info.size
+    else:
+        with _STREAM_OPENERS[kind](long_file_name, mode='rb') as source:
+            yield source, None
+
+
+def list_archive(file_name: str, long_file_name: str, kind: str) -> str:
+    """
+    List the files of an archive.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the archive, as provided by the LLM.
+    long_file_name : str
+        The full path of the archive.
+    kind : str
+        The kind of archive, 'zip' or 'tar'.
+
+    Returns
+    -------
+    str
+        The members of the archive with their size, at most 'MAX_ARCHIVE_MEMBERS'.
+    """
+
+    if kind == "zip":
+        with zipfile.ZipFile(long_file_name) as archive:
+            members = [(info.filename, info.file_size) for info in archive.infolist() if not info.is_dir()]
+            members = members[:MAX_ARCHIVE_MEMBERS + 1]
+    else:
+        with tarfile.open(long_file_name, mode='r:*') as archive:
+            members = list(itertools.islice(((posixpath.normpath(info.name), info.size) for info in archive if info.isfile()), MAX_ARCHIVE_MEMBERS + 1))
+
+    if not members:
+        return f"Archive '{file_name}' holds no file."
+    lines = [f"Archive '{file_name}' holds the files below. To read one, call again with the path '{file_name}/<file>'."]
+    lines.extend(f"* {name} ({size} bytes)" for name, size in members[:MAX_ARCHIVE_MEMBERS])
+    if len(members) > MAX_ARCHIVE_MEMBERS:
+        lines.append(f"[Listing stopped after {MAX_ARCHIVE_MEMBERS} files.]")
+    return "\n".join(lines)
@@ -0,0 +1,729 @@
+"""
+Directory Index for Yacana
+
+This module provides an in-memory index of a directory tree, shared between tools.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0902,R0913,R0917
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from typing import Iterator, NamedTuple
+from . import tool_metrics
+
+# inotify event masks, see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_ONLYDIR | _IN_DONT_FOLLOW)
+_EVENT_HEADER = struct.Struct("iIII")
+
+_INDEX_FORMAT_VERSION = 2
+
+class IndexEntry(NamedTuple):
+    """
+    An entry of a directory index.
+
+    This class mimics the subset of 'os.DirEntry' used by the tools, so an
+    index listing and a filesystem listing are handled the same way.
+    The status of the entry is the status of the entry itself, symbolic links
+    are not followed. The mode of the target of a symbolic link is kept aside,
+    so 'is_dir' and 'is_file' follow symbolic links by default like 'os.DirEntry'.
+    """
+
+    name: str
+    st_mode: int
+    st_size: int
+    st_mtime_ns: int
+    # The mode of the target of a symbolic link, 0 if the link is dangling, None for any other entry
+    target_mode: int | None = None
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        """
+        Return True if the entry is a directory, or a symbolic link to a directory when following symbolic links.
+        """
+
+        return stat.S_ISDIR(self._mode(follow_symlinks))
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        """
+        Return True if the entry is a regular file, or a symbolic link to a regular file when following symbolic links.
+        """
+
+        return stat.S_ISREG(self._mode(follow_symlinks))
+
+    def is_symlink(self) -> bool:
+        """
+        Return True if the entry is a symbolic link.
+        """
+
+        return stat.S_ISLNK(self.st_mode)
+
+    def stat(self, follow_symlinks: bool = True) -> 'IndexEntry': # pylint: disable=W0613
+        """
+        Return the entry itself, which holds the 'st_mode', 'st_size' and 'st_mtime_ns' fields.
+        """
+
+        return self
+
+    def _mode(self, follow_symlinks: bool) -> int:
+        """
+        Return the mode of the entry, or of the target of a symbolic link when following symbolic links.
+        """
+
+        return self.target_mode if follow_symlinks and self.target_mode is not None else self.st_mode
+
+class DirectoryIndex:
+    """
+    An in-memory index of all paths under a root directory.
+
+    This class records the type, size and modification time of every file and
+    directory under the root directory, so listings can be answered without
+    hitting the filesystem. The index is built once, then kept up to date by a
+    background thread using Linux inotify. A periodic rescan is used as a fallback
+    when inotify is not available or has lost events. The index can be persisted
+    to a file, so a restart serves the previous index immediately while it is
+    reconciled with the filesystem in the background.
+    Symbolic links are indexed but never walked, the mode of their target being
+    recorded so they are typed like in a filesystem listing.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path to index.
+        Defaults to ".".
+    index_file : str | None
+        The path of the file where the index is persisted. None means no persistence.
+        Defaults to None.
+    rescan_interval : float | None
+        The number of seconds between two full rescans. None means no periodic rescan.
+        Defaults to 300.
+    use_inotify : bool
+        Whether inotify is used to keep the index up to date, when available.
+        Defaults to True.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path to index.
+    index_file : str | None
+        The path of the file where the index is persisted.
+    rescan_interval : float | None
+        The number of seconds between two full rescans.
+    use_inotify : bool
+        Whether inotify is used to keep the index up to date, when available.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'rescan_interval' is not a positive number.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 index_file: str | None = None,
+                 rescan_interval: float | None = 300,
+                 use_inotify: bool = True):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        root_dir = os.path.normpath(root_dir)
+        root_dir = os.path.abspath(root_dir)
+
+        if not os.path.isdir(root_dir):
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+
+        # Validate that the parameter 'rescan_interval' is a positive number
+        if rescan_interval is not None and rescan_interval <= 0:
+            raise ValueError("Parameter 'rescan_interval' expected a positive number")
+
+        # Set all attributes
+        self.root_dir = root_dir
+        self.index_file = index_file
+        self.rescan_interval = rescan_interval
+        self.use_inotify = use_inotify
+        self._listings: dict[str, dict[str, tuple[int, int, int, int | None]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._inotify_fd: int | None = None
+        self._libc = None
+        self._watches: dict[int, str] = {}
+        self._watched: dict[str, int] = {}
+        self._last_scan = 0.0
+
+    def __enter__(self) -> 'DirectoryIndex':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def watching(self) -> bool:
+        """
+        Whether the index is kept up to date by inotify.
+        """
+
+        return self._inotify_fd is not None
+
+    def start(self) -> None:
+        """
+        Load or build the index, then start keeping it up to date in the background.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._thread is not None:
+            return
+
+        loaded = self._load()
+        if not loaded:
+            self.rescan()
+        if self.use_inotify:
+            self._start_inotify()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(loaded,), name="DirectoryIndex", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop keeping the index up to date and persist it if an index file is set.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._stop_inotify()
+        if self.index_file is not None:
+            self.save()
+
+    def rescan(self) -> None:
+        """
+        Rebuild the whole index from the filesystem.
+
+        Returns
+        -------
+        None
+        """
+
+        listings = self._scan("")
+        with self._lock:
+            self._listings = listings
+        self._last_scan = time.monotonic()
+        if self._inotify_fd is not None:
+            for rel_dir in listings:
+                self._add_watch(rel_dir)
+
+    def save(self) -> None:
+        """
+        Persist the index to the index file.
+
+        The file is written next to its final location then renamed, so a crash
+        never leaves a partial index file.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If no index file is set.
+        """
+
+        if self.index_file is None:
+            raise ValueError("No index file to save the index to")
+
+        with self._lock:
+            data = {
+                "version": _INDEX_FORMAT_VERSION,
+                "root_dir": self.root_dir,
+                "listings": {rel_dir: [[name, *fields] for name, fields in listing.items()]
+                             for rel_dir, listing in self._listings.items()},
+            }
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, mode='w', encoding='utf-8') as fd:
+            json.dump(data, fd, separators=(",", ":"))
+        os.replace(temp_file, self.index_file)
+
+    def list_dir(self, rel_dir: str) -> list[IndexEntry] | None:
+        """
+        List the entries of an indexed directory.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The path of the directory, relative to the root directory.
+
+        Returns
+        -------
+        list[IndexEntry] | None
+            The entries of the directory, in no particular order, or None if the
+            directory is not in the index.
+        """
+
+        rel_dir = _normalize(rel_dir)
+        with self._lock:
+            listing = self._listings.get(rel_dir)
+            if listing is None:
+                return None
+            entries = [IndexEntry(name, *fields) for name, fields in listing.items()]
+        tool_metrics.count("cache_hits")
+        return entries
+
+    def get(self, rel_path: str) -> IndexEntry | None:
+        """
+        Get the entry of an indexed path.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path, relative to the root directory.
+
+        Returns
+        -------
+        IndexEntry | None
+            The entry of the path, or None if the path is not in the index.
+        """
+
+        rel_dir, name = os.path.split(_normalize(rel_path))
+        with self._lock:
+            fields = self._listings.get(rel_dir, {}).get(name)
+        return IndexEntry(name, *fields) if fields is not None else None
+
+    def walk(self, rel_dir: str = "") -> Iterator[tuple[str, IndexEntry]]:
+        """
+        Iterate over all indexed entries under a directory.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The path of the directory, relative to the root directory.
+            Defaults to "", meaning the root directory.
+
+        Yields
+        ------
+        tuple[str, IndexEntry]
+            The path of each entry relative to the root directory, and the entry.
+        """
+
+        pending = [_normalize(rel_dir)]
+        while pending:
+            current = pending.pop()
+            for entry in self.list_dir(current) or []:
+                rel_path = os.path.join(current, entry.name)
+                yield rel_path, entry
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(rel_path)
+
+    def relative(self, long_path: str) -> str | None:
+        """
+        Convert a full path to a path relative to the root directory.
+
+        Parameters
+        ----------
+        long_path : str
+            The full normalized path.
+
+        Returns
+        -------
+        str | None
+            The relative path, or None if the path is not under the root directory.
+        """
+
+        if long_path == self.root_dir:
+            return ""
+        if not long_path.startswith(self.root_dir.rstrip(os.sep) + os.sep):
+            return None
+        return long_path[len(self.root_dir.rstrip(os.sep)) + 1:]
+
+    def _scan(self, rel_dir: str) -> dict[str, dict[str, tuple[int, int, int, int | None]]]:
+        """
+        Scan a directory tree from the filesystem.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The path of the top directory, relative to the root directory.
+
+        Returns
+        -------
+        dict[str, dict[str, tuple[int, int, int, int | None]]]
+            The mode, size, modification time and target mode of each entry, by name, by relative directory path.
+        """
+
+        listings = {}
+        pending = [rel_dir]
+        while pending:
+            current = pending.pop()
+            listing = {}
+            try:
+                with os.scandir(os.path.join(self.root_dir, current)) as iterator:
+                    for entry in iterator:
+                        tool_metrics.count("entries_scanned")
+                        tool_metrics.count("stat_calls")
+                        try:
+                            stat_result = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        listing[entry.name] = _fields(entry.path, stat_result)
+                        if stat.S_ISDIR(stat_result.st_mode):
+                            pending.append(os.path.join(current, entry.name))
+            except OSError:
+                continue
+            listings[current] = listing
+        return listings
+
+    def _load(self) -> bool:
+        """
+        Load the index from the index file, if it exists and matches the root directory.
+
+        Returns
+        -------
+        bool
+            True if the index was loaded, False otherwise.
+        """
+
+        if self.index_file is None or not os.path.isfile(self.index_file):
+            return False
+
+        try:
+            with open(self.index_file, mode='r', encoding='utf-8') as fd:
+                data = json.load(fd)
+            if data.get("version") != _INDEX_FORMAT_VERSION or data.get("root_dir") != self.root_dir:
+                return False
+            listings = {rel_dir: {item[0]: tuple(item[1:]) for item in items}
+                        for rel_dir, items in data["listings"].items()}
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as error:
+            logging.warning("Index file '%s' cannot be loaded: %s", self.index_file, error)
+            return False
+
+        with self._lock:
+            self._listings = listings
+        return True
+
+    def _run(self, reconcile: bool) -> None:
+        """
+        Keep the index up to date until the index is stopped.
+
+        Parameters
+        ----------
+        reconcile : bool
+            Whether to rescan the index first, because it was loaded from the index file.
+
+        Returns
+        -------
+        None
+        """
+
+        if reconcile:
+            self.rescan()
+
+        while not self._stop.is_set():
+            if self.rescan_interval is not None and time.monotonic() - self._last_scan >= self.rescan_interval:
+                self.rescan()
+            # inotify may be stopped by a rescan from another thread, closing its descriptor
+            inotify_fd = self._inotify_fd
+            if inotify_fd is None:
+                self._stop.wait(1.0)
+                continue
+            try:
+                readable, _, _ = select.select([inotify_fd], [], [], 1.0)
+            except (OSError, ValueError):
+                continue
+            if readable:
+                self._handle_events()
+
+    def _start_inotify(self) -> None:
+        """
+        Open an inotify instance and watch all indexed directories, when available.
+
+        Returns
+        -------
+        None
+        """
+
+        if not sys.platform.startswith("linux"):
+            return
+
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            inotify_fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as error:
+            logging.warning("inotify is not available, the index is only rescanned: %s", error)
+            return
+        if inotify_fd < 0:
+            logging.warning("inotify is not available, the index is only rescanned: %s", os.strerror(ctypes.get_errno()))
+            return
+
+        self._inotify_fd = inotify_fd
+        with self._lock:
+            rel_dirs = list(self._listings)
+        for rel_dir in rel_dirs:
+            if not self._add_watch(rel_dir):
+                break
+
+    def _stop_inotify(self) -> None:
+        """
+        Close the inotify instance, if any.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            inotify_fd, self._inotify_fd = self._inotify_fd, None
+            self._watches.clear()
+            self._watched.clear()
+        if inotify_fd is not None:
+            os.close(inotify_fd)
+
+    def _add_watch(self, rel_dir: str) -> bool:
+        """
+        Watch a directory with inotify.
+
+        When the watch cannot be added, for example because the inotify watches
+        limit is reached, inotify is stopped and the index is only rescanned.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The path of the directory, relative to the root directory.
+
+        Returns
+        -------
+        bool
+            True if the directory is watched, False otherwise.
+        """
+
+        # The watches are shared by the inotify thread and the callers of 'rescan'
+        with self._lock:
+            if self._inotify_fd is None:
+                return False
+            if rel_dir in self._watched:
+                return True
+            long_dir = os.fsencode(os.path.join(self.root_dir, rel_dir))
+            watch = self._libc.inotify_add_watch(self._inotify_fd, long_dir, _WATCH_MASK)
+            if watch >= 0:
+                self._watches[watch] = rel_dir
+                self._watched[rel_dir] = watch
+                return True
+            error = ctypes.get_errno()
+
+        if error in (errno.ENOENT, errno.ENOTDIR):
+            # The directory was removed since it was scanned
+            return True
+        logging.warning("inotify cannot watch '%s', the index is only rescanned: %s", rel_dir, os.strerror(error))
+        self._stop_inotify()
+        return False
+
+    def _handle_events(self) -> None:
+        """
+        Read the pending inotify events and update the index accordingly.
+
+        Returns
+        -------
+        None
+        """
+
+        inotify_fd = self._inotify_fd
+        if inotify_fd is None:
+            return
+        try:
+            buffer = os.read(inotify_fd, 64 * 1024)
+        except OSError:
+            # No pending event, or inotify was stopped meanwhile
+            return
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            watch, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name = os.fsdecode(buffer[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += _EVENT_HEADER.size + length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, so only a full rescan can restore the index
+                self.rescan()
+                continue
+            if mask & _IN_IGNORED:
+                with self._lock:
+                    rel_dir = self._watches.pop(watch, None)
+                    if rel_dir is not None and self._watched.get(rel_dir) == watch:
+                        del self._watched[rel_dir]
+                continue
+
+            with self._lock:
+                rel_dir = self._watches.get(watch)
+            if rel_dir is None or not name:
+                continue
+            rel_path = os.path.join(rel_dir, name)
+
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._remove(rel_path)
+            elif mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._add_tree(rel_path)
+            else:
+                self._update(rel_path)
+
+    def _update(self, rel_path: str) -> None:
+        """
+        Refresh the entry of a path from the filesystem.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path, relative to the root directory.
+
+        Returns
+        -------
+        None
+        """
+
+        rel_dir, name = os.path.split(rel_path)
+        long_path = os.path.join(self.root_dir, rel_path)
+        tool_metrics.count("stat_calls")
+        try:
+            stat_result = os.lstat(long_path)
+        except OSError:
+            self._remove(rel_path)
+            return
+        fields = _fields(long_path, stat_result)
+        with self._lock:
+            listing = self._listings.get(rel_dir)
+            if listing is not None:
+                listing[name] = fields
+
+    def _add_tree(self, rel_path: str) -> None:
+        """
+        Index and watch a new directory tree.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the top directory, relative to the root directory.
+
+        Returns
+        -------
+        None
+        """
+
+        self._update(rel_path)
+        listings = self._scan(rel_path)
+        with self._lock:
+            self._listings.update(listings)
+        for rel_dir in listings:
+            self._add_watch(rel_dir)
+
+    def _remove(self, rel_path: str) -> None:
+        """
+        Remove a path, and the tree under it, from the index.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path, relative to the root directory.
+
+        Returns
+        -------
+        None
+        """
+
+        rel_dir, name = os.path.split(rel_path)
+        prefix = rel_path + os.sep
+        with self._lock:
+            fields = self._listings.get(rel_dir, {}).pop(name, None)
+            removed = []
+            if fields is None or stat.S_ISDIR(fields[0]):
+                removed = [key for key in self._listings if key == rel_path or key.startswith(prefix)]
+            for key in removed:
+                del self._listings[key]
+
+            # A directory moved out of the tree keeps its watch, so remove it
+            for key in removed:
+                watch = self._watched.pop(key, None)
+                if watch is not None:
+                    self._watches.pop(watch, None)
+                    if self._inotify_fd is not None:
+                        self._libc.inotify_rm_watch(self._inotify_fd, watch)
+
+
+def _fields(long_path: str, stat_result: os.stat_result) -> tuple[int, int, int, int | None]:
+    """
+    Build the indexed fields of an entry from its status, adding the mode of the target of a symbolic link.
+
+    Parameters
+    ----------
+    long_path : str
+        The full path of the entry.
+    stat_result : os.stat_result
+        The status of the entry itself.
+
+    Returns
+    -------
+    tuple[int, int, int, int | None]
+        The mode, size, modification time and target mode of the entry.
+    """
+
+    target_mode = None
+    if stat.S_ISLNK(stat_result.st_mode):
+        tool_metrics.count("stat_calls")
+        try:
+            target_mode = os.stat(long_path).st_mode
+        except OSError:
+            # A dangling symbolic link is neither a file nor a directory
+            target_mode = 0
+    return stat_result.st_mode, stat_result.st_size, stat_result.st_mtime_ns, target_mode
+
+
+def _normalize(rel_path: str) -> str:
+    """
+    Normalize a path relative to the root directory, the root directory being "".
+
+    Parameters
+    ----------
+    rel_path : str
+        The relative path.
+
+    Returns
+    -------
+    str
+        The normalized relative path.
+    """
+
+    rel_path = os.path.normpath(rel_path)
+    return "" if rel_path == "." else rel_path
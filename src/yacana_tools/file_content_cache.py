@@ -0,0 +1,153 @@
+"""
+File Content Cache for Yacana
+
+This module provides an in-memory cache of file contents, shared between tools.
+"""
+
+# pylint: disable=C0301
+
+import os
+import threading
+from collections import OrderedDict
+from . import tool_metrics
+
+class FileContentCache:
+    """
+    An in-memory LRU cache of file contents.
+
+    This class keeps the decoded content of the most recently read files. An entry
+    is keyed on the device, inode, size and modification time of the file, so a
+    modified file never matches its previous entry and a single 'os.stat' is
+    enough to validate a cached content. When the total size of the cached files
+    exceeds the byte cap, the least recently used entries are evicted.
+    The cache is thread-safe and can be shared between several tools.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum total size in bytes of the cached files.
+        Defaults to 64 MiB.
+
+    Attributes
+    ----------
+    max_bytes : int
+        The maximum total size in bytes of the cached files.
+    size : int
+        The total size in bytes of the cached files.
+    hits : int
+        The number of lookups which found a valid entry.
+    misses : int
+        The number of lookups which found no valid entry.
+
+    Raises
+    ------
+    ValueError
+        If 'max_bytes' is not a positive integer.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+
+        # Validate that the parameter 'max_bytes' is a positive integer
+        if max_bytes < 1:
+            raise ValueError("Parameter 'max_bytes' expected a positive integer")
+
+        # Set all attributes
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[int, int, int, int], tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(stat_result: os.stat_result) -> tuple[int, int, int, int]:
+        """
+        Build the cache key of a file from its status.
+
+        Parameters
+        ----------
+        stat_result : os.stat_result
+            The status of the file, as returned by 'os.stat'.
+
+        Returns
+        -------
+        tuple[int, int, int, int]
+            The device, inode, size and modification time in nanoseconds of the file.
+        """
+
+        return (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+    def get(self, key: tuple[int, int, int, int]) -> str | None:
+        """
+        Look up the content of a file.
+
+        Parameters
+        ----------
+        key : tuple[int, int, int, int]
+            The cache key of the file, as returned by 'key'.
+
+        Returns
+        -------
+        str | None
+            The cached content of the file, or None if not cached.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        tool_metrics.count("cache_hits")
+        return entry[0]
+
+    def put(self, key: tuple[int, int, int, int], content: str) -> None:
+        """
+        Store the content of a file.
+
+        A file larger than the byte cap is not stored.
+
+        Parameters
+        ----------
+        key : tuple[int, int, int, int]
+            The cache key of the file, as returned by 'key'.
+        content : str
+            The content of the file.
+
+        Returns
+        -------
+        None
+        """
+
+        file_size = key[2]
+        if file_size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (content, file_size)
+            self.size += file_size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
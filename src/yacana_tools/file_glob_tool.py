@@ -0,0 +1,622 @@
+"""
+File Glob Tool for Yacana
+
+This module provides a tool for finding the files and subdirectories matching a glob
+pattern in the local filesystem.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0902,R0913,R0917
+
+import fnmatch
+import os
+import re
+import stat
+import threading
+from typing import Iterator, NamedTuple
+from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_bool
+
+DEFAULT_EXCLUDED_DIRS = (".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox")
+DEFAULT_IGNORE_FILES = (".gitignore", ".ignore")
+
+# A directory holding this file is a Python virtual environment, whatever its name
+_VENV_MARKER = "pyvenv.cfg"
+
+class _IgnoreRule(NamedTuple):
+    """
+    A compiled rule of an ignore file.
+    """
+
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+class FileGlobTool(Tool):
+    """
+    A tool for finding the files and subdirectories matching a glob pattern in the local filesystem.
+
+    This class provides functionality to resolve a glob pattern such as 'src/**/*.py'
+    under a directory in a single call. It ensures that the provided path is valid and
+    that the directory exists before attempting to walk it. Only the directories which
+    may hold a match are walked: the literal parts of the pattern are looked up directly
+    and the other directories are pruned as soon as the pattern cannot match under them.
+    The entries ignored by the '.gitignore' and '.ignore' files, and the version control,
+    dependency and virtual environment directories, are skipped. The ignore files are
+    compiled once and cached until they change.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    max_results : int
+        The maximum number of paths returned by a search.
+        Defaults to 1000.
+    excluded_dirs : tuple[str, ...]
+        The names of the directories never walked, unless the ignored entries are requested.
+        Defaults to DEFAULT_EXCLUDED_DIRS.
+    ignore_files : tuple[str, ...]
+        The names of the files holding ignore rules, in the '.gitignore' syntax.
+        Defaults to DEFAULT_IGNORE_FILES.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    path_resolver : PathResolver
+        The validator of the directory paths.
+    max_results : int
+        The maximum number of paths returned by a search.
+        Defaults to 1000.
+    excluded_dirs : frozenset[str]
+        The names of the directories never walked.
+    ignore_files : tuple[str, ...]
+        The names of the files holding ignore rules.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_results' is not a positive integer.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 max_results: int = 1000,
+                 excluded_dirs: tuple[str, ...] = DEFAULT_EXCLUDED_DIRS,
+                 ignore_files: tuple[str, ...] = DEFAULT_IGNORE_FILES,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Validate that the parameter 'max_results' is a positive integer
+        if max_results < 1:
+            raise ValueError("Parameter 'max_results' expected a positive integer")
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+        self.max_results = max_results
+        self.excluded_dirs = frozenset(excluded_dirs)
+        self.ignore_files = tuple(ignore_files)
+        self.metrics = metrics
+        # Compiled rules, modification time and size by full path of ignore file
+        self._ignore_cache: dict[str, tuple[int, int, list[_IgnoreRule]]] = {}
+        self._ignore_lock = threading.Lock()
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FileGlob",
+            function_description="Find the files and subdirectories matching a glob pattern such as 'src/**/*.py' under a directory in the local filesystem, skipping the ignored ones.",
+            function_ref=self.glob if metrics is None else metrics.instrument("FileGlob", self.glob),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    def glob(self, pattern: str, dir_name: str = ".", include_ignored: bool = False) -> str:
+        """
+        Find the files and subdirectories matching a glob pattern under a directory.
+
+        The pattern is made of names separated by '/', where '*' matches any
+        characters but '/', '?' matches one character, '[abc]' matches one of the
+        characters and '**' matches any number of subdirectories, or everything
+        at the end of the pattern. Each match is
+        returned as '* path', the path being relative to the root directory and
+        ending with '/' for a directory. When the number of matches reaches the
+        limit, the search stops and a notice is appended.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        pattern : str
+            The glob pattern, relative to the directory, e.g. '**/*.py' or 'src/*/test_*.py'.
+        dir_name : str
+            The name of the directory where to search.
+            Note: the path of this directory MUST be relative.
+        include_ignored : bool
+            Whether the entries ignored by the ignore files, and the excluded directories, are searched too.
+            Defaults to False.
+
+        Returns
+        -------
+        str
+            The matching paths, or a message if nothing matches.
+
+        Raises
+        ------
+        ToolError
+            If the pattern is not provided, is absolute or leaves the directory.
+            If the directory name is not provided or is invalid.
+            If the directory does not exist.
+        """
+
+        # Validate that the pattern is provided, relative and stays inside the directory
+        if not pattern or not pattern.strip():
+            raise ToolError("Pattern was not provided or is empty.")
+        if os.path.isabs(pattern) or pattern.startswith(("/", "\\")):
+            raise ToolError("Pattern must be relative to the directory.")
+        segments = [segment for segment in pattern.strip().replace("\\", "/").split("/") if segment not in ("", ".")]
+        if os.pardir in segments:
+            raise ToolError("Pattern must not hold '..'.")
+        if not segments:
+            raise ToolError("Pattern was not provided or is empty.")
+        include_ignored = validate_bool(include_ignored)
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        resolved = self.path_resolver.resolve(dir_name, "Directory")
+
+        # Validate that the directory exists
+        if not resolved.is_dir():
+            raise ToolError("Directory does not exist.")
+
+        matcher = _GlobMatcher(segments)
+        # The rules of the ignore files between the root directory and the searched directory apply too
+        ignores = [] if include_ignored else self._parent_ignores(resolved.long_name)
+
+        lines = []
+        for long_name, is_dir in self._walk(resolved.long_name, matcher, ignores, bool(include_ignored)):
+            lines.append(f"* {os.path.relpath(long_name, self.root_dir)}{'/' if is_dir else ''}")
+            if len(lines) >= self.max_results:
+                lines.append(f"[Search stopped after {self.max_results} matches. Narrow the pattern or the directory to see more.]")
+                break
+
+        if not lines:
+            return "No match found."
+
+        return "\n".join(lines)
+
+    def _walk(self, long_dir_name: str, matcher: "_GlobMatcher", ignores: list[tuple[str, list[_IgnoreRule]]],
+              include_ignored: bool) -> Iterator[tuple[str, bool]]:
+        """
+        Iterate over the matching entries under a directory, in a stable order.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory where to search.
+        matcher : _GlobMatcher
+            The compiled glob pattern.
+        ignores : list[tuple[str, list[_IgnoreRule]]]
+            The full path of the directory and the rules of each ignore file applying
+            to the directory, the outermost first.
+        include_ignored : bool
+            Whether the ignored entries and the excluded directories are searched too.
+
+        Yields
+        ------
+        tuple[str, bool]
+            The full path of each matching entry and whether it is a directory.
+        """
+
+        # Directories to walk, with the states of the pattern and the ignore rules applying to them
+        pending = [(long_dir_name, matcher.start(), ignores)]
+        while pending:
+            current, states, current_ignores = pending.pop()
+            entries = self._list(current, matcher.literals(states))
+            if entries is None:
+                continue
+            if not include_ignored:
+                # A virtual environment is skipped whatever its name
+                if current != long_dir_name and any(name == _VENV_MARKER for name, _ in entries):
+                    continue
+                current_ignores = current_ignores + self._ignores(current, entries)
+            dirs = []
+            for name, is_dir in entries:
+                if not include_ignored and ((is_dir and name in self.excluded_dirs) or _is_ignored(current_ignores, os.path.join(current, name), is_dir)):
+                    continue
+                next_states = matcher.step(states, name, is_dir)
+                if not next_states:
+                    continue
+                long_name = os.path.join(current, name)
+                if matcher.matched(next_states):
+                    yield long_name, is_dir
+                # Only directories where the pattern may still match are walked
+                if is_dir and matcher.walkable(next_states):
+                    dirs.append((long_name, next_states, current_ignores))
+            pending.extend(reversed(dirs))
+
+    def _list(self, long_dir_name: str, names: list[str] | None) -> list[tuple[str, bool]] | None:
+        """
+        List the names of the entries of a directory, and whether they are directories.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory.
+        names : list[str] | None
+            The only names which may match, looked up without listing the directory,
+            or None to list the directory.
+
+        Returns
+        -------
+        list[tuple[str, bool]] | None
+            The entries sorted by name, or None if the directory cannot be listed.
+        """
+
+        if names is not None:
+            # The ignore files and the virtual environment marker are looked up too
+            entries = []
+            for name in sorted(set(names).union(self.ignore_files, (_VENV_MARKER,))):
+                tool_metrics.count("stat_calls")
+                try:
+                    # Symbolic links are not followed, so the search cannot loop or leave the root directory
+                    entries.append((name, stat.S_ISDIR(os.lstat(os.path.join(long_dir_name, name)).st_mode)))
+                except OSError:
+                    continue
+            return entries
+        try:
+            with os.scandir(long_dir_name) as iterator:
+                entries = sorted(((entry.name, entry.is_dir(follow_symlinks=False)) for entry in iterator), key=lambda entry: entry[0])
+        except OSError:
+            return None
+        tool_metrics.count("entries_scanned", len(entries))
+        return entries
+
+    def _ignores(self, long_dir_name: str, entries: list[tuple[str, bool]]) -> list[tuple[str, list[_IgnoreRule]]]:
+        """
+        Get the rules of the ignore files of a directory.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory.
+        entries : list[tuple[str, bool]]
+            The entries of the directory.
+
+        Returns
+        -------
+        list[tuple[str, list[_IgnoreRule]]]
+            The full path of the directory and the rules of each of its ignore files.
+        """
+
+        names = {name for name, is_dir in entries if not is_dir}
+        ignores = []
+        for ignore_file in self.ignore_files:
+            if ignore_file in names:
+                rules = self._load_rules(os.path.join(long_dir_name, ignore_file))
+                if rules:
+                    ignores.append((long_dir_name, rules))
+        return ignores
+
+    def _parent_ignores(self, long_dir_name: str) -> list[tuple[str, list[_IgnoreRule]]]:
+        """
+        Get the rules of the ignore files from the root directory down to the parent of a directory.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory.
+
+        Returns
+        -------
+        list[tuple[str, list[_IgnoreRule]]]
+            The full path of each directory and the rules of each of its ignore files, the outermost first.
+        """
+
+        ignores = []
+        rel_dir_name = os.path.relpath(long_dir_name, self.root_dir)
+        parts = [] if rel_dir_name == os.curdir else rel_dir_name.split(os.sep)
+        current = self.root_dir
+        for part in parts:
+            for ignore_file in self.ignore_files:
+                long_file_name = os.path.join(current, ignore_file)
+                if os.path.isfile(long_file_name):
+                    rules = self._load_rules(long_file_name)
+                    if rules:
+                        ignores.append((current, rules))
+            current = os.path.join(current, part)
+        return ignores
+
+    def _load_rules(self, long_file_name: str) -> list[_IgnoreRule]:
+        """
+        Get the compiled rules of an ignore file, from the cache if the file did not change.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the ignore file.
+
+        Returns
+        -------
+        list[_IgnoreRule]
+            The compiled rules, or an empty list if the file cannot be read.
+        """
+
+        tool_metrics.count("stat_calls")
+        try:
+            stat_result = os.stat(long_file_name)
+        except OSError:
+            return []
+        with self._ignore_lock:
+            cached = self._ignore_cache.get(long_file_name)
+        if cached is not None and cached[0] == stat_result.st_mtime_ns and cached[1] == stat_result.st_size:
+            tool_metrics.count("cache_hits")
+            return cached[2]
+        try:
+            with open(long_file_name, mode='r', encoding='utf-8', errors='replace') as fd:
+                text = fd.read()
+        except OSError:
+            return []
+        tool_metrics.count("bytes_read", stat_result.st_size)
+        rules = _compile_ignore(text)
+        with self._ignore_lock:
+            self._ignore_cache[long_file_name] = (stat_result.st_mtime_ns, stat_result.st_size, rules)
+        return rules
+
+
+class _GlobMatcher:
+    """
+    A glob pattern compiled as a set of states, one state per segment of the pattern.
+
+    A state is the index of the next segment to match. The pattern matches a path
+    when the end state is reached, and a directory may hold a match while a state
+    is left before the end state.
+    """
+
+    def __init__(self, segments: list[str]):
+        # Consecutive '**' match the same as a single one
+        self.segments = [segment for index, segment in enumerate(segments) if not (segment == "**" and index > 0 and segments[index - 1] == "**")]
+        self.regexes = [None if segment == "**" or not _has_magic(segment) else re.compile(fnmatch.translate(segment)) for segment in self.segments]
+
+    def _closure(self, states: frozenset[int]) -> frozenset[int]:
+        """
+        Add the states reached by matching '**' with no directory.
+        """
+
+        closed = set(states)
+        for state in sorted(states):
+            while state < len(self.segments) and self.segments[state] == "**":
+                state += 1
+                closed.add(state)
+        return frozenset(closed)
+
+    def start(self) -> frozenset[int]:
+        """
+        Get the states of the searched directory.
+        """
+
+        return self._closure(frozenset((0,)))
+
+    def step(self, states: frozenset[int], name: str, is_dir: bool) -> frozenset[int]:
+        """
+        Get the states of an entry from the states of its directory.
+        """
+
+        next_states = set()
+        for state in states:
+            if state >= len(self.segments):
+                continue
+            segment = self.segments[state]
+            if segment == "**":
+                # '**' matches any number of directories, and any entry at the end of the pattern
+                if is_dir:
+                    next_states.add(state)
+                elif state == len(self.segments) - 1:
+                    next_states.add(state + 1)
+            elif (self.regexes[state].match(name) if self.regexes[state] is not None else segment == name):
+                next_states.add(state + 1)
+        return self._closure(frozenset(next_states))
+
+    def matched(self, states: frozenset[int]) -> bool:
+        """
+        Tell whether an entry with these states matches the pattern.
+        """
+
+        return len(self.segments) in states
+
+    def walkable(self, states: frozenset[int]) -> bool:
+        """
+        Tell whether a directory with these states may hold a match.
+        """
+
+        return any(state < len(self.segments) for state in states)
+
+    def literals(self, states: frozenset[int]) -> list[str] | None:
+        """
+        Get the only names which may match in a directory with these states, or None if any name may match.
+        """
+
+        names = []
+        for state in states:
+            if state >= len(self.segments):
+                continue
+            if self.regexes[state] is not None or self.segments[state] == "**":
+                return None
+            names.append(self.segments[state])
+        return names
+
+
+def _has_magic(segment: str) -> bool:
+    """
+    Tell whether a segment of a glob pattern holds a wildcard.
+
+    Parameters
+    ----------
+    segment : str
+        The segment.
+
+    Returns
+    -------
+    bool
+        True if the segment holds '*', '?' or '['.
+    """
+
+    return any(char in segment for char in "*?[")
+
+
+def _compile_ignore(text: str) -> list[_IgnoreRule]:
+    """
+    Compile the rules of an ignore file in the '.gitignore' syntax.
+
+    Parameters
+    ----------
+    text : str
+        The content of the ignore file.
+
+    Returns
+    -------
+    list[_IgnoreRule]
+        The compiled rules, in the order of the file.
+    """
+
+    rules = []
+    for line in text.splitlines():
+        # Trailing spaces are ignored unless escaped, and '#' starts a comment unless escaped
+        line = re.sub(r"(?<!\\) +$", "", line)
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith(("\\#", "\\!")):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A pattern with a '/' but at its end is relative to the directory of the ignore file
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _translate_ignore(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        try:
+            rules.append(_IgnoreRule(re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+        except re.error:
+            continue
+    return rules
+
+
+def _translate_ignore(pattern: str) -> str:
+    """
+    Translate a pattern of an ignore file to a regular expression.
+
+    Parameters
+    ----------
+    pattern : str
+        The pattern, without negation, leading and trailing '/'.
+
+    Returns
+    -------
+    str
+        The regular expression matching the paths relative to the directory of the ignore file.
+    """
+
+    result = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index) and (index == 0 or pattern[index - 1] == "/"):
+            # Any number of directories, including none
+            result.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index) and index + 2 == len(pattern) and (index == 0 or pattern[index - 1] == "/"):
+            # Everything inside
+            result.append(".*")
+            index += 2
+        elif char == "*":
+            result.append("[^/]*")
+            index += 1
+        elif char == "?":
+            result.append("[^/]")
+            index += 1
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end == -1:
+                result.append(re.escape(char))
+                index += 1
+            else:
+                content = pattern[index + 1:end]
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                result.append("[" + content.replace("\\", "\\\\") + "]")
+                index = end + 1
+        elif char == "\\" and index + 1 < len(pattern):
+            result.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            result.append(re.escape(char))
+            index += 1
+    return "".join(result)
+
+
+def _is_ignored(ignores: list[tuple[str, list[_IgnoreRule]]], long_name: str, is_dir: bool) -> bool:
+    """
+    Tell whether an entry is ignored by the rules of the ignore files.
+
+    The rules of the innermost ignore file win, and in a file the last matching rule wins.
+
+    Parameters
+    ----------
+    ignores : list[tuple[str, list[_IgnoreRule]]]
+        The full path of the directory and the rules of each ignore file, the outermost first.
+    long_name : str
+        The full path of the entry.
+    is_dir : bool
+        Whether the entry is a directory.
+
+    Returns
+    -------
+    bool
+        True if the entry is ignored.
+    """
+
+    for long_dir_name, rules in reversed(ignores):
+        rel_name = long_name[len(long_dir_name):].lstrip(os.sep).replace(os.sep, "/")
+        for rule in reversed(rules):
+            if (is_dir or not rule.dir_only) and rule.regex.match(rel_name):
+                return not rule.negate
+    return False
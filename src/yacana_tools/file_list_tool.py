@@ -7,9 +7,25 @@ This module provides a tool for listing files and subdirectories in the local fi
 # pylint: disable=C0301
 # pylint: disable=R0913,R0917
 
+import base64
+import binascii
+import fnmatch
+import heapq
 import os
-from pathlib import Path
+import stat
+import time
+from typing import Callable
 from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .async_executor import AsyncExecutor, shared_executor
+from .directory_index import DirectoryIndex, IndexEntry
+from .filesystem import FileSystem
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_bool, validate_int
+
+ENTRY_TYPES = ("file", "directory")
+SORT_KEYS = ("name", "size", "mtime")
 
 class FileListTool(Tool):
     """
@@ -23,8 +39,30 @@ class FileListTool(Tool):
     Parameters
     ----------
     root_dir : str
-        The root directory path from where the directory is located.
+        The root directory path from where the directory is located, in the backend if any.
         Defaults to ".".
+    max_entries : int
+        The maximum number of entries returned by a listing.
+        Defaults to 1000.
+    index : DirectoryIndex | None
+        The index of the directory tree, used to answer listings without hitting
+        the filesystem. Directories not in the index are listed from the filesystem.
+        None means no index.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the directories are listed, e.g. an in-memory
+        filesystem or a zip or tar snapshot, possibly shared with other tools.
+        The index only applies to the local disk. None means the local disk.
+        Defaults to None.
+    executor : AsyncExecutor | None
+        The bounded executor running the async variant of the tool, possibly
+        shared with other tools. None means the executor shared by the tools,
+        see 'shared_executor'.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
     optional : bool
         Whether the tool is optional.
         Defaults to False.
@@ -43,45 +81,90 @@ class FileListTool(Tool):
     root_dir : str
         The root directory path where the file is located.
         Defaults to ".".
+    path_resolver : PathResolver | None
+        The validator of the directory paths, or None with a backend.
+    max_entries : int
+        The maximum number of entries returned by a listing.
+        Defaults to 1000.
+    index : DirectoryIndex | None
+        The index of the directory tree.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the directories are listed, or None for the local disk.
+        Defaults to None.
+    executor : AsyncExecutor
+        The bounded executor running the async variant of the tool.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
 
     Raises
     ------
     ValueError
         If the provided path is not a valid directory.
+        If 'max_entries' is not a positive integer.
     """
 
     def __init__(self,
                  root_dir: str = ".",
+                 max_entries: int = 1000,
+                 index: DirectoryIndex | None = None,
+                 backend: FileSystem | None = None,
+                 executor: AsyncExecutor | None = None,
+                 metrics: ToolMetrics | None = None,
                  optional: bool = False,
                  max_custom_error: int = 5,
                  max_call_error: int = 5,
                  tool_type: ToolType = ToolType.YACANA):
 
-        # Validate that the parameter 'rootdir' is a valid directory
-        root_dir = os.path.normpath(root_dir)
-        root_dir = os.path.abspath(root_dir)
+        # Validate that the parameter 'rootdir' is a valid directory, on the local disk or in the backend
+        path_resolver = PathResolver(root_dir) if backend is None else None
+        root_dir = path_resolver.root_dir if backend is None else backend.root(root_dir)
 
-        if not Path(root_dir).is_dir():
-            raise ValueError("Parameter 'root_dir' expected a valid directory")
+        # Validate that the parameter 'max_entries' is a positive integer
+        if max_entries < 1:
+            raise ValueError("Parameter 'max_entries' expected a positive integer")
 
         # Set all attributes
         self.root_dir = root_dir
+        self.path_resolver = path_resolver
+        self.max_entries = max_entries
+        self.index = index
+        self.backend = backend
+        self.executor = executor if executor is not None else shared_executor()
+        self.metrics = metrics
 
         # Call the parent class constructor to initialize the tool
         super().__init__(
             tool_name="FileList",
             function_description="List all files and directories in a directory in the local filesystem and return the list.",
-            function_ref=self.get_file_list,
+            function_ref=self.get_file_list if metrics is None else metrics.instrument("FileList", self.get_file_list),
             optional=optional,
             max_custom_error=max_custom_error,
             max_call_error=max_call_error,
             tool_type=tool_type
         )
 
-    def get_file_list(self, dir_name: str = ".") -> str:
+    def get_file_list(self,
+                      dir_name: str = ".",
+                      limit: int | None = None,
+                      cursor: str | None = None,
+                      details: bool = False,
+                      pattern: str | None = None,
+                      extension: str | None = None,
+                      entry_type: str | None = None,
+                      sort_by: str = "name") -> str:
         """
         List all files and subdirectories of a directory.
 
+        Entries are sorted by name, or by size or modification time the largest
+        and the newest first, and returned by pages of at most 'limit' entries.
+        Entries can be filtered by a glob pattern on their name, by extension and
+        by type before being sorted, and listed with their size, modification time
+        and permissions. When entries are left after a page, a continuation cursor
+        is appended to the list. Passing this cursor back lists the next page.
+        Symbolic links are not followed, a link to a directory is listed as a file.
+
         Note: this function is expected to be called the LLM.
 
         Parameters
@@ -89,7 +172,29 @@ class FileListTool(Tool):
         dir_name: str
             The name of the directory where to list all files and subdirectories.
             Note: the path of this directory MUST be relative.
-        
+        limit: int | None
+            The maximum number of entries to list, capped to 'max_entries'.
+            Defaults to None, meaning 'max_entries'.
+        cursor: str | None
+            The continuation cursor returned by a previous listing.
+            Defaults to None.
+        details: bool
+            Whether to list the size, modification time and permissions of each entry.
+            Defaults to False.
+        pattern: str | None
+            A glob pattern the names of the entries must match, e.g. '*.py' or 'test_*'.
+            Defaults to None, meaning all names.
+        extension: str | None
+            The extensions of the files to list, separated by commas, e.g. '.py,.md'.
+            Defaults to None, meaning all extensions.
+        entry_type: str | None
+            The type of the entries to list: "file" or "directory".
+            Defaults to None, meaning both.
+        sort_by: str
+            The sort key: "name", "size" (the largest files first, then the directories
+            by name) or "mtime" (the newest first).
+            Defaults to "name".
+
         Returns
         -------
         str
@@ -99,45 +204,362 @@ class FileListTool(Tool):
         ------
         ToolError
             If the directory name is not provided or is invalid.
-            If the directory does not exist.
+            If the directory does not exist or cannot be listed.
+            If the limit, the cursor, the filters or the sort key are invalid.
+        """
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        if self.backend is not None:
+            long_dir_name = self.backend.resolve(self.root_dir, dir_name, "Directory")
+        else:
+            long_dir_name = self.path_resolver.resolve(dir_name, "Directory", stat_path=False).long_name
+
+        # Validate the filters and the sort key
+        details = validate_bool(details)
+        accept = _entry_filter(pattern, extension, entry_type)
+        if sort_by not in SORT_KEYS:
+            raise ToolError(f"Sort key is not valid, expected one of {', '.join(SORT_KEYS)}.")
+
+        # Validate the page arguments
+        limit = _validate_limit(limit, self.max_entries)
+        cursor = _parse_cursor(cursor, sort_by) if cursor else None
+
+        # Select the first entries by sort key after the cursor, keeping only one page in memory
+        selected, count = self._list_page(dir_name, long_dir_name, cursor, limit, sort_by, accept)
+        try:
+            # The type of each entry comes from the directory listing, without an extra stat
+            lines = [_format_entry(entry, details) for _, entry in selected]
+        except OSError as error:
+            raise ToolError(str(error)) from error
+
+        if not lines:
+            return "No file nor directory found."
+
+        if count > len(selected):
+            lines.append(f"[Listed {len(selected)} of {count} remaining entries. To continue listing, call again with cursor=\"{_format_cursor(selected[-1][0], sort_by)}\".]")
+
+        return "\n".join(lines)
+
+    def _list_page(self, dir_name: str, long_dir_name: str, after: str | tuple[int, str] | None, limit: int, sort_by: str,
+                   accept: Callable[[os.DirEntry | IndexEntry], bool]) -> tuple[list[tuple[str | tuple[int, str], os.DirEntry | IndexEntry]], int]:
         """
+        Select a page of the entries of a directory, from the backend, the index or the disk, see '_select_entries'.
+
+        Returns
+        -------
+        tuple[list[tuple[str | tuple[int, str], os.DirEntry | IndexEntry]], int]
+            The selected entries with their sort key, sorted, and the number of
+            accepted entries after 'after'.
 
-        # Validate that the directory name is provided
-        if not dir_name:
-            raise ToolError("Directory name was not provided or None.")
+        Raises
+        ------
+        ToolError
+            If the directory does not exist or cannot be listed.
+        """
 
-        # Validate that the path of the directory is relative
-        if Path(dir_name).is_absolute():
-            raise ToolError("Directory name is not a relative path.")
+        # List the directory from the backend, or look it up in the index, if any
+        indexed = self._list_indexed(dir_name, long_dir_name)
+        try:
+            if indexed is not None:
+                return _select_entries(iter(indexed), after, limit, sort_by, accept)
+            with os.scandir(long_dir_name) as iterator:
+                return _select_entries(iterator, after, limit, sort_by, accept)
+        except OSError as error:
+            raise ToolError(str(error)) from error
 
-        # Construct the full directory path
-        long_dir_name = os.path.join(self.root_dir, dir_name)
+    def _list_indexed(self, dir_name: str, long_dir_name: str) -> list[IndexEntry] | None:
+        """
+        List a directory from the backend, or look it up in the index, validating that it exists.
 
-        # Normalize the full directory path
-        long_dir_name = os.path.normpath(long_dir_name)
+        Parameters
+        ----------
+        dir_name : str
+            The name of the directory, as given by the LLM.
+        long_dir_name : str
+            The full path of the directory.
 
-        # Validate that the full directory path is inside the root directory path
-        if long_dir_name.find(self.root_dir, 0) == -1:
-            raise ToolError("Directory name is not in root directory.")
+        Returns
+        -------
+        list[IndexEntry] | None
+            The entries of the directory, or None if it must be scanned on disk.
 
-        # Validate that the directory exists
-        if not Path(long_dir_name).is_dir():
+        Raises
+        ------
+        ToolError
+            If the directory does not exist or cannot be listed.
+        """
+
+        indexed = None
+        if self.backend is not None:
+            try:
+                indexed = self.backend.list_dir(long_dir_name)
+            except (FileNotFoundError, NotADirectoryError) as error:
+                raise ToolError("Directory does not exist.") from error
+            except OSError as error:
+                raise ToolError(str(error)) from error
+        elif self.index is not None:
+            rel_dir_name = self.index.relative(long_dir_name)
+            if rel_dir_name is not None:
+                indexed = self.index.list_dir(rel_dir_name)
+
+        # Validate that the directory exists, the resolved path being cached
+        if indexed is None and not self.path_resolver.resolve(dir_name, "Directory").is_dir():
             raise ToolError("Directory does not exist.")
+        return indexed
+
+    async def aget_file_list(self,
+                             dir_name: str = ".",
+                             limit: int | None = None,
+                             cursor: str | None = None,
+                             details: bool = False,
+                             pattern: str | None = None,
+                             extension: str | None = None,
+                             entry_type: str | None = None,
+                             sort_by: str = "name") -> str:
+        """
+        List the files and subdirectories of a directory without blocking the event loop.
+
+        The listing runs on the executor of the tool, see 'get_file_list' for the
+        arguments, the returned listing and the raised errors.
+
+        Returns
+        -------
+        str
+            The list of files and subdirectories in the directory.
+        """
+
+        return await self.executor.run(self.function_ref, dir_name, limit, cursor, details, pattern, extension, entry_type, sort_by)
+
+
+def _entry_filter(pattern: str | None, extension: str | None, entry_type: str | None) -> Callable[[os.DirEntry | IndexEntry], bool]:
+    """
+    Build the filter of the entries of a directory listing.
+
+    The filter only uses the name and the type from the directory listing, before any stat.
+
+    Parameters
+    ----------
+    pattern : str | None
+        A glob pattern the names of the entries must match, or None.
+    extension : str | None
+        The extensions of the files to accept, separated by commas, or None.
+    entry_type : str | None
+        The type of the entries to accept, "file" or "directory", or None.
+
+    Returns
+    -------
+    Callable[[os.DirEntry | IndexEntry], bool]
+        The filter, returning whether an entry is accepted.
+
+    Raises
+    ------
+    ToolError
+        If the entry type is not valid.
+    """
+
+    if entry_type is not None and entry_type not in ENTRY_TYPES:
+        raise ToolError(f"Entry type is not valid, expected one of {', '.join(ENTRY_TYPES)}.")
+    extensions = None
+    if extension:
+        extensions = tuple("." + item.strip().lstrip(".").lower() for item in str(extension).split(",") if item.strip().lstrip("."))
+
+    def accept(entry) -> bool:
+        if pattern and not fnmatch.fnmatch(entry.name, pattern):
+            return False
+        if entry_type is not None and entry.is_dir(follow_symlinks=False) != (entry_type == "directory"):
+            return False
+        return extensions is None or (entry.name.lower().endswith(extensions) and not entry.is_dir(follow_symlinks=False))
+
+    return accept
+
 
-        # List all files and subdirectories in the directory
-        elements = list(Path(long_dir_name).iterdir())
-        content = ""
-        for index, element in enumerate(elements):
-            if index > 0:
-                content = content + "\n"
-            content = content + "* "
-            if Path(element).is_dir():
-                content = content + "[directory] "
+def _select_entries(iterator, after: str | tuple[int, str] | None, limit: int, sort_by: str = "name",
+                    accept: Callable[[os.DirEntry | IndexEntry], bool] | None = None) -> tuple[list[tuple[str | tuple[int, str], os.DirEntry | IndexEntry]], int]:
+    """
+    Select the first entries by sort key of a directory listing after a given key.
+
+    Only 'limit' entries are kept in memory, whatever the size of the directory.
+    An entry is only stat'ed when it is accepted and sorted by size or modification time.
+    The size of a directory is the one of its own entry, not of its content, so
+    the directories are sorted by name after all files when sorting by size.
+
+    Parameters
+    ----------
+    iterator : Iterator[os.DirEntry | IndexEntry]
+        The directory listing, as returned by 'os.scandir' or by a directory index.
+    after : str | tuple[int, str] | None
+        The sort key after which entries are selected, or None to select from the first entry.
+    limit : int
+        The maximum number of entries to select.
+    sort_by : str
+        The sort key: "name", "size" or "mtime".
+        Defaults to "name".
+    accept : Callable[[os.DirEntry | IndexEntry], bool] | None
+        The filter of the entries, or None to accept all entries.
+        Defaults to None.
+
+    Returns
+    -------
+    tuple[list[tuple[str | tuple[int, str], os.DirEntry | IndexEntry]], int]
+        The selected entries with their sort key, sorted, and the number of
+        accepted entries after 'after'.
+    """
+
+    count = 0
+    scanned = 0
+
+    def candidates():
+        nonlocal count, scanned
+        for entry in iterator:
+            scanned += 1
+            if accept is not None and not accept(entry):
+                continue
+            if sort_by == "name":
+                key = entry.name
             else:
-                content = content + "[file] "
-            content = content + element.name
+                try:
+                    if isinstance(entry, os.DirEntry):
+                        tool_metrics.count("stat_calls")
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError:
+                    # The entry was removed since the directory was listed
+                    continue
+                # The largest and the newest entries first, the directories after the files, whose keys are not positive
+                if sort_by == "size":
+                    key = (1 if stat.S_ISDIR(stat_result.st_mode) else -stat_result.st_size, entry.name)
+                else:
+                    key = (-stat_result.st_mtime_ns, entry.name)
+            if after is None or key > after:
+                count += 1
+                yield key, entry
+
+    selected = heapq.nsmallest(limit, candidates(), key=lambda item: item[0])
+    tool_metrics.count("entries_scanned", scanned)
+    return selected, count
+
+
+def _format_entry(entry: os.DirEntry | IndexEntry, details: bool) -> str:
+    """
+    Format an entry of a listing, with its size, modification time and permissions if requested.
+
+    Parameters
+    ----------
+    entry : os.DirEntry | IndexEntry
+        The entry.
+    details : bool
+        Whether to add the size, modification time and permissions of the entry.
+
+    Returns
+    -------
+    str
+        The line of the entry.
+
+    Raises
+    ------
+    OSError
+        If the status of the entry cannot be read.
+    """
+
+    # Symbolic links are not followed, as for the size and the modification time
+    kind = "directory" if entry.is_dir(follow_symlinks=False) else "file"
+    if not details:
+        return f"* [{kind}] {entry.name}"
+
+    # The status of a listed entry is cached by 'os.DirEntry', and held by an index entry
+    stat_result = entry.stat(follow_symlinks=False)
+    modified = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat_result.st_mtime_ns / 1e9))
+    size = "" if kind == "directory" else f"{stat_result.st_size} bytes, "
+    return f"* [{kind}] {entry.name} ({size}modified {modified}, {stat.filemode(stat_result.st_mode)})"
+
+
+def _validate_limit(limit: int | None, max_entries: int) -> int:
+    """
+    Validate the page size of a listing provided by the LLM.
+
+    Parameters
+    ----------
+    limit : int | None
+        The page size, or None for the maximum page size.
+    max_entries : int
+        The maximum page size.
+
+    Returns
+    -------
+    int
+        The page size, capped to 'max_entries'.
+
+    Raises
+    ------
+    ToolError
+        If the limit is not a positive integer.
+    """
+
+    return min(validate_int(limit, "limit", 1) or max_entries, max_entries)
+
+
+def _format_cursor(key: str | tuple[int, str], sort_by: str = "name") -> str:
+    """
+    Build the continuation cursor of a listing from the sort key of the last listed entry.
+
+    Parameters
+    ----------
+    key : str | tuple[int, str]
+        The sort key of the last listed entry: its name, or its negated size or
+        modification time and its name, the size of a directory being 1.
+    sort_by : str
+        The sort key of the listing: "name", "size" or "mtime".
+        Defaults to "name".
 
-        if content == "":
-            content = "No file nor directory found."
+    Returns
+    -------
+    str
+        The continuation cursor.
+    """
+
+    if sort_by == "name":
+        raw = os.fsencode(key)
+    else:
+        # A name never holds a NUL character, which separates the fields
+        raw = b"\0".join((sort_by.encode('ascii'), str(key[0]).encode('ascii'), os.fsencode(key[1])))
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _parse_cursor(cursor: str, sort_by: str = "name") -> str | tuple[int, str]:
+    """
+    Decode a continuation cursor built by '_format_cursor'.
+
+    Parameters
+    ----------
+    cursor : str
+        The continuation cursor.
+    sort_by : str
+        The sort key of the listing: "name", "size" or "mtime".
+        Defaults to "name".
+
+    Returns
+    -------
+    str | tuple[int, str]
+        The sort key of the last listed entry.
+
+    Raises
+    ------
+    ToolError
+        If the cursor is invalid or was built for another sort key.
+    """
 
-        return content
+    try:
+        # The decoding ignores the characters out of the alphabet, so a cursor must encode back to itself
+        raw = base64.urlsafe_b64decode(str(cursor).encode('ascii'))
+        if not raw or base64.urlsafe_b64encode(raw).decode('ascii') != str(cursor):
+            raise ValueError("Cursor is not a listing cursor")
+        fields = raw.split(b"\0")
+        cursor_sort_by = "name" if len(fields) == 1 else fields[0].decode('ascii')
+        if cursor_sort_by != sort_by:
+            raise ToolError("Cursor was returned by a listing with another sort key.")
+        if len(fields) == 1:
+            return os.fsdecode(fields[0])
+        if len(fields) != 3:
+            raise ValueError("Unexpected number of fields")
+        return (int(fields[1]), os.fsdecode(fields[2]))
+    except (ValueError, binascii.Error) as error:
+        raise ToolError("Cursor is not valid.") from error
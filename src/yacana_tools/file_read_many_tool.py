@@ -0,0 +1,232 @@
+"""
+File Read Many Tool for Yacana
+
+This module provides a tool for reading content from several files in the local filesystem at once.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0913,R0917
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .file_content_cache import FileContentCache
+from .file_read_tool import FileReadTool
+from .filesystem import FileSystem
+from .read_session import ReadSession
+from .tool_metrics import ToolMetrics
+from .write_buffer import WriteBuffer
+
+class FileReadManyTool(Tool):
+    """
+    A tool for reading content from several files in the local filesystem at once.
+
+    This class provides functionality to read the contents of a list of files and
+    return them as a single string, in one call instead of one call per file.
+    Each file is read and validated like with FileReadTool, and the files are read
+    concurrently on a bounded pool of threads. An invalid or unreadable file does
+    not fail the whole call: its error is reported in place of its content.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the files are located.
+        Defaults to ".".
+    max_files : int
+        The maximum number of files read in a single call.
+        Defaults to 20.
+    max_workers : int
+        The maximum number of files read concurrently.
+        Defaults to 8.
+    mmap_threshold : int
+        The size in bytes from which a file is memory-mapped instead of read.
+        Defaults to 16 MiB.
+    max_bytes : int | None
+        The maximum number of bytes returned for each file. None means no budget.
+        Defaults to None.
+    cache : FileContentCache | None
+        The cache of file contents, possibly shared with other tools.
+        None means no cache.
+        Defaults to None.
+    max_tokens : int | None
+        The maximum number of tokens returned for each file. None means no budget.
+        Defaults to None.
+    token_estimator : Callable[[str], int] | None
+        The function estimating the number of tokens of a text.
+        None means 'estimate_tokens', one token per 4 bytes.
+        Defaults to None.
+    binary_summary : bool
+        Whether a binary file is returned as a short summary instead of being rejected.
+        Defaults to False.
+    write_buffer : WriteBuffer | None
+        The write-behind buffer whose pending contents are read instead of the files.
+        Defaults to None.
+    session : ReadSession | None
+        The memory of the contents returned during a conversation, possibly shared
+        with a FileReadTool. A file read again is returned as what changed since.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the files are read, possibly shared with other tools.
+        None means the local disk.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    file_read_tool : FileReadTool
+        The tool used to read each file.
+    max_files : int
+        The maximum number of files read in a single call.
+        Defaults to 20.
+    max_workers : int
+        The maximum number of files read concurrently.
+        Defaults to 8.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_files' or 'max_workers' is not a positive integer.
+        If 'mmap_threshold', 'max_bytes' or 'max_tokens' is not a positive integer.
+    """
+
+    def __init__(self, # pylint: disable=R0914
+                 root_dir: str = ".",
+                 max_files: int = 20,
+                 max_workers: int = 8,
+                 mmap_threshold: int = 16 * 1024 * 1024,
+                 max_bytes: int | None = None,
+                 cache: FileContentCache | None = None,
+                 max_tokens: int | None = None,
+                 token_estimator: Callable[[str], int] | None = None,
+                 binary_summary: bool = False,
+                 write_buffer: WriteBuffer | None = None,
+                 session: ReadSession | None = None,
+                 backend: FileSystem | None = None,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the limits are positive integers
+        if max_files < 1:
+            raise ValueError("Parameter 'max_files' expected a positive integer")
+        if max_workers < 1:
+            raise ValueError("Parameter 'max_workers' expected a positive integer")
+
+        # Set all attributes, the root directory being validated by the read tool
+        self.file_read_tool = FileReadTool(root_dir, mmap_threshold=mmap_threshold, max_bytes=max_bytes, cache=cache,
+                                           max_tokens=max_tokens, token_estimator=token_estimator, binary_summary=binary_summary,
+                                           write_buffer=write_buffer, session=session,
+                                           backend=backend)
+        self.max_files = max_files
+        self.max_workers = max_workers
+        self.metrics = metrics
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FileReadMany",
+            function_description="Read or load content from several files in the local filesystem at once and return their contents",
+            function_ref=self.read_many if metrics is None else metrics.instrument("FileReadMany", self.read_many),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    @property
+    def root_dir(self) -> str:
+        """
+        The root directory path where the files are located.
+        """
+
+        return self.file_read_tool.root_dir
+
+    def read_many(self, file_names: list[str]) -> str:
+        """
+        Read the content of several files.
+
+        The content of each file is preceded by a header line with its name.
+        A file which cannot be read is reported with its error instead of its content.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        file_names : list[str]
+            The names of the files to read.
+            Note: the paths of these files MUST be relative.
+
+        Returns
+        -------
+        str
+            The contents of all files, or their errors.
+
+        Raises
+        ------
+        ToolError
+            If the file names are not provided or are too many.
+        """
+
+        # Validate that the file names are provided as a list
+        if not file_names:
+            raise ToolError("File names were not provided or empty.")
+        if isinstance(file_names, str) or not isinstance(file_names, (list, tuple)):
+            raise ToolError("File names must be a list of file names.")
+
+        # Remove duplicates, keeping the order of the request
+        file_names = list(dict.fromkeys(str(file_name) for file_name in file_names))
+
+        # Validate that the number of files is within the limit
+        if len(file_names) > self.max_files:
+            raise ToolError(f"Too many files requested, at most {self.max_files} files can be read at once.")
+
+        # Read all files concurrently
+        if len(file_names) == 1 or self.max_workers == 1:
+            results = [self._read_one(file_name) for file_name in file_names]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(file_names))) as executor:
+                results = list(executor.map(tool_metrics.propagate(self._read_one), file_names))
+
+        return "\n".join(f"===== {file_name} =====\n{result}" for file_name, result in zip(file_names, results))
+
+    def _read_one(self, file_name: str) -> str:
+        """
+        Read the content of a single file, reporting its error instead of raising it.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file to read.
+
+        Returns
+        -------
+        str
+            The content of the file, or its error.
+        """
+
+        try:
+            return self.file_read_tool.read_content(file_name)
+        except ToolError as error:
+            return f"[Error: {error}]"
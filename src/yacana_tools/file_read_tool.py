@@ -5,11 +5,24 @@ This module provides a tool for reading content from files in the local filesyst
 """
 
 # pylint: disable=C0301
-# pylint: disable=R0913,R0917
+# pylint: disable=R0902,R0913,R0917
 
+import difflib
+import io
+import mmap
 import os
-from pathlib import Path
+import stat
+from typing import BinaryIO, Callable
 from yacana import Tool, ToolError, ToolType
+from . import compressed_file, text_encoding, text_window, tool_metrics
+from .async_executor import AsyncExecutor, shared_executor
+from .file_content_cache import FileContentCache
+from .filesystem import FileSystem
+from .path_resolver import PathResolver, ResolvedPath
+from .read_session import ReadSession
+from .tool_metrics import ToolMetrics
+from .validation import validate_bool, validate_int
+from .write_buffer import WriteBuffer
 
 class FileReadTool(Tool):
     """
@@ -23,8 +36,57 @@ class FileReadTool(Tool):
     Parameters
     ----------
     root_dir : str
-        The root directory path from where the file is located.
+        The root directory path from where the file is located, in the backend if any.
         Defaults to ".".
+    mmap_threshold : int
+        The size in bytes from which a file is memory-mapped instead of read.
+        Defaults to 16 MiB.
+    max_bytes : int | None
+        The maximum number of bytes returned by a read. A file over this budget
+        is returned as a head and a tail window. None means no budget.
+        Defaults to None.
+    cache : FileContentCache | None
+        The cache of file contents, possibly shared with other tools.
+        None means no cache.
+        Defaults to None.
+    max_tokens : int | None
+        The maximum number of tokens returned by a read. A file over this budget
+        is returned page by page, each page ending with a continuation cursor.
+        None means no budget.
+        Defaults to None.
+    token_estimator : Callable[[str], int] | None
+        The function estimating the number of tokens of a text, e.g. the tokenizer
+        of the model. None means 'estimate_tokens', one token per 4 bytes.
+        Defaults to None.
+    binary_summary : bool
+        Whether a binary file is returned as a short summary, its size, type and
+        a hex dump of its first bytes, instead of being rejected.
+        Defaults to False.
+    write_buffer : WriteBuffer | None
+        The write-behind buffer of a FileWriteTool, whose pending contents are
+        read instead of the files on disk. None means only the files on disk are read.
+        Defaults to None.
+    session : ReadSession | None
+        The memory of the contents returned during a conversation, possibly shared
+        with other tools. A whole file read again in the session is returned as a
+        notice when unchanged, or as a diff against the content last returned.
+        None means the whole content is always returned.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the files are read, e.g. an in-memory filesystem or
+        a zip or tar snapshot, possibly shared with other tools. The cache, the
+        memory-mapping and the reading of compressed files only apply to the local
+        disk. None means the local disk.
+        Defaults to None.
+    executor : AsyncExecutor | None
+        The bounded executor running the async variant of the tool, possibly
+        shared with other tools. None means the executor shared by the tools,
+        see 'shared_executor'.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
     optional : bool
         Whether the tool is optional.
         Defaults to False.
@@ -43,45 +105,140 @@ class FileReadTool(Tool):
     root_dir : str
         The root directory path where the file is located.
         Defaults to ".".
+    path_resolver : PathResolver | None
+        The validator of the file paths, or None with a backend.
+    mmap_threshold : int
+        The size in bytes from which a file is memory-mapped instead of read.
+        Defaults to 16 MiB.
+    max_bytes : int | None
+        The maximum number of bytes returned by a read.
+        Defaults to None.
+    cache : FileContentCache | None
+        The cache of file contents.
+        Defaults to None.
+    max_tokens : int | None
+        The maximum number of tokens returned by a read.
+        Defaults to None.
+    token_estimator : Callable[[str], int]
+        The function estimating the number of tokens of a text.
+    binary_summary : bool
+        Whether a binary file is returned as a short summary instead of being rejected.
+        Defaults to False.
+    write_buffer : WriteBuffer | None
+        The write-behind buffer whose pending contents are read.
+        Defaults to None.
+    session : ReadSession | None
+        The memory of the contents returned during a conversation.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the files are read, or None for the local disk.
+        Defaults to None.
+    executor : AsyncExecutor
+        The bounded executor running the async variant of the tool.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
 
     Raises
     ------
     ValueError
         If the provided path is not a valid directory.
+        If 'mmap_threshold', 'max_bytes' or 'max_tokens' is not a positive integer.
     """
 
-    def __init__(self,
+    def __init__(self, # pylint: disable=R0914
                  root_dir: str = ".",
+                 mmap_threshold: int = 16 * 1024 * 1024,
+                 max_bytes: int | None = None,
+                 cache: FileContentCache | None = None,
+                 max_tokens: int | None = None,
+                 token_estimator: Callable[[str], int] | None = None,
+                 binary_summary: bool = False,
+                 write_buffer: WriteBuffer | None = None,
+                 session: ReadSession | None = None,
+                 backend: FileSystem | None = None,
+                 executor: AsyncExecutor | None = None,
+                 metrics: ToolMetrics | None = None,
                  optional: bool = False,
                  max_custom_error: int = 5,
                  max_call_error: int = 5,
                  tool_type: ToolType = ToolType.YACANA):
 
-        # Validate that the parameter 'rootdir' is a valid directory
-        root_dir = os.path.normpath(root_dir)
-        root_dir = os.path.abspath(root_dir)
+        # Validate that the parameter 'rootdir' is a valid directory, on the local disk or in the backend
+        path_resolver = PathResolver(root_dir) if backend is None else None
+        root_dir = path_resolver.root_dir if backend is None else backend.root(root_dir)
 
-        if not Path(root_dir).is_dir():
-            raise ValueError("Parameter 'root_dir' expected a valid directory")
+        # Validate the read budgets
+        if mmap_threshold < 1:
+            raise ValueError("Parameter 'mmap_threshold' expected a positive integer")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("Parameter 'max_bytes' expected a positive integer")
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError("Parameter 'max_tokens' expected a positive integer")
 
         # Set all attributes
         self.root_dir = root_dir
+        self.path_resolver = path_resolver
+        self.mmap_threshold = mmap_threshold
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.max_tokens = max_tokens
+        self.token_estimator = token_estimator if token_estimator is not None else estimate_tokens
+        self.binary_summary = binary_summary
+        self.write_buffer = write_buffer
+        self.session = session
+        self.backend = backend
+        self.executor = executor if executor is not None else shared_executor()
+        self.metrics = metrics
 
         # Call the parent class constructor to initialize the tool
         super().__init__(
             tool_name="FileRead",
             function_description="Read or load content from a file in the local filesystem and return the content",
-            function_ref=self.read_content,
+            function_ref=self.read_content if metrics is None else metrics.instrument("FileRead", self.read_content),
             optional=optional,
             max_custom_error=max_custom_error,
             max_call_error=max_call_error,
             tool_type=tool_type
         )
 
-    def read_content(self, file_name: str) -> str:
+    def read_content(self,
+                     file_name: str,
+                     offset: int | None = None,
+                     limit: int | None = None,
+                     byte_start: int | None = None,
+                     byte_len: int | None = None,
+                     cursor: str | None = None,
+                     full: bool = False) -> str:
         """
         Read the content of a file.
 
+        By default the whole file is returned. A slice of the file can be read
+        instead, either as a range of lines ('offset' and 'limit') or as a range
+        of bytes ('byte_start' and 'byte_len'). When a slice does not reach the end
+        of the file, a continuation cursor is appended to the content. Passing
+        this cursor back reads the next slice without rescanning the file.
+        Files larger than 'mmap_threshold' are memory-mapped and only the returned
+        window is decoded. Files larger than 'max_bytes' are returned as a head and
+        a tail window, and slices are capped to 'max_bytes'.
+        When a token budget is set, a file over 'max_tokens' is returned page by
+        page, each page ending with a continuation cursor, and slices are capped
+        to 'max_tokens'.
+        When a cache is set, whole-file reads of unchanged files are served from memory.
+        When a write buffer is set, the pending content of a file is read instead of the file.
+        When a backend is set, the file is read from it instead of the local disk.
+        Compressed files ('.gz', '.xz', '.bz2') are decompressed on the fly, and the
+        members of archives ('.zip', '.tar', '.tar.gz', ...) are read with a path like
+        'archive.zip/inner/file.txt'. Only the content up to the end of the returned
+        window is decompressed, and reading an archive itself lists its members.
+        The encoding is detected from the head of the file: a byte order mark, else
+        UTF-8 when valid, else Latin-1. A binary file is rejected before being read,
+        or summarized when 'binary_summary' is set. The '\\r\\n' and '\\r' line breaks
+        are returned as '\\n', whatever the read path or the window.
+        When a session is set, a whole file read again is returned as a notice if it
+        is unchanged since the last read, or as a unified diff against the content
+        last returned, unless 'full' is set.
+
         Note: this function is expected to be called the LLM.
 
         Parameters
@@ -89,47 +246,674 @@ class FileReadTool(Tool):
         file_name : str
             The name of the file to read.
             Note: the path of this file MUST be relative.
-        
+        offset : int | None
+            The number of lines to skip before reading.
+            Defaults to None.
+        limit : int | None
+            The maximum number of lines to read.
+            Defaults to None.
+        byte_start : int | None
+            The position of the first byte to read.
+            Defaults to None.
+        byte_len : int | None
+            The maximum number of bytes to read.
+            Defaults to None.
+        cursor : str | None
+            The continuation cursor returned by a previous partial read.
+            Defaults to None.
+        full : bool
+            Whether the whole content is returned even if the file was already read in the session.
+            Defaults to False.
+
         Returns
         -------
         str
-            The content of the file.
+            The content of the file, or of the requested slice, or what changed since the last read.
 
         Raises
         ------
         ToolError
             If the file name is not provided or is invalid.
             If the file does not exist or cannot be read.
+            If the file is binary.
+            If the slice arguments or the cursor are invalid.
+            If the cursor of a read by bytes is used with a range of lines, or the reverse.
+        """
+
+        # Only the whole reads are answered with what changed since the last read of the session
+        if self.session is not None and not cursor and all(value is None for value in (offset, limit, byte_start, byte_len)):
+            return self._read_delta(file_name, validate_bool(full))
+
+        return self._read_content(file_name, offset, limit, byte_start, byte_len, cursor)
+
+    def _read_content(self,
+                      file_name: str,
+                      offset: int | None = None,
+                      limit: int | None = None,
+                      byte_start: int | None = None,
+                      byte_len: int | None = None,
+                      cursor: str | None = None) -> str:
+        """
+        Read the content of a file, see 'read_content' for the arguments, the returned content and the raised errors.
+
+        Returns
+        -------
+        str
+            The content of the file, or of the requested slice.
+        """
+
+        # Validate that the path of the file is provided, relative and inside the root directory path
+        resolved = None
+        if self.backend is not None:
+            long_file_name = self.backend.resolve(self.root_dir, file_name, "File")
+        else:
+            resolved = self.path_resolver.resolve(file_name, "File")
+            long_file_name = resolved.long_name
+
+        # Validate the slice arguments, and resume from the cursor
+        window = self._parse_window(offset, limit, byte_start, byte_len, cursor)
+
+        # Read the pending content of a file written behind, which is newer than the file on disk
+        if self.write_buffer is not None:
+            content = self._read_pending(long_file_name, window)
+            if content is not None:
+                return content
+
+        # Read the file from the backend, which holds it in memory or in an archive
+        if self.backend is not None:
+            return self._read_backend(file_name, long_file_name, window)
+
+        return self._read_local(file_name, resolved, window)
+
+    def _parse_window(self,
+                      offset: int | None,
+                      limit: int | None,
+                      byte_start: int | None,
+                      byte_len: int | None,
+                      cursor: str | None) -> text_window.Window:
+        """
+        Validate the slice arguments of a read, and resume from its cursor.
+
+        Parameters
+        ----------
+        offset, limit, byte_start, byte_len : int | None
+            The slice arguments, see 'read_content'.
+        cursor : str | None
+            The continuation cursor returned by a previous partial read.
+
+        Returns
+        -------
+        text_window.Window
+            The requested window, starting from the beginning of the file without cursor.
+
+        Raises
+        ------
+        ToolError
+            If the slice arguments or the cursor are invalid.
+            If the cursor of a read by bytes is used with a range of lines, or the reverse.
+        """
+
+        offset = validate_int(offset, "offset")
+        limit = validate_int(limit, "limit")
+        byte_start = validate_int(byte_start, "byte_start")
+        byte_len = validate_int(byte_len, "byte_len")
+        if limit == 0 or byte_len == 0:
+            raise ToolError("Arguments 'limit' and 'byte_len' must be greater than 0.")
+        by_lines = offset is not None or limit is not None
+        by_bytes = byte_start is not None or byte_len is not None
+        if by_lines and by_bytes:
+            raise ToolError("Lines range ('offset', 'limit') and bytes range ('byte_start', 'byte_len') cannot be used together.")
+        if not cursor:
+            return text_window.Window(by_bytes, by_lines, False, 0, 0, offset, limit, byte_start, byte_len)
+
+        # Resume from the cursor
+        if offset is not None or byte_start is not None:
+            raise ToolError("Arguments 'offset' and 'byte_start' cannot be used with a cursor.")
+        position, line, unit, page_size = text_window.parse_cursor(cursor)
+        # A byte window does not count its lines, so a read by bytes is only continued by bytes, and a read by lines by lines
+        if (by_lines and unit == "b") or (by_bytes and unit == "l"):
+            raise ToolError(f"Cursor continues a read by {'bytes' if unit == 'b' else 'lines'}, so it cannot be used with a range of {'lines' if by_lines else 'bytes'}.")
+        if by_lines or by_bytes:
+            return text_window.Window(by_bytes, by_lines, False, position, line, None, limit, None, byte_len)
+        # Keep the page size of the read which returned the cursor
+        return text_window.Window(unit == "b", unit == "l", unit == "t", position, line, None,
+                                  page_size if unit == "l" else None, None, page_size if unit == "b" else None)
+
+    def _read_pending(self, long_file_name: str, window: text_window.Window) -> str | None:
+        """
+        Read the pending content of a file written behind, or a window of it.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str | None
+            The pending content, or its window, or None if no content is pending.
+
+        Raises
+        ------
+        ToolError
+            If a pending content over a threshold of the buffer cannot be written.
+        """
+
+        try:
+            pending = self.write_buffer.get(long_file_name)
+        except OSError as error:
+            raise ToolError(str(error)) from error
+        if pending is None:
+            return None
+        if window.whole and self.max_tokens is not None and self.token_estimator(pending) > self.max_tokens:
+            window = window._replace(by_tokens=True)
+        data = pending.encode('utf-8', errors='replace')
+        return self._read_window(io.BytesIO(data), len(data), 'utf-8', window)
+
+    def _read_local(self, file_name: str, resolved: ResolvedPath, window: text_window.Window) -> str:
+        """
+        Read a file of the local disk, or a window of it, from the cache when possible.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        resolved : ResolvedPath
+            The resolved path of the file.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str
+            The content of the file, or of the window.
+
+        Raises
+        ------
+        ToolError
+            If the file does not exist or cannot be read.
+            If the file is binary.
+        """
+
+        # Validate that the file exists, or is a member of an archive, keeping its status for the next steps
+        member = None
+        if not resolved.is_file():
+            resolved, member = self._split_archive(resolved)
+            if resolved is None:
+                raise ToolError("File does not exist.")
+        long_file_name = resolved.long_name
+
+        # Stream the decompressed content of a compressed file or of an archive member
+        kind = compressed_file.archive_kind(long_file_name)
+        if kind is not None:
+            return self._read_compressed(file_name, long_file_name, kind, member, window)
+
+        # Page a whole file which is obviously over the token budget, without reading it entirely
+        size = resolved.stat_result.st_size
+        if window.whole and self.max_tokens is not None:
+            if size > self.max_tokens * text_window.MAX_BYTES_PER_TOKEN or (self.max_bytes is not None and size > self.max_bytes):
+                window = window._replace(by_tokens=True)
+
+        # Serve the whole file from the cache when no slice is requested and the file fits in the budget
+        whole = window.whole and (self.max_bytes is None or size <= self.max_bytes)
+        key = FileContentCache.key(resolved.stat_result)
+        if whole and self.cache is not None:
+            content = self.cache.get(key)
+            if content is not None:
+                if self.max_tokens is None or self.token_estimator(content) <= self.max_tokens:
+                    return content
+                whole, window = False, window._replace(by_tokens=True)
+
+        try:
+            return self._read_file(file_name, long_file_name, size, key if whole else None, window)
+        except OSError as error:
+            raise ToolError(str(error)) from error
+
+    def _read_file(self, file_name: str, long_file_name: str, size: int, key: tuple[int, int, int, int] | None,
+                   window: text_window.Window) -> str:
+        """
+        Read a file of the local disk, or a window of it, memory-mapping large files.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        long_file_name : str
+            The full path of the file.
+        size : int
+            The size of the file in bytes.
+        key : tuple[int, int, int, int] | None
+            The cache key of the file when the whole file is read and cached, None otherwise.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str
+            The content of the file, or of the window.
+
+        Raises
+        ------
+        ToolError
+            If the file is binary, or cannot be read by slices in its encoding.
+        OSError
+            If the file cannot be read.
+        """
+
+        with open(long_file_name, mode='rb') as fd:
+            # Sniff the head of the file, so a binary file is rejected before it is read entirely
+            head, encoding = self._sniff(fd, size)
+            if encoding is None:
+                return text_encoding.binary_summary(file_name, size, head)
+            fd.seek(0)
+
+            # Read the whole file in text mode, unless it is over the token budget
+            if key is not None and size < self.mmap_threshold:
+                if len(head) == size:
+                    # The head is the whole file, decoded with the newline translation of the text mode
+                    content = text_encoding.translate_newlines(head.decode(encoding, errors='replace'))
+                else:
+                    text = io.TextIOWrapper(fd, encoding=encoding, errors='replace')
+                    content = text.read()
+                    tool_metrics.count("bytes_read", size)
+                    text.detach()
+                if self.cache is not None:
+                    self.cache.put(key, content)
+                if self.max_tokens is None or self.token_estimator(content) <= self.max_tokens:
+                    return content
+                key, window = None, window._replace(by_tokens=True)
+                fd.seek(0)
+
+            # Otherwise read the requested window of the file, memory-mapping large files
+            if key is None and encoding not in text_encoding.WINDOW_ENCODINGS:
+                raise ToolError(f"File is encoded in {encoding}, so it can only be read entirely, without slices.")
+            if size >= self.mmap_threshold:
+                with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                    content = self._read_window(source, size, encoding, window)
+            else:
+                content = self._read_window(fd, size, encoding, window)
+            if key is not None and self.cache is not None:
+                self.cache.put(key, content)
+            return content
+
+    async def aread_content(self,
+                            file_name: str,
+                            offset: int | None = None,
+                            limit: int | None = None,
+                            byte_start: int | None = None,
+                            byte_len: int | None = None,
+                            cursor: str | None = None,
+                            full: bool = False) -> str:
+        """
+        Read the content of a file without blocking the event loop.
+
+        The read runs on the executor of the tool, see 'read_content' for the
+        arguments, the returned content and the raised errors.
+
+        Returns
+        -------
+        str
+            The content of the file, or the requested slice of it.
+        """
+
+        return await self.executor.run(self.function_ref, file_name, offset, limit, byte_start, byte_len, cursor, full)
+
+    def _read_delta(self, file_name: str, full: bool) -> str:
+        """
+        Read a whole file, returning only what changed since it was last read in the session.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file to read.
+        full : bool
+            Whether the whole content is returned even if the file was already read in the session.
+
+        Returns
+        -------
+        str
+            A notice if the file is unchanged, a unified diff against the content
+            last returned, or the whole content if the file was not read before or
+            if the diff is not smaller.
+
+        Raises
+        ------
+        ToolError
+            If the file name is not provided or is invalid.
+            If the file does not exist or cannot be read.
+            If the file is binary.
+        """
+
+        # Validate that the path of the file is provided, relative and inside the root directory path
+        if self.backend is not None:
+            long_file_name = self.backend.resolve(self.root_dir, file_name, "File")
+        else:
+            long_file_name = self.path_resolver.resolve(file_name, "File").long_name
+
+        key = self._status_key(long_file_name)
+        previous = self.session.get(long_file_name)
+        if not full and previous is not None and key is not None and previous[0] == key:
+            self.session.unchanged += 1
+            tool_metrics.count("cache_hits")
+            return "File is unchanged since last read."
+
+        content = self._read_content(file_name)
+
+        # A file changed during the read is remembered without status, so it is compared on the next read
+        if key is not None and self._status_key(long_file_name) != key:
+            key = None
+
+        # A content cut to the budgets is not what the agent would hold of the file, so it is not remembered
+        if self._is_truncated(key, content):
+            self.session.forget(long_file_name)
+            return content
+
+        self.session.put(long_file_name, key, content)
+        if full or previous is None:
+            return content
+        if previous[1] == content:
+            self.session.unchanged += 1
+            return "File is unchanged since last read."
+
+        diff = "\n".join(difflib.unified_diff(previous[1].splitlines(), content.splitlines(), f"a/{file_name}", f"b/{file_name}", lineterm=""))
+        if len(diff) > len(content) * self.session.max_diff_ratio:
+            return content
+        self.session.diffs += 1
+        return f"File changed since last read, unified diff against the last read:\n{diff}"
+
+    def _status_key(self, long_file_name: str) -> tuple[int, int, int, int] | None:
         """
+        Get the status key of a file, telling whether it changed since it was read.
 
-        # Validate that the file name is provided
-        if not file_name:
-            raise ToolError("File name was not provided or None.")
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
 
-        # Validate that the path of the file is relative
-        if Path(file_name).is_absolute():
-            raise ToolError("File name is not a relative path.")
+        Returns
+        -------
+        tuple[int, int, int, int] | None
+            The status key of the file, or None if the file has a pending content,
+            which must be compared, or is not a regular file.
 
-        # Construct the full file path
-        long_file_name = os.path.join(self.root_dir, file_name)
+        Raises
+        ------
+        ToolError
+            If the status of the file cannot be read.
+        """
 
-        # Normalize the full file path
-        long_file_name = os.path.normpath(long_file_name)
+        try:
+            if self.write_buffer is not None and self.write_buffer.get(long_file_name) is not None:
+                return None
+            if self.backend is not None:
+                entry = self.backend.stat(long_file_name)
+                return (id(self.backend), 0, entry.st_size, entry.st_mtime_ns) if entry is not None and entry.is_file() else None
+            stat_result = os.stat(long_file_name)
+        except (FileNotFoundError, NotADirectoryError):
+            # The file does not exist or is a member of an archive
+            return None
+        except OSError as error:
+            raise ToolError(str(error)) from error
+        return FileContentCache.key(stat_result) if stat.S_ISREG(stat_result.st_mode) else None
+
+    def _is_truncated(self, key: tuple[int, int, int, int] | None, content: str) -> bool:
+        """
+        Tell whether the content of a whole read was cut to the budgets.
 
-        # Validate that the full file path is inside the root directory path
-        if long_file_name.find(self.root_dir, 0) == -1:
-            raise ToolError("File name is not in root directory.")
+        Parameters
+        ----------
+        key : tuple[int, int, int, int] | None
+            The status key of the file, holding its size, or None if unknown.
+        content : str
+            The content returned by the read.
 
-        # Validate that the file exists
-        if not Path(long_file_name).is_file():
-            raise ToolError("File does not exist.")
+        Returns
+        -------
+        bool
+            True if the content is a head and a tail or a page of the file, False otherwise.
+        """
+
+        # A page cut to the token budget is followed by its continuation notice, so it is over the budget too
+        size = key[2] if key is not None else len(content.encode('utf-8', errors='replace'))
+        if self.max_tokens is not None and (size > self.max_tokens * text_window.MAX_BYTES_PER_TOKEN or self.token_estimator(content) > self.max_tokens):
+            return True
+        return self.max_bytes is not None and size > self.max_bytes
+
+    def _sniff(self, source: BinaryIO, size: int | None) -> tuple[bytes, str | None]:
+        """
+        Read the head of a file and detect its encoding, or that it is binary.
+
+        Parameters
+        ----------
+        source : BinaryIO
+            The file opened in binary mode, at its beginning.
+        size : int | None
+            The size of the file in bytes, or None if unknown.
 
-        # Attempt to read the file
+        Returns
+        -------
+        tuple[bytes, str | None]
+            The head of the file and its encoding, or None if the file is binary
+            and must be summarized.
+
+        Raises
+        ------
+        ToolError
+            If the file is binary and 'binary_summary' is not set.
+        """
+
+        head = source.read(text_encoding.SNIFF_SIZE)
+        tool_metrics.count("bytes_read", len(head))
+        encoding = text_encoding.sniff_encoding(head, len(head) == text_encoding.SNIFF_SIZE if size is None else len(head) < size)
+        if encoding is None and not self.binary_summary:
+            raise ToolError("File is binary and cannot be read as text.")
+        return head, encoding
+
+    def _read_window(self, source, size: int, encoding: str, window: text_window.Window) -> str:
+        """
+        Read and decode a window of a file under the budgets of the tool, see 'text_window.read_window'.
+
+        Returns
+        -------
+        str
+            The decoded window, followed by a continuation notice if the file
+            has content left after the window.
+        """
+
+        return text_window.read_window(source, size, encoding, window, self.max_bytes, self.max_tokens, self.token_estimator)
+
+    def _read_backend(self, file_name: str, path: str, window: text_window.Window) -> str:
+        """
+        Read a file, or a window of it, from the backend.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        path : str
+            The normalized path of the file in the backend.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str
+            The content of the file, or of the window.
+
+        Raises
+        ------
+        ToolError
+            If the file does not exist or cannot be read.
+            If the file is binary.
+        """
+
+        # Validate that the file exists, then open it, a backend on disk streaming it and the others reading it in memory
         try:
-            with open(long_file_name, mode='r', encoding='utf-8') as fd:
-                content = fd.readlines()
-                content = "".join(content)  # Join lines into a single string
+            entry = self.backend.stat(path)
+            if entry is None or not entry.is_file():
+                raise ToolError("File does not exist.")
+            with self.backend.open(path) as source:
+                return self._read_stream(file_name, source, entry.st_size, window)
         except OSError as error:
             raise ToolError(str(error)) from error
 
-        return content
+    def _read_stream(self, file_name: str, source: BinaryIO, size: int, window: text_window.Window) -> str:
+        """
+        Read a file opened by the backend, or a window of it, only reading the bytes needed.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        source : BinaryIO
+            The file opened in binary mode.
+        size : int
+            The size of the file in bytes.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str
+            The content of the file, or of the window.
+
+        Raises
+        ------
+        ToolError
+            If the file is binary, or cannot be read by slices in its encoding.
+        OSError
+            If the file cannot be read.
+        """
+
+        # Reject a binary file, or summarize it
+        head, encoding = self._sniff(source, size)
+        if encoding is None:
+            return text_encoding.binary_summary(file_name, size, head)
+        source.seek(0)
+
+        # Return the whole file when no slice is requested and the file fits in the budgets
+        if window.whole and (self.max_bytes is None or size <= self.max_bytes):
+            data = head
+            if len(head) < size:
+                data = source.read()
+                tool_metrics.count("bytes_read", len(data))
+            content = text_encoding.translate_newlines(data.decode(encoding, errors='replace'))
+            if self.max_tokens is None or self.token_estimator(content) <= self.max_tokens:
+                return content
+            window = window._replace(by_tokens=True)
+            source.seek(0)
+        elif window.whole and self.max_tokens is not None:
+            window = window._replace(by_tokens=True)
+
+        # Otherwise read the requested window
+        if encoding not in text_encoding.WINDOW_ENCODINGS:
+            raise ToolError(f"File is encoded in {encoding}, so it can only be read entirely, without slices.")
+        return self._read_window(source, size, encoding, window)
+
+    def _split_archive(self, resolved: ResolvedPath) -> tuple[ResolvedPath | None, str | None]:
+        """
+        Find the archive holding a path which is not a file, like 'archive.zip/inner/file.txt'.
+
+        Parameters
+        ----------
+        resolved : ResolvedPath
+            The resolved path, which is not a file.
+
+        Returns
+        -------
+        tuple[ResolvedPath | None, str | None]
+            The resolved path of the archive and the name of the member inside it,
+            or None and None if no parent of the path is an archive.
+        """
+
+        parts = os.path.relpath(resolved.long_name, self.root_dir).split(os.sep)
+        for index in range(len(parts) - 1, 0, -1):
+            archive_name = os.path.join(*parts[:index])
+            if compressed_file.archive_kind(archive_name) not in ("zip", "tar"):
+                continue
+            archive = self.path_resolver.resolve(archive_name, "File")
+            if archive.is_file():
+                return archive, "/".join(parts[index:])
+        return None, None
+
+    def _read_compressed(self, file_name: str, long_file_name: str, kind: str, member: str | None, window: text_window.Window) -> str:
+        """
+        Read and decode a window of a compressed file or of an archive member.
+
+        The content is decompressed as a stream, from its beginning to the end of
+        the window only. A content over the read budget is therefore returned page
+        by page from its beginning, instead of as a head and a tail window.
+        An archive read without a member is listed instead.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as provided by the LLM.
+        long_file_name : str
+            The full path of the compressed file or of the archive.
+        kind : str
+            The kind of compression, as returned by 'compressed_file.archive_kind'.
+        member : str | None
+            The name of the member inside the archive, or None.
+        window : text_window.Window
+            The requested window.
+
+        Returns
+        -------
+        str
+            The decoded window, followed by a continuation notice if the content
+            has more after the window, or the list of the members of the archive.
+
+        Raises
+        ------
+        ToolError
+            If the member does not exist in the archive.
+            If the content is binary or cannot be decompressed.
+        """
+
+        try:
+            if member is None and kind in ("zip", "tar"):
+                return compressed_file.list_archive(file_name, long_file_name, kind)
+            if member is not None and kind not in ("zip", "tar"):
+                raise ToolError("File does not exist.")
+
+            with compressed_file.open_compressed(long_file_name, kind, member) as (source, size):
+                # Sniff the head of the decompressed content
+                head, encoding = self._sniff(source, None)
+                if encoding is None:
+                    return text_encoding.binary_summary(file_name, size, head)
+                source.seek(0)
+
+                # Page a whole content when a budget is set, as its tail cannot be reached without decompressing it entirely
+                if window.whole and self.max_tokens is not None:
+                    window = window._replace(by_tokens=True)
+                elif window.whole and self.max_bytes is not None and (size is None or size > self.max_bytes):
+                    window = window._replace(by_bytes=True)
+                if not window.whole and encoding not in text_encoding.WINDOW_ENCODINGS:
+                    raise ToolError(f"File is encoded in {encoding}, so it can only be read entirely, without slices.")
+                return self._read_window(source, size or 0, encoding, window)
+        except compressed_file.ERRORS as error:
+            raise ToolError(f"Compressed file cannot be read: {error}") from error
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text, counting one token per 4 bytes of UTF-8.
+
+    This heuristic is fast and close to the tokenizers of most models for English
+    text and code. Use the tokenizer of the model for an exact count.
+
+    Parameters
+    ----------
+    text : str
+        The text.
+
+    Returns
+    -------
+    int
+        The estimated number of tokens.
+    """
+
+    return (len(text.encode('utf-8', errors='replace')) + 3) // 4
@@ -0,0 +1,390 @@
+"""
+File Search Tool for Yacana
+
+This module provides a tool for searching a text or a regular expression in the files
+of the local filesystem.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0902,R0913,R0914,R0917
+
+import os
+import re
+import stat
+from typing import Iterator
+from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_bool, validate_int
+from .trigram_index import TrigramIndex
+
+_BINARY_SNIFF_SIZE = 8192
+
+class FileSearchTool(Tool):
+    """
+    A tool for searching a text or a regular expression in the files of the local filesystem.
+
+    This class provides functionality to search all files under a directory and return
+    the matching lines as 'file:line:text', so the LLM finds code in a single call
+    instead of listing directories and reading files one by one. It ensures that the
+    provided path is valid and that the directory exists before attempting to search it.
+    The number of returned matches is bounded. Binary files, files over 'max_file_size'
+    and symbolic links are skipped. A trigram index can be used to only read the files
+    which may match.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    max_results : int
+        The maximum number of matching lines returned by a search.
+        Defaults to 100.
+    max_context : int
+        The maximum number of context lines shown before and after each match.
+        Defaults to 5.
+    max_file_size : int
+        The maximum size in bytes of a searched file.
+        Defaults to 1 MiB.
+    max_line_length : int
+        The maximum number of characters shown for a line.
+        Defaults to 500.
+    index : TrigramIndex | None
+        The trigram index of the directory tree, used to skip the files which cannot
+        match. Directories outside of the index are searched file by file. Unless
+        its 'refresh_interval' is set or it reads a DirectoryIndex, the index walks
+        and stats the whole tree before each search, which is most of its cost.
+        None means no index.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    path_resolver : PathResolver
+        The validator of the directory paths.
+    max_results : int
+        The maximum number of matching lines returned by a search.
+        Defaults to 100.
+    max_context : int
+        The maximum number of context lines shown before and after each match.
+        Defaults to 5.
+    max_file_size : int
+        The maximum size in bytes of a searched file.
+        Defaults to 1 MiB.
+    max_line_length : int
+        The maximum number of characters shown for a line.
+        Defaults to 500.
+    index : TrigramIndex | None
+        The trigram index of the directory tree.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_results', 'max_file_size' or 'max_line_length' is not a positive integer.
+        If 'max_context' is negative.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 max_results: int = 100,
+                 max_context: int = 5,
+                 max_file_size: int = 1024 * 1024,
+                 max_line_length: int = 500,
+                 index: TrigramIndex | None = None,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Validate the limits
+        for name, value in (("max_results", max_results), ("max_file_size", max_file_size), ("max_line_length", max_line_length)):
+            if value < 1:
+                raise ValueError(f"Parameter '{name}' expected a positive integer")
+        if max_context < 0:
+            raise ValueError("Parameter 'max_context' expected a non-negative integer")
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+        self.max_results = max_results
+        self.max_context = max_context
+        self.max_file_size = max_file_size
+        self.max_line_length = max_line_length
+        self.index = index
+        self.metrics = metrics
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FileSearch",
+            function_description="Search a text or a regular expression in all files under a directory in the local filesystem and return the matching lines as 'file:line:text'.",
+            function_ref=self.search if metrics is None else metrics.instrument("FileSearch", self.search),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    def search(self,
+               pattern: str,
+               dir_name: str = ".",
+               regex: bool = False,
+               ignore_case: bool = False,
+               context: int | None = None,
+               max_results: int | None = None) -> str:
+        """
+        Search a text or a regular expression in all files under a directory.
+
+        Each matching line is returned as 'file:line:text', the file path being
+        relative to the root directory. Context lines are returned as 'file-line-text'
+        and groups of lines are separated by '--'. When the number of matches reaches
+        the limit, the search stops and a notice is appended.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        pattern : str
+            The text or the regular expression to search.
+        dir_name : str
+            The name of the directory where to search.
+            Note: the path of this directory MUST be relative.
+        regex : bool
+            Whether the pattern is a regular expression. Otherwise it is a literal text.
+            Defaults to False.
+        ignore_case : bool
+            Whether the search ignores the case.
+            Defaults to False.
+        context : int | None
+            The number of lines shown before and after each match, capped to the 'max_context' of the tool.
+            Defaults to None, meaning no context.
+        max_results : int | None
+            The maximum number of matching lines, capped to the 'max_results' of the tool.
+            Defaults to None, meaning the 'max_results' of the tool.
+
+        Returns
+        -------
+        str
+            The matching lines, or a message if nothing matches.
+
+        Raises
+        ------
+        ToolError
+            If the pattern is not provided or is not a valid regular expression.
+            If the directory name is not provided or is invalid.
+            If the directory does not exist.
+            If the context or the maximum number of results is invalid.
+        """
+
+        # Validate that the pattern is provided and compile it
+        if not pattern:
+            raise ToolError("Pattern was not provided or is empty.")
+        regex = validate_bool(regex)
+        ignore_case = validate_bool(ignore_case)
+        # The whole content is matched first to skip files, so anchors must match at each line
+        try:
+            compiled = re.compile(pattern if regex else re.escape(pattern), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        except re.error as error:
+            raise ToolError(f"Pattern is not a valid regular expression: {error}.") from error
+
+        # Validate the context and the maximum number of results
+        context = min(validate_int(context, "context") or 0, self.max_context)
+        max_results = min(validate_int(max_results, "max_results", 1) or self.max_results, self.max_results)
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        resolved = self.path_resolver.resolve(dir_name, "Directory")
+
+        # Validate that the directory exists
+        if not resolved.is_dir():
+            raise ToolError("Directory does not exist.")
+
+        lines = []
+        count = 0
+        for long_file_name in self._candidates(resolved.long_name, pattern, regex):
+            text = self._read_text(long_file_name)
+            if text is None or compiled.search(text) is None:
+                continue
+            rel_file_name = os.path.relpath(long_file_name, self.root_dir)
+            count = self._match_lines(text, compiled, rel_file_name, context, max_results, count, lines)
+            if count >= max_results:
+                lines.append(f"[Search stopped after {max_results} matches. Narrow the pattern or the directory to see more.]")
+                break
+
+        if not lines:
+            return "No match found."
+
+        return "\n".join(lines)
+
+    def _candidates(self, long_dir_name: str, pattern: str, regex: bool) -> Iterator[str]:
+        """
+        Iterate over the files which may match, in a stable order.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory where to search.
+        pattern : str
+            The text or the regular expression to search.
+        regex : bool
+            Whether the pattern is a regular expression.
+
+        Yields
+        ------
+        str
+            The full path of each file to search.
+        """
+
+        if self.index is not None:
+            rel_dir_name = os.path.relpath(long_dir_name, self.index.root_dir)
+            if rel_dir_name != os.pardir and not rel_dir_name.startswith(os.pardir + os.sep):
+                candidates = self.index.candidates(TrigramIndex.literals(pattern, regex), rel_dir_name)
+                if candidates is not None:
+                    for rel_file_name in candidates:
+                        yield os.path.join(self.index.root_dir, rel_file_name)
+                    return
+
+        pending = [long_dir_name]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            tool_metrics.count("entries_scanned", len(entries))
+            dirs = []
+            for entry in entries:
+                # Symbolic links are not followed, so the search cannot loop or leave the root directory
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            pending.extend(reversed(dirs))
+
+    def _read_text(self, long_file_name: str) -> str | None:
+        """
+        Read a file to search, skipping binary, too large and unreadable files.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+
+        Returns
+        -------
+        str | None
+            The decoded content of the file, or None if the file is skipped.
+        """
+
+        try:
+            # Symbolic links are not followed, even if a listed file was replaced by one
+            with open(os.open(long_file_name, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0)), mode='rb') as fd:
+                if not stat.S_ISREG(os.fstat(fd.fileno()).st_mode):
+                    return None
+                data = fd.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        tool_metrics.count("bytes_read", len(data))
+        if len(data) > self.max_file_size or b"\0" in data[:_BINARY_SNIFF_SIZE]:
+            return None
+        # A '\r\n' line break is a '\n', so '$' matches at the end of its line
+        return data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+    def _match_lines(self, text: str, compiled: re.Pattern, rel_file_name: str, context: int,
+                     max_results: int, count: int, lines: list[str]) -> int:
+        """
+        Append the matching lines of a file, with their context, to the result.
+
+        Parameters
+        ----------
+        text : str
+            The content of the file.
+        compiled : re.Pattern
+            The compiled pattern.
+        rel_file_name : str
+            The path of the file, relative to the root directory.
+        context : int
+            The number of lines shown before and after each match.
+        max_results : int
+            The maximum number of matching lines of the whole search.
+        count : int
+            The number of matching lines already found.
+        lines : list[str]
+            The lines of the result, completed in place.
+
+        Returns
+        -------
+        int
+            The number of matching lines found, including this file.
+        """
+
+        # Only '\n' ends a line, unlike for 'str.splitlines', so the line numbers are the ones of the file
+        file_lines = text.split("\n")
+        if file_lines[-1] == "":
+            file_lines.pop()
+        last = -1
+        for number, line in enumerate(file_lines):
+            if count >= max_results:
+                break
+            if compiled.search(line) is None:
+                continue
+            count += 1
+            first = max(number - context, last + 1)
+            if context and lines and (last == -1 or first > last + 1):
+                lines.append("--")
+            for before in range(first, number):
+                lines.append(f"{rel_file_name}-{before + 1}-{self._shorten(file_lines[before])}")
+            lines.append(f"{rel_file_name}:{number + 1}:{self._shorten(line)}")
+            last = number
+            # The lines after the match are shown unless they are matches themselves
+            for after in range(number + 1, min(number + context + 1, len(file_lines))):
+                if compiled.search(file_lines[after]) is not None:
+                    break
+                lines.append(f"{rel_file_name}-{after + 1}-{self._shorten(file_lines[after])}")
+                last = after
+        return count
+
+    def _shorten(self, line: str) -> str:
+        """
+        Shorten a line to the maximum line length.
+
+        Parameters
+        ----------
+        line : str
+            The line.
+
+        Returns
+        -------
+        str
+            The line, truncated with ' [...]' if too long.
+        """
+
+        return line if len(line) <= self.max_line_length else line[:self.max_line_length] + " [...]"
@@ -0,0 +1,368 @@
+"""
+File Tree Tool for Yacana
+
+This module provides a tool for listing the tree of files and subdirectories in the
+local filesystem.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0902,R0913,R0917
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import NamedTuple
+from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .directory_index import DirectoryIndex
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_int
+
+class _Listing(NamedTuple):
+    """
+    The listing of a directory, as used to build a tree.
+    """
+
+    dirs: list[str]
+    files: list[str]
+    omitted_dirs: int
+    omitted_files: int
+    truncated: bool
+    error: str | None
+
+class FileTreeTool(Tool):
+    """
+    A tool for listing the tree of files and subdirectories in the local filesystem.
+
+    This class provides functionality to list recursively all files and subdirectories
+    of a directory and return them as a compact tree in a single call. It ensures that
+    the provided path is valid and that the directory exists before attempting to list it.
+    The tree is bounded by a maximum depth and a maximum number of entries. Chains of
+    directories with a single subdirectory are collapsed on one line, and directories
+    with too many entries are summarised.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the directory is located.
+        Defaults to ".".
+    max_depth : int
+        The maximum number of levels of the tree.
+        Defaults to 5.
+    max_entries : int
+        The maximum number of entries in the tree.
+        Defaults to 1000.
+    max_dir_entries : int
+        The maximum number of entries listed for a single directory. The other
+        entries are summarised.
+        Defaults to 100.
+    max_workers : int
+        The number of threads listing directories of the same level in parallel.
+        Useful for wide trees on network filesystems. 1 means no thread.
+        Defaults to 1.
+    index : DirectoryIndex | None
+        The index of the directory tree, used to list directories without hitting
+        the filesystem. Directories not in the index are listed from the filesystem.
+        None means no index.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path where the directory is located.
+        Defaults to ".".
+    path_resolver : PathResolver
+        The validator of the directory paths.
+    max_depth : int
+        The maximum number of levels of the tree.
+        Defaults to 5.
+    max_entries : int
+        The maximum number of entries in the tree.
+        Defaults to 1000.
+    max_dir_entries : int
+        The maximum number of entries listed for a single directory.
+        Defaults to 100.
+    max_workers : int
+        The number of threads listing directories of the same level in parallel.
+        Defaults to 1.
+    index : DirectoryIndex | None
+        The index of the directory tree.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_depth', 'max_entries', 'max_dir_entries' or 'max_workers' is not a positive integer.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 max_depth: int = 5,
+                 max_entries: int = 1000,
+                 max_dir_entries: int = 100,
+                 max_workers: int = 1,
+                 index: DirectoryIndex | None = None,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Validate that the limits are positive integers
+        for name, value in (("max_depth", max_depth), ("max_entries", max_entries),
+                            ("max_dir_entries", max_dir_entries), ("max_workers", max_workers)):
+            if value < 1:
+                raise ValueError(f"Parameter '{name}' expected a positive integer")
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.max_dir_entries = max_dir_entries
+        self.max_workers = max_workers
+        self.index = index
+        self.metrics = metrics
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FileTree",
+            function_description="List recursively all files and directories under a directory in the local filesystem and return them as a tree.",
+            function_ref=self.get_file_tree if metrics is None else metrics.instrument("FileTree", self.get_file_tree),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    def get_file_tree(self, dir_name: str = ".", max_depth: int | None = None) -> str:
+        """
+        List recursively all files and subdirectories of a directory as a tree.
+
+        Each level of the tree is indented by two spaces and directory names end
+        with '/'. Symbolic links to directories end with '@' and are not followed.
+        Directories which were not listed because of the depth or entries limits
+        are followed by '[...]'.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        dir_name: str
+            The name of the directory where to list all files and subdirectories.
+            Note: the path of this directory MUST be relative.
+        max_depth: int | None
+            The maximum number of levels of the tree, capped to the 'max_depth' of the tool.
+            Defaults to None, meaning the 'max_depth' of the tool.
+
+        Returns
+        -------
+        str
+            The tree of all files and subdirectories under the directory.
+
+        Raises
+        ------
+        ToolError
+            If the directory name is not provided or is invalid.
+            If the directory does not exist or cannot be listed.
+            If the maximum depth is invalid.
+        """
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        resolved = self.path_resolver.resolve(dir_name, "Directory")
+
+        # Validate that the maximum depth is a positive integer
+        max_depth = min(validate_int(max_depth, "max_depth", 1) or self.max_depth, self.max_depth)
+
+        # Validate that the directory exists
+        if not resolved.is_dir():
+            raise ToolError("Directory does not exist.")
+        long_dir_name = resolved.long_name
+
+        # List the directories level by level and render the tree
+        listings = self._scan_tree(long_dir_name, max_depth)
+        if listings[long_dir_name].error is not None:
+            raise ToolError(listings[long_dir_name].error)
+
+        lines = [os.path.normpath(dir_name) + "/"]
+        complete = self._render_tree(listings, long_dir_name, "  ", lines)
+        if not complete:
+            lines.append(f"[Tree truncated after {self.max_entries} entries. List a subdirectory to see more.]")
+
+        return "\n".join(lines)
+
+    def _scan_tree(self, long_dir_name: str, max_depth: int) -> dict[str, _Listing]:
+        """
+        List the directories of a tree level by level, under the depth and entries limits.
+
+        The directories of a level are listed in parallel when 'max_workers' is above 1,
+        by batches of 'max_workers' directories, and no directory is listed once the
+        entries limit is reached.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the top directory of the tree.
+        max_depth : int
+            The maximum number of levels to list.
+
+        Returns
+        -------
+        dict[str, _Listing]
+            The listing of each listed directory, by full path.
+        """
+
+        listings = {}
+        level = [long_dir_name]
+        count = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        scan_dir = tool_metrics.propagate(self._scan_dir) if executor is not None else self._scan_dir
+        try:
+            for _ in range(max_depth):
+                next_level = []
+                for start in range(0, len(level), self.max_workers):
+                    # Stop listing directories once the entries limit is reached
+                    budget = self.max_entries - count
+                    if budget <= 0:
+                        break
+                    batch = level[start:start + self.max_workers]
+                    results = (executor.map if executor is not None else map)(scan_dir, batch, [budget] * len(batch))
+                    for path, listing in zip(batch, results):
+                        listings[path] = listing
+                        count += len(listing.dirs) + len(listing.files)
+                        next_level.extend(os.path.join(path, name) for name in listing.dirs)
+                level = next_level
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return listings
+
+    def _scan_dir(self, long_dir_name: str, budget: int) -> _Listing:
+        """
+        List a single directory of a tree, summarising it if it has too many entries.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory.
+        budget : int
+            The number of entries left under the entries limit of the tree.
+
+        Returns
+        -------
+        _Listing
+            The listing of the directory, sorted by name.
+        """
+
+        dirs = []
+        files = []
+        indexed = None
+        if self.index is not None:
+            rel_dir_name = self.index.relative(long_dir_name)
+            if rel_dir_name is not None:
+                indexed = self.index.list_dir(rel_dir_name)
+        try:
+            with os.scandir(long_dir_name) if indexed is None else nullcontext(indexed) as iterator:
+                for entry in iterator:
+                    # Symbolic links are not followed, so the tree cannot loop or leave the root directory
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.is_symlink() and entry.is_dir():
+                        files.append(entry.name + "@")
+                    else:
+                        files.append(entry.name)
+        except OSError as error:
+            return _Listing([], [], 0, 0, False, error.strerror or str(error))
+
+        tool_metrics.count("entries_scanned", len(dirs) + len(files))
+        dirs.sort()
+        files.sort()
+        kept = min(len(dirs) + len(files), self.max_dir_entries)
+        kept_dirs = min(len(dirs), kept, budget)
+        kept_files = min(len(files), kept - kept_dirs, budget - kept_dirs)
+        truncated = kept_dirs + kept_files < kept
+        return _Listing(dirs[:kept_dirs], files[:kept_files], len(dirs) - kept_dirs, len(files) - kept_files, truncated, None)
+
+    def _render_tree(self, listings: dict[str, _Listing], long_dir_name: str, indent: str, lines: list[str]) -> bool:
+        """
+        Render the entries of a listed directory, recursively.
+
+        Parameters
+        ----------
+        listings : dict[str, _Listing]
+            The listing of each listed directory, by full path.
+        long_dir_name : str
+            The full path of the directory to render.
+        indent : str
+            The indentation of the entries of the directory.
+        lines : list[str]
+            The lines of the tree, completed in place.
+
+        Returns
+        -------
+        bool
+            False if the tree was truncated to 'max_entries' entries, True otherwise.
+        """
+
+        listing = listings[long_dir_name]
+        for name in listing.dirs:
+            path = os.path.join(long_dir_name, name)
+            label = name + "/"
+
+            # Collapse the chains of directories which only hold a single directory
+            child = listings.get(path)
+            while (child is not None and child.error is None and len(child.dirs) == 1 and not child.files
+                   and not child.omitted_dirs and not child.omitted_files):
+                path = os.path.join(path, child.dirs[0])
+                label = label + child.dirs[0] + "/"
+                child = listings.get(path)
+
+            if len(lines) > self.max_entries:
+                return False
+            if child is None:
+                lines.append(f"{indent}{label} [...]")
+            elif child.error is not None:
+                lines.append(f"{indent}{label} [{child.error}]")
+            else:
+                lines.append(f"{indent}{label}")
+                if not self._render_tree(listings, path, indent + "  ", lines):
+                    return False
+
+        for name in listing.files:
+            if len(lines) > self.max_entries:
+                return False
+            lines.append(f"{indent}{name}")
+
+        # The entries cut by the entries limit are not summarised, the tree is truncated
+        if listing.truncated:
+            return False
+        if listing.omitted_dirs or listing.omitted_files:
+            lines.append(f"{indent}[... {listing.omitted_dirs + listing.omitted_files} more entries: {listing.omitted_dirs} directories, {listing.omitted_files} files]")
+
+        return True
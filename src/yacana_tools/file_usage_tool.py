@@ -0,0 +1,404 @@
+"""
+File Usage Tool for Yacana
+
+This module provides a tool for computing the disk usage and the file statistics of a
+directory tree in the local filesystem.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0913,R0917
+
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from yacana import Tool, ToolError, ToolType
+from . import tool_metrics
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_int
+
+# The default number of processes walking the subtrees, above which the disk is the bottleneck
+_MAX_DEFAULT_WORKERS = 8
+
+class _Usage:
+    """
+    The disk usage and the file statistics of a part of a directory tree.
+    """
+
+    __slots__ = ("size", "files", "dirs", "errors", "extensions", "largest")
+
+    def __init__(self):
+        self.size = 0
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+        # Number of files and total size by extension
+        self.extensions: dict[str, list[int]] = {}
+        # Heap of the largest files, as (size, relative path)
+        self.largest: list[tuple[int, str]] = []
+
+    def add_file(self, size: int, name: str, path: str, base_dir: str, top: int) -> None:
+        """
+        Account a file.
+        """
+
+        self.size += size
+        self.files += 1
+        extension = os.path.splitext(name)[1].lower() or "(none)"
+        counts = self.extensions.get(extension)
+        if counts is None:
+            self.extensions[extension] = [1, size]
+        else:
+            counts[0] += 1
+            counts[1] += size
+        if len(self.largest) < top:
+            heapq.heappush(self.largest, (size, os.path.relpath(path, base_dir)))
+        elif size > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (size, os.path.relpath(path, base_dir)))
+
+    def merge(self, other: "_Usage", top: int) -> None:
+        """
+        Account the usage of another part of the tree.
+        """
+
+        self.size += other.size
+        self.files += other.files
+        self.dirs += other.dirs
+        self.errors += other.errors
+        for extension, (count, size) in other.extensions.items():
+            counts = self.extensions.setdefault(extension, [0, 0])
+            counts[0] += count
+            counts[1] += size
+        self.largest = heapq.nlargest(top, self.largest + other.largest)
+        heapq.heapify(self.largest)
+
+class FileUsageTool(Tool):
+    """
+    A tool for computing the disk usage and the file statistics of a directory tree.
+
+    This class provides functionality to compute, in a single call, the total size
+    and the number of files of a directory, the largest subdirectories and files,
+    and the number and size of files by extension. It ensures that the provided path
+    is valid and that the directory exists before attempting to walk it.
+    The tree is walked with 'os.scandir', without following symbolic links. A tree
+    larger than 'parallel_threshold' entries is split into subtrees which are walked
+    by a pool of processes, so very large trees use all processors.
+    Sizes are the apparent sizes of the files, as reported by 'os.stat'.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the directory is located.
+        Defaults to ".".
+    top : int
+        The number of directories, files and extensions in each part of the summary.
+        Defaults to 10.
+    max_workers : int | None
+        The number of processes walking the subtrees of a large tree. 1 means no
+        process. None means the number of processors, at most 8. The processes are
+        started with 'forkserver' where available, 'spawn' otherwise, so they are
+        never forked from the threads of the caller.
+        Defaults to None.
+    parallel_threshold : int
+        The number of entries walked by the calling process before the rest of
+        the tree is handed to the pool of processes.
+        Defaults to 20000.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path where the directory is located.
+        Defaults to ".".
+    path_resolver : PathResolver
+        The validator of the directory paths.
+    top : int
+        The number of directories, files and extensions in each part of the summary.
+        Defaults to 10.
+    max_workers : int
+        The number of processes walking the subtrees of a large tree.
+    parallel_threshold : int
+        The number of entries walked by the calling process before the rest of the tree is handed to the pool of processes.
+        Defaults to 20000.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'top', 'max_workers' or 'parallel_threshold' is not a positive integer.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 top: int = 10,
+                 max_workers: int | None = None,
+                 parallel_threshold: int = 20000,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Validate that the limits are positive integers
+        if max_workers is None:
+            max_workers = min(os.cpu_count() or 1, _MAX_DEFAULT_WORKERS)
+        for name, value in (("top", top), ("max_workers", max_workers), ("parallel_threshold", parallel_threshold)):
+            if value < 1:
+                raise ValueError(f"Parameter '{name}' expected a positive integer")
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+        self.top = top
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+        self.metrics = metrics
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FileUsage",
+            function_description="Compute the disk usage of a directory in the local filesystem: total size, largest subdirectories and files, and number and size of files by extension.",
+            function_ref=self.get_usage if metrics is None else metrics.instrument("FileUsage", self.get_usage),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    def get_usage(self, dir_name: str = ".", top: int | None = None) -> str:
+        """
+        Compute the disk usage and the file statistics of a directory tree.
+
+        The summary holds the total size and the number of files and directories,
+        then the largest subdirectories, the largest files and the extensions with
+        the largest total size.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        dir_name : str
+            The name of the directory to measure.
+            Note: the path of this directory MUST be relative.
+        top : int | None
+            The number of directories, files and extensions in each part of the
+            summary, capped to the 'top' of the tool.
+            Defaults to None, meaning the 'top' of the tool.
+
+        Returns
+        -------
+        str
+            The summary of the disk usage of the directory.
+
+        Raises
+        ------
+        ToolError
+            If the directory name is not provided or is invalid.
+            If the directory does not exist or cannot be listed.
+            If the number of entries of the summary is invalid.
+        """
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        resolved = self.path_resolver.resolve(dir_name, "Directory")
+
+        # Validate that the number of entries of the summary is a positive integer
+        top = min(validate_int(top, "top", 1) or self.top, self.top)
+
+        # Validate that the directory exists and can be listed
+        if not resolved.is_dir():
+            raise ToolError("Directory does not exist.")
+        long_dir_name = resolved.long_name
+        try:
+            with os.scandir(long_dir_name):
+                pass
+        except OSError as error:
+            raise ToolError(str(error)) from error
+
+        # Walk the first entries in this process, then hand the remaining subtrees to a pool of processes
+        usages, pending, scanned = _walk([(long_dir_name, None)], self.root_dir, top, self.parallel_threshold if self.max_workers > 1 else None)
+        if pending:
+            scanned += self._walk_pool(pending, usages, top)
+        tool_metrics.count("entries_scanned", scanned)
+
+        total = _Usage()
+        for usage in usages.values():
+            total.merge(usage, top)
+        return _format_summary(os.path.normpath(dir_name), usages, total, top)
+
+    def _walk_pool(self, pending: list[tuple[str, str | None]], usages: dict[str | None, _Usage], top: int) -> int:
+        """
+        Walk the remaining subtrees in a pool of processes, merging their usage.
+
+        Parameters
+        ----------
+        pending : list[tuple[str, str | None]]
+            The directories left to walk, see '_walk'.
+        usages : dict[str | None, _Usage]
+            The usage by subdirectory of the top directory, updated in place.
+        top : int
+            The number of largest files kept.
+
+        Returns
+        -------
+        int
+            The number of entries walked.
+        """
+
+        scanned = 0
+        chunks = [pending[index::self.max_workers * 4] for index in range(min(len(pending), self.max_workers * 4))]
+        mp_context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)), mp_context=mp_context) as executor:
+            for chunk_usages, _, chunk_scanned in executor.map(_walk, chunks, [self.root_dir] * len(chunks), [top] * len(chunks)):
+                scanned += chunk_scanned
+                for child, usage in chunk_usages.items():
+                    usages.setdefault(child, _Usage()).merge(usage, top)
+        return scanned
+
+
+def _walk(pending: list[tuple[str, str | None]], base_dir: str, top: int, budget: int | None = None) -> tuple[dict[str | None, _Usage], list[tuple[str, str | None]], int]:
+    """
+    Walk directory trees, accounting each file to the subdirectory of the top directory holding it.
+
+    This function runs in the pool of processes, so it only takes and returns picklable values.
+
+    Parameters
+    ----------
+    pending : list[tuple[str, str | None]]
+        The directories to walk, as full paths with the name of the subdirectory
+        of the top directory holding them, None for the top directory itself.
+    base_dir : str
+        The directory the paths of the largest files are relative to.
+    top : int
+        The number of largest files kept.
+    budget : int | None
+        The number of entries after which the walk stops. None means no limit.
+        Defaults to None.
+
+    Returns
+    -------
+    tuple[dict[str | None, _Usage], list[tuple[str, str | None]], int]
+        The usage by subdirectory of the top directory, the directories left to
+        walk when the budget is exhausted, and the number of entries walked.
+    """
+
+    usages: dict[str | None, _Usage] = {}
+    pending = list(pending)
+    scanned = 0
+    while pending and (budget is None or scanned < budget):
+        path, child = pending.pop()
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError:
+            usages.setdefault(child, _Usage()).errors += 1
+            continue
+        scanned += len(entries)
+        for entry in entries:
+            try:
+                # Symbolic links are not followed, so the walk cannot loop or leave the root directory
+                if entry.is_dir(follow_symlinks=False):
+                    owner = child if child is not None else entry.name
+                    usages.setdefault(owner, _Usage()).dirs += 1
+                    pending.append((entry.path, owner))
+                elif entry.is_file(follow_symlinks=False):
+                    usage = usages.get(child)
+                    if usage is None:
+                        usage = usages[child] = _Usage()
+                    usage.add_file(entry.stat(follow_symlinks=False).st_size, entry.name, entry.path, base_dir, top)
+            except OSError:
+                usages.setdefault(child, _Usage()).errors += 1
+    return usages, pending, scanned
+
+
+def _format_summary(dir_name: str, usages: dict[str | None, _Usage], total: _Usage, top: int) -> str:
+    """
+    Format the summary of the disk usage of a directory.
+
+    Parameters
+    ----------
+    dir_name : str
+        The name of the directory, as provided by the LLM.
+    usages : dict[str | None, _Usage]
+        The usage by subdirectory, None for the files directly in the directory.
+    total : _Usage
+        The usage of the whole directory.
+    top : int
+        The number of entries in each part of the summary.
+
+    Returns
+    -------
+    str
+        The summary.
+    """
+
+    lines = [f"{dir_name}/: {_format_size(total.size)} in {total.files} files and {total.dirs} directories."]
+
+    children = heapq.nlargest(top, ((usage.size, child) for child, usage in usages.items() if child is not None))
+    if children:
+        lines.append("Largest directories:")
+        lines.extend(f"* {child}/: {_format_size(size)} in {usages[child].files} files" for size, child in children)
+        if len(usages) - (None in usages) > top:
+            lines.append(f"[{len(usages) - (None in usages) - top} smaller directories omitted.]")
+
+    if total.largest:
+        lines.append("Largest files:")
+        lines.extend(f"* {path}: {_format_size(size)}" for size, path in sorted(total.largest, reverse=True))
+
+    if total.extensions:
+        lines.append("Files by extension:")
+        extensions = heapq.nlargest(top, total.extensions.items(), key=lambda item: (item[1][1], item[1][0]))
+        lines.extend(f"* {extension}: {count} files, {_format_size(size)}" for extension, (count, size) in extensions)
+        if len(total.extensions) > top:
+            lines.append(f"[{len(total.extensions) - top} other extensions omitted.]")
+
+    if total.errors:
+        lines.append(f"[{total.errors} entries could not be read.]")
+    return "\n".join(lines)
+
+
+def _format_size(size: int) -> str:
+    """
+    Format a size in bytes with a binary unit.
+
+    Parameters
+    ----------
+    size : int
+        The size in bytes.
+
+    Returns
+    -------
+    str
+        The size, e.g. '512 B' or '1.5 MiB'.
+    """
+
+    if size < 1024:
+        return f"{size} B"
+    value = float(size)
+    for unit in ("KiB", "MiB", "GiB", "TiB"):
+        value /= 1024
+        if value < 1024 or unit == "TiB":
+            break
+    return f"{value:.1f} {unit}"
@@ -5,11 +5,28 @@ This module provides a tool to write or save content to a file in the local file
 """
 
 # pylint: disable=C0301
-# pylint: disable=R0913,R0917
+# pylint: disable=R0902,R0913,R0917
 
+import io
 import os
+import posixpath
+import stat
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, TextIO
 from yacana import Tool, ToolError, ToolType
+from . import text_edit, text_encoding, tool_metrics
+from .async_executor import AsyncExecutor, shared_executor
+from .directory_index import IndexEntry
+from .filesystem import FileSystem
+from .path_resolver import PathResolver, ResolvedPath
+from .tool_metrics import ToolMetrics
+from .validation import validate_int
+from .write_buffer import WriteBuffer
+
+FSYNC_POLICIES = ("none", "file", "file+dir")
+WRITE_MODES = ("write", "append", "replace", "lines")
 
 class FileWriteTool(Tool):
     """
@@ -23,14 +40,44 @@ class FileWriteTool(Tool):
     Parameters
     ----------
     root_dir : str
-        The root directory path from where the file will be written.
+        The root directory path from where the file will be written, in the backend if any.
         Defaults to ".".
     create_dir : bool
         If True, the directory will be created if it doesn't exist.
         Defaults to False.
     force : bool
-        If True, the file will be overwritten if it already exists.
+        If True, the file will be overwritten by the "write" mode if it already exists.
+        The other modes only change an existing file and do not require it.
+        Defaults to False.
+    atomic : bool
+        If True, the content is written to a temporary file which then replaces
+        the file, so readers never see a partially written file.
         Defaults to False.
+    fsync : str
+        The durability policy: "none" leaves the flush to the operating system,
+        "file" syncs the file to disk, "file+dir" also syncs its directory so the
+        file name itself is durable.
+        Defaults to "none".
+    write_buffer : WriteBuffer | None
+        The write-behind buffer, possibly shared with a FileReadTool which then
+        reads the pending contents. Whole-file writes are kept in the buffer and
+        coalesced until it is flushed. None means every write goes to disk.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the files are written, e.g. an in-memory filesystem,
+        possibly shared with other tools. A file of a backend is rewritten whole,
+        and the atomicity and durability policies only apply to the local disk.
+        None means the local disk.
+        Defaults to None.
+    executor : AsyncExecutor | None
+        The bounded executor running the async variant of the tool, possibly
+        shared with other tools. None means the executor shared by the tools,
+        see 'shared_executor'.
+        Defaults to None.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
     optional : bool
         Whether the tool is optional.
         Defaults to False.
@@ -49,45 +96,80 @@ class FileWriteTool(Tool):
     root_dir : str
         The root directory path where the file will be written.
         Defaults to ".".
+    path_resolver : PathResolver | None
+        The validator of the file paths, or None with a backend.
     create_dir : bool
         If True, the directory will be created if it doesn't exist.
         Defaults to False.
     force : bool
-        If True, the file will be overwritten if it already exists.
+        If True, the file will be overwritten by the "write" mode if it already exists.
+        The other modes only change an existing file and do not require it.
         Defaults to False.
+    atomic : bool
+        If True, the content is written to a temporary file which then replaces the file.
+        Defaults to False.
+    fsync : str
+        The durability policy: "none", "file" or "file+dir".
+        Defaults to "none".
+    write_buffer : WriteBuffer | None
+        The write-behind buffer.
+        Defaults to None.
+    backend : FileSystem | None
+        The filesystem where the files are written, or None for the local disk.
+        Defaults to None.
+    executor : AsyncExecutor
+        The bounded executor running the async variant of the tool.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
 
     Raises
     ------
     ValueError
         If the provided path is not a valid directory.
+        If the provided durability policy is not valid.
     """
 
     def __init__(self,
                  root_dir: str = ".",
                  create_dir: bool = False,
                  force: bool = False,
+                 atomic: bool = False,
+                 fsync: str = "none",
+                 write_buffer: WriteBuffer | None = None,
+                 backend: FileSystem | None = None,
+                 executor: AsyncExecutor | None = None,
+                 metrics: ToolMetrics | None = None,
                  optional: bool = False,
                  max_custom_error: int = 5,
                  max_call_error: int = 5,
                  tool_type: ToolType = ToolType.YACANA):
 
-        # Validate that the parameter 'rootdir' is a valid directory
-        root_dir = os.path.normpath(root_dir)
-        root_dir = os.path.abspath(root_dir)
+        # Validate that the parameter 'rootdir' is a valid directory, on the local disk or in the backend
+        path_resolver = PathResolver(root_dir) if backend is None else None
+        root_dir = path_resolver.root_dir if backend is None else backend.root(root_dir)
 
-        if not Path(root_dir).is_dir():
-            raise ValueError("Parameter 'root_dir' expected a valid directory")
+        # Validate that the parameter 'fsync' is a valid durability policy
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Parameter 'fsync' expected one of {', '.join(FSYNC_POLICIES)}")
 
         # Set all attributes
         self.root_dir = root_dir
+        self.path_resolver = path_resolver
         self.create_dir = create_dir
         self.force = force
+        self.atomic = atomic
+        self.fsync = fsync
+        self.write_buffer = write_buffer
+        self.backend = backend
+        self.executor = executor if executor is not None else shared_executor()
+        self.metrics = metrics
 
         # Call the parent class constructor to initialize the tool
         super().__init__(
             tool_name="FileWrite",
-            function_description="Write or save content to file in local filesystem",
-            function_ref=self.write_content,
+            function_description="Write or save content to file in local filesystem. Can also append content to a file, replace a text in a file or replace a range of lines of a file.",
+            function_ref=self.write_content if metrics is None else metrics.instrument("FileWrite", self.write_content),
             optional=optional,
             max_custom_error=max_custom_error,
             max_call_error=max_call_error,
@@ -97,10 +179,31 @@ class FileWriteTool(Tool):
 
     def write_content(self,
                      file_name: str,
-                     content: str) -> None:
+                     content: str,
+                     mode: str = "write",
+                     search: str | None = None,
+                     start_line: int | None = None,
+                     end_line: int | None = None) -> str:
         """
         Write the provided content in a file.
 
+        The mode selects how the content is written:
+        - "write" replaces the whole file with the content,
+        - "append" adds the content at the end of the file,
+        - "replace" replaces every occurrence of 'search' in the file with the content,
+        - "lines" replaces the lines from 'start_line' to 'end_line' with the content.
+        An existing file can only be replaced by the "write" mode if 'force' is True,
+        the other modes changing an existing file without it.
+        The "replace" and "lines" modes stream the file through a temporary file
+        which then replaces it, so only the changed region is sent and the file is
+        never fully loaded in memory. An existing file is edited or appended to in
+        its own encoding, detected like FileReadTool does, and a binary file is rejected. The "write" mode writes the file in place,
+        or atomically through a temporary file. The file is then synced to disk
+        according to the durability policy.
+        When a write buffer is set, the "write" mode keeps the content in the buffer
+        until it is flushed, and the "append" mode appends to the pending content.
+        When a backend is set, the file is written to it instead of the local disk.
+
         Note: this function is expected to be called the LLM.
 
         Parameters
@@ -110,10 +213,25 @@ class FileWriteTool(Tool):
             Note: the path of this file MUST be relative.
         content : str
             The content to be written to the file.
-        
+            It may be empty in the "replace" and "lines" modes, to delete text.
+        mode : str
+            The write mode: "write", "append", "replace" or "lines".
+            Defaults to "write".
+        search : str | None
+            The text to replace, in the "replace" mode.
+            Defaults to None.
+        start_line : int | None
+            The number of the first line to replace, starting from 1, in the "lines" mode.
+            Defaults to None.
+        end_line : int | None
+            The number of the last line to replace, in the "lines" mode. A value of
+            'start_line' - 1 inserts the content before 'start_line' without replacing any line.
+            Defaults to None, meaning 'start_line'.
+
         Returns
         -------
-        None
+        str
+            A confirmation of the write, with the write mode and the durability policy applied.
 
         Raises
         ------
@@ -121,63 +239,716 @@ class FileWriteTool(Tool):
             If the file name is not provided or is invalid.
             If the file does not exist or cannot be written.
             If the content is not provided or is invalid.
+            If the mode or its arguments are invalid.
+            If the file is binary or not valid in its encoding, or the content cannot be encoded in it.
         """
 
-        # Validate that the file name is provided
-        if not file_name:
-            raise ToolError("File name was not provided or None.")
+        # Validate that the path of the file is provided, relative and inside the root directory path
+        resolved = None
+        if self.backend is not None:
+            long_file_name = self.backend.resolve(self.root_dir, file_name, "File")
+        else:
+            resolved = self.path_resolver.resolve(file_name, "File")
+            long_file_name = resolved.long_name
 
-        # Validate that the path of the file is relative
-        if Path(file_name).is_absolute():
-            raise ToolError("File name is not a relative path.")
+        # Validate the mode and its arguments
+        if mode not in WRITE_MODES:
+            raise ToolError(f"Mode is not valid, expected one of {', '.join(WRITE_MODES)}.")
+        if mode == "replace" and not search:
+            raise ToolError("Search text was not provided or is empty.")
+        if mode == "lines":
+            start_line, end_line = _validate_lines(start_line, end_line)
 
         # Validate that 'content' is not empty
-        if not content or content == "":
+        if content is None or (mode in ("write", "append") and content == ""):
             raise ToolError("Content was not provided or is empty.")
 
-        # Construct the full file path
-        long_file_name = os.path.join(self.root_dir, file_name)
-
-        # Normalize the full file path
-        long_file_name = os.path.normpath(long_file_name)
-
-        # Validate that the full file path is inside the root directory path
-        if long_file_name.find(self.root_dir, 0) == -1:
-            raise ToolError("File name is not in root directory.")
-
-        long_dir_name = os.path.dirname(long_file_name)
-
-        # Check if the directory exists
-        if Path(long_dir_name).exists():
-            # Check if the directory is a valid directory
-            if Path(long_dir_name).is_dir():
-                # Check if the file exists
-                if Path(long_file_name).exists():
-                    # Check if the file is a valid file
-                    if Path(long_file_name).is_file():
-                        # If force is False and file exists, raise an error
-                        if not self.force:
-                            raise ToolError("File already exists but cannot be overwritten.")
-                    else:
-                        # If the file is not a valid file, raise an error
-                        raise ToolError("File name is not a valid path.")
+        # Write the file to the backend, which holds it in memory, otherwise to the local disk
+        if self.backend is not None:
+            return self._write_backend(file_name, long_file_name, content, mode, search, start_line, end_line)
+        return self._write_local(file_name, resolved, content, mode, search, start_line, end_line)
+
+    def _write_local(self, file_name: str, resolved: ResolvedPath, content: str, mode: str, search: str | None,
+                     start_line: int | None, end_line: int | None) -> str:
+        """
+        Write the provided content in a file of the local disk.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        resolved : ResolvedPath
+            The validated path of the file.
+        content : str
+            The content to be written to the file.
+        mode : str
+            The write mode: "write", "append", "replace" or "lines".
+        search : str | None
+            The text to replace, in the "replace" mode.
+        start_line : int | None
+            The number of the first line to replace, in the "lines" mode.
+        end_line : int | None
+            The number of the last line to replace, in the "lines" mode.
+
+        Returns
+        -------
+        str
+            A confirmation of the write, with the write mode and the durability policy applied.
+
+        Raises
+        ------
+        ToolError
+            If the file does not exist or cannot be written.
+            If the file is binary or not valid in its encoding, or the content cannot be encoded in it.
+            If the search text or the lines are not found.
+        """
+
+        long_file_name = resolved.long_name
+        file_exists = self._check_local(file_name, resolved, mode)
+
+        # Write the content to the file
+        try:
+            if self.write_buffer is not None and mode == "write":
+                self.write_buffer.put(long_file_name, content, self._write_file)
+                return f"Content written to file '{file_name}' (buffered write, fsync policy: {self.fsync})."
+            if self.write_buffer is not None and mode == "append" and self.write_buffer.append(long_file_name, content):
+                return f"Content appended to file '{file_name}' (buffered write, fsync policy: {self.fsync})."
+
+            if mode in ("replace", "lines"):
+                result = self._edit_local(file_name, long_file_name, content, mode, search, start_line, end_line)
+            elif mode == "append":
+                encoding = _file_encoding(long_file_name) if file_exists else 'utf-8'
+                with open(long_file_name, mode='a', encoding=encoding) as fd:
+                    fd.write(content)
+                    tool_metrics.count("bytes_written", len(content.encode(encoding)))
+                    if self.fsync != "none":
+                        fd.flush()
+                        os.fsync(fd.fileno())
+                result = f"Content appended to file '{file_name}' (append write"
             else:
-                # If the path is not a valid directory, raise an error
+                self._write_file(long_file_name, content)
+                result = f"Content written to file '{file_name}' ({'atomic' if self.atomic else 'in-place'} write"
+            if self.fsync == "file+dir" and mode != "write":
+                _fsync_dir(os.path.dirname(long_file_name))
+        except UnicodeDecodeError as error:
+            raise ToolError(f"File is not valid {error.encoding} text, so it cannot be edited without corrupting it.") from error
+        except UnicodeEncodeError as error:
+            raise ToolError(f"Content cannot be encoded in {error.encoding}, the encoding of the file.") from error
+        except OSError as error:
+            raise ToolError(str(error)) from error
+
+        return f"{result}, fsync policy: {self.fsync})."
+
+    def _edit_local(self, file_name: str, long_file_name: str, content: str, mode: str, search: str | None,
+                    start_line: int | None, end_line: int | None) -> str:
+        """
+        Edit a file of the local disk in the "replace" or "lines" mode, streaming
+        it to a temporary file in its own encoding and renaming it over the file.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        long_file_name : str
+            The full path of the file.
+        content : str
+            The content to be written to the file.
+        mode : str
+            The write mode: "replace" or "lines".
+        search : str | None
+            The text to replace, in the "replace" mode.
+        start_line : int | None
+            The number of the first line to replace, in the "lines" mode.
+        end_line : int | None
+            The number of the last line to replace, in the "lines" mode.
+
+        Returns
+        -------
+        str
+            The beginning of the confirmation of the edit.
+
+        Raises
+        ------
+        ToolError
+            If the file is binary, or the search text or the lines are not found.
+        OSError
+            If the file cannot be read or written.
+        UnicodeError
+            If the file is not valid in its encoding, or the content cannot be encoded in it.
+        """
+
+        sync = self.fsync != "none"
+        encoding = _file_encoding(long_file_name)
+        with open(long_file_name, mode='r', encoding=encoding, newline='') as source, _atomic_open(long_file_name, sync, newline='', encoding=encoding) as fd:
+            result = _edit_stream(file_name, source, fd, content, mode, search, start_line, end_line)
+        return f"{result} (atomic write"
+
+    def _check_local(self, file_name: str, resolved: ResolvedPath, mode: str) -> bool:
+        """
+        Check that a file of the local disk can be written in a mode, creating its directory if needed.
+
+        A file with a pending content in the write buffer exists. Its pending
+        content is written first when the file is edited, since an edited file is
+        streamed from disk.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        resolved : ResolvedPath
+            The validated path of the file.
+        mode : str
+            The write mode: "write", "append", "replace" or "lines".
+
+        Returns
+        -------
+        bool
+            Whether the file exists, on disk or in the write buffer.
+
+        Raises
+        ------
+        ToolError
+            If the file is not a valid path, exists without 'force' in the "write" mode,
+            or does not exist in an edit mode.
+            If the directory does not exist and cannot or may not be created.
+        """
+
+        long_file_name = resolved.long_name
+
+        # Check if the file has a pending content in the write buffer, which is then the file
+        pending = False
+        if self.write_buffer is not None:
+            try:
+                pending = self.write_buffer.get(long_file_name) is not None
+                if pending and mode in ("replace", "lines"):
+                    # An edited file is streamed from disk, so its pending content is written first
+                    self.write_buffer.flush(long_file_name)
+                    resolved = self.path_resolver.resolve(file_name, "File")
+                    pending = False
+            except OSError as error:
+                raise ToolError(str(error)) from error
+        file_exists = pending or resolved.exists()
+
+        # Check if the file exists, its directory then existing too
+        if file_exists:
+            # If the file is not a valid file, raise an error
+            if not pending and not resolved.is_file():
                 raise ToolError("File name is not a valid path.")
+            # If force is False and the file exists, it cannot be replaced, only edited or appended to
+            if mode == "write" and not self.force:
+                raise ToolError("File already exists but cannot be overwritten.")
+        elif mode in ("replace", "lines"):
+            # An edited file must exist
+            raise ToolError("File does not exist.")
         else:
-            # If the directory does not exist and create_dir is True, create it
-            if self.create_dir:
-                try:
-                    Path(long_dir_name).mkdir(parents=True, exist_ok=True)
-                except OSError as error:
-                    raise ToolError(str(error)) from error
-            else:
-                # If the directory does not exist and create_dir is False, raise an error
-                raise ToolError("File cannot be written because directory does not exist.")
+            self._check_local_dir(os.path.dirname(long_file_name))
 
-        # Write the content to the file
+        return file_exists
+
+    def _check_local_dir(self, long_dir_name: str) -> None:
+        """
+        Check that the directory of a new file of the local disk exists, creating it if allowed.
+
+        Parameters
+        ----------
+        long_dir_name : str
+            The full path of the directory.
+
+        Raises
+        ------
+        ToolError
+            If the path is not a directory, or it does not exist and cannot or may not be created.
+        """
+
+        # Check if the directory of the new file exists
+        tool_metrics.count("stat_calls")
         try:
+            dir_stat_result = os.stat(long_dir_name)
+        except (FileNotFoundError, NotADirectoryError):
+            dir_stat_result = None
+        except OSError as error:
+            raise ToolError(str(error)) from error
+
+        if dir_stat_result is not None:
+            # If the path is not a valid directory, raise an error
+            if not stat.S_ISDIR(dir_stat_result.st_mode):
+                raise ToolError("File name is not a valid path.")
+        elif self.create_dir:
+            # If the directory does not exist and create_dir is True, create it
+            try:
+                Path(long_dir_name).mkdir(parents=True, exist_ok=True)
+            except OSError as error:
+                raise ToolError(str(error)) from error
+        else:
+            # If the directory does not exist and create_dir is False, raise an error
+            raise ToolError("File cannot be written because directory does not exist.")
+
+    def _write_file(self, long_file_name: str, content: str) -> None:
+        """
+        Replace the whole content of a file, in place or atomically, and sync it
+        to disk according to the durability policy.
+
+        This is also the writer of the contents flushed from the write buffer.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        content : str
+            The content to write.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If the file cannot be written.
+        """
+
+        sync = self.fsync != "none"
+        if self.atomic:
+            with _atomic_open(long_file_name, sync) as fd:
+                fd.write(content)
+        else:
             with open(long_file_name, mode='w', encoding='utf-8') as fd:
                 fd.write(content)
+                tool_metrics.count("bytes_written", len(content.encode('utf-8', errors='replace')))
+                if sync:
+                    fd.flush()
+                    os.fsync(fd.fileno())
+        if self.fsync == "file+dir":
+            _fsync_dir(os.path.dirname(long_file_name))
+
+    def _write_backend(self, file_name: str, path: str, content: str, mode: str, search: str | None,
+                       start_line: int | None, end_line: int | None) -> str:
+        """
+        Write the provided content in a file of the backend.
+
+        The file is read, edited in memory according to the mode and written back
+        whole, in the encoding it was read in.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        path : str
+            The normalized path of the file in the backend.
+        content : str
+            The content to be written to the file.
+        mode : str
+            The write mode: "write", "append", "replace" or "lines".
+        search : str | None
+            The text to replace, in the "replace" mode.
+        start_line : int | None
+            The number of the first line to replace, in the "lines" mode.
+        end_line : int | None
+            The number of the last line to replace, in the "lines" mode.
+
+        Returns
+        -------
+        str
+            A confirmation of the write, with the write mode.
+
+        Raises
+        ------
+        ToolError
+            If the file does not exist or cannot be written.
+            If the file is binary or not valid in its encoding, or the content cannot be encoded in it.
+            If the search text or the lines are not found.
+        """
+
+        try:
+            entry = self._check_backend(path, mode)
+
+            # Keep the content in the write buffer, if any
+            if self.write_buffer is not None and mode == "write":
+                self.write_buffer.put(path, content, self._write_backend_file)
+                return f"Content written to file '{file_name}' (buffered write)."
+            if self.write_buffer is not None and mode == "append" and self.write_buffer.append(path, content):
+                return f"Content appended to file '{file_name}' (buffered write)."
+
+            if mode == "write":
+                self._write_backend_file(path, content)
+                return f"Content written to file '{file_name}' (backend write)."
+            return self._edit_backend(file_name, path, entry, content, mode, search, start_line, end_line)
+        except UnicodeDecodeError as error:
+            raise ToolError(f"File is not valid {error.encoding} text, so it cannot be edited without corrupting it.") from error
+        except UnicodeEncodeError as error:
+            raise ToolError(f"Content cannot be encoded in {error.encoding}, the encoding of the file.") from error
         except OSError as error:
             raise ToolError(str(error)) from error
+
+    def _edit_backend(self, file_name: str, path: str, entry: IndexEntry | None, content: str, mode: str, search: str | None,
+                      start_line: int | None, end_line: int | None) -> str:
+        """
+        Edit a file of the backend in the "append", "replace" or "lines" mode, in
+        memory with the same streams as on the local disk, and write it back whole.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file, as given by the LLM.
+        path : str
+            The normalized path of the file in the backend.
+        entry : IndexEntry | None
+            The status of the file in the backend, or None if the file is new.
+        content : str
+            The content to be written to the file.
+        mode : str
+            The write mode: "append", "replace" or "lines".
+        search : str | None
+            The text to replace, in the "replace" mode.
+        start_line : int | None
+            The number of the first line to replace, in the "lines" mode.
+        end_line : int | None
+            The number of the last line to replace, in the "lines" mode.
+
+        Returns
+        -------
+        str
+            A confirmation of the edit.
+
+        Raises
+        ------
+        ToolError
+            If the file is binary, or the search text or the lines are not found.
+        OSError
+            If the file cannot be read or written.
+        UnicodeError
+            If the file is not valid in its encoding, or the content cannot be encoded in it.
+        """
+
+        # An existing file is edited in its own encoding, detected like FileReadTool does
+        encoding = 'utf-8'
+        data = b""
+        if entry is not None:
+            data = self.backend.read_bytes(path)
+            tool_metrics.count("bytes_read", len(data))
+            encoding = text_encoding.sniff_encoding(data[:text_encoding.SNIFF_SIZE], len(data) > text_encoding.SNIFF_SIZE)
+            if encoding is None:
+                raise ToolError("File is binary and cannot be edited as text.")
+        source = io.StringIO(data.decode(encoding), newline='')
+        output = io.StringIO(newline='')
+        if mode in ("replace", "lines"):
+            result = _edit_stream(file_name, source, output, content, mode, search, start_line, end_line)
+        else:
+            output.write(source.read())
+            output.write(content)
+            result = f"Content appended to file '{file_name}'"
+        self._write_backend_file(path, output.getvalue(), encoding)
+        return f"{result} (backend write)."
+
+    def _check_backend(self, path: str, mode: str) -> IndexEntry | None:
+        """
+        Check that a file of the backend can be written in a mode, creating its directory if needed.
+
+        A file with a pending content in the write buffer exists. Its pending
+        content is written first when the file is edited, since an edited file is
+        read from the backend.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the file in the backend.
+        mode : str
+            The write mode: "write", "append", "replace" or "lines".
+
+        Returns
+        -------
+        IndexEntry | None
+            The status of the file in the backend, or None if the file is new or pending.
+
+        Raises
+        ------
+        ToolError
+            If the file is not a valid path, exists without 'force' in the "write" mode,
+            or does not exist in an edit mode.
+            If the directory does not exist and may not be created.
+        OSError
+            If the status of the file cannot be read, or the directory cannot be created.
+        """
+
+        # Check if the file has a pending content in the write buffer, which is then the file
+        pending = self.write_buffer is not None and self.write_buffer.get(path) is not None
+        if pending and mode in ("replace", "lines"):
+            # An edited file is read from the backend, so its pending content is written first
+            self.write_buffer.flush(path)
+            pending = False
+        entry = None if pending else self.backend.stat(path)
+
+        # Check if the file exists, its directory then existing too
+        if pending or entry is not None:
+            if not pending and not entry.is_file():
+                raise ToolError("File name is not a valid path.")
+            if mode == "write" and not self.force:
+                raise ToolError("File already exists but cannot be overwritten.")
+        elif mode in ("replace", "lines"):
+            raise ToolError("File does not exist.")
+        else:
+            long_dir_name = posixpath.dirname(path) or "."
+            dir_entry = self.backend.stat(long_dir_name)
+            if dir_entry is not None:
+                if not dir_entry.is_dir():
+                    raise ToolError("File name is not a valid path.")
+            elif self.create_dir:
+                self.backend.make_dirs(long_dir_name)
+            else:
+                raise ToolError("File cannot be written because directory does not exist.")
+
+        return entry
+
+    def _write_backend_file(self, path: str, content: str, encoding: str = 'utf-8') -> None:
+        """
+        Replace the whole content of a file of the backend.
+
+        This is also the writer of the contents flushed from the write buffer.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the file in the backend.
+        content : str
+            The content to write.
+        encoding : str
+            The encoding of the file.
+            Defaults to 'utf-8'.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If the file cannot be written.
+        UnicodeEncodeError
+            If the content cannot be encoded in the encoding.
+        """
+
+        data = content.encode(encoding)
+        self.backend.write_bytes(path, data)
+        tool_metrics.count("bytes_written", len(data))
+
+    async def awrite_content(self,
+                             file_name: str,
+                             content: str,
+                             mode: str = "write",
+                             search: str | None = None,
+                             start_line: int | None = None,
+                             end_line: int | None = None) -> str:
+        """
+        Write the provided content in a file without blocking the event loop.
+
+        The write runs on the executor of the tool, see 'write_content' for the
+        arguments, the returned confirmation and the raised errors.
+
+        Returns
+        -------
+        str
+            The confirmation of the write.
+        """
+
+        return await self.executor.run(self.function_ref, file_name, content, mode, search, start_line, end_line)
+
+
+def _validate_lines(start_line: int | None, end_line: int | None) -> tuple[int, int]:
+    """
+    Validate the range of lines of the "lines" mode provided by the LLM.
+
+    Parameters
+    ----------
+    start_line : int | None
+        The number of the first line to replace, starting from 1.
+    end_line : int | None
+        The number of the last line to replace, or None for 'start_line'.
+
+    Returns
+    -------
+    tuple[int, int]
+        The numbers of the first and the last lines to replace.
+
+    Raises
+    ------
+    ToolError
+        If the range of lines is not valid.
+    """
+
+    if start_line is None:
+        raise ToolError("Start line was not provided.")
+    start_line = validate_int(start_line, "start_line", 1)
+    end_line = validate_int(end_line, "end_line")
+    if end_line is None:
+        end_line = start_line
+    if end_line < start_line - 1:
+        raise ToolError("End line must not be before start line - 1.")
+    return start_line, end_line
+
+
+def _edit_stream(file_name: str, source: TextIO, output: TextIO, content: str, mode: str, search: str | None,
+                 start_line: int | None, end_line: int | None) -> str:
+    """
+    Copy a file to an output in the "replace" or "lines" mode, see 'text_edit'.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the file, as given by the LLM.
+    source : TextIO
+        The file to read, opened without newline translation.
+    output : TextIO
+        The output to write to.
+    content : str
+        The replacement content.
+    mode : str
+        The write mode: "replace" or "lines".
+    search : str | None
+        The text to replace, in the "replace" mode.
+    start_line : int | None
+        The number of the first line to replace, in the "lines" mode.
+    end_line : int | None
+        The number of the last line to replace, in the "lines" mode.
+
+    Returns
+    -------
+    str
+        The beginning of the confirmation of the edit, without the write kind.
+
+    Raises
+    ------
+    ToolError
+        If the search text or the lines are not found.
+    """
+
+    if mode == "replace":
+        count = text_edit.stream_replace(source, output, search, content)
+        if count == 0:
+            raise ToolError("Search text was not found in the file.")
+        return f"Replaced {count} occurrence(s) in file '{file_name}'"
+    line_count = text_edit.stream_lines(source, output, start_line, end_line, content)
+    if start_line > line_count + 1:
+        raise ToolError(f"Line {start_line} is after the end of the file, which has {line_count} lines.")
+    if end_line < start_line:
+        return f"Inserted content before line {start_line} in file '{file_name}'"
+    return f"Replaced lines {start_line} to {end_line} in file '{file_name}'"
+
+
+def _file_encoding(long_file_name: str) -> str:
+    """
+    Detect the encoding of an existing file, as FileReadTool does, so an edit writes it back in the same encoding.
+
+    Parameters
+    ----------
+    long_file_name : str
+        The full path of the file.
+
+    Returns
+    -------
+    str
+        The encoding of the file.
+
+    Raises
+    ------
+    ToolError
+        If the file is binary.
+    OSError
+        If the file cannot be read.
+    """
+
+    with open(long_file_name, mode='rb') as fd:
+        head = fd.read(text_encoding.SNIFF_SIZE)
+        truncated = fd.read(1) != b""
+    tool_metrics.count("bytes_read", len(head))
+    encoding = text_encoding.sniff_encoding(head, truncated)
+    if encoding is None:
+        raise ToolError("File is binary and cannot be edited as text.")
+    return encoding
+
+
+@contextmanager
+def _atomic_open(long_file_name: str, sync: bool, newline: str | None = None, encoding: str = 'utf-8') -> Iterator[TextIO]:
+    """
+    Open a temporary file which atomically replaces a file when closed without error.
+
+    The temporary file is created in the directory of the file and gets the
+    permissions of the replaced file, or the default permissions of a new file.
+    If an error is raised while the temporary file is open, it is removed and
+    the file is left untouched.
+
+    Parameters
+    ----------
+    long_file_name : str
+        The full path of the file.
+    sync : bool
+        Whether the temporary file is synced to disk before replacing the file.
+    newline : str | None
+        The newline translation of the temporary file, see 'open'.
+        Defaults to None.
+    encoding : str
+        The encoding of the temporary file.
+        Defaults to 'utf-8'.
+
+    Yields
+    ------
+    TextIO
+        The temporary file, opened for writing.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be written.
+    """
+
+    long_dir_name, base_name = os.path.split(long_file_name)
+    temp_file_name = os.path.join(long_dir_name, f".{base_name}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(temp_file_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, mode='w', encoding=encoding, newline=newline) as temp_fd:
+            yield temp_fd
+            temp_fd.flush()
+            tool_metrics.count("bytes_written", temp_fd.buffer.tell())
+            if sync:
+                os.fsync(temp_fd.fileno())
+        tool_metrics.count("stat_calls")
+        try:
+            os.chmod(temp_file_name, os.stat(long_file_name).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_file_name, long_file_name)
+    except BaseException:
+        try:
+            os.remove(temp_file_name)
+        except OSError:
+            pass
+        raise
+
+
+def _fsync_dir(long_dir_name: str) -> None:
+    """
+    Sync a directory to disk, so the names of its files are durable.
+
+    Directories cannot be opened on Windows, where this function does nothing.
+
+    Parameters
+    ----------
+    long_dir_name : str
+        The full path of the directory.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    OSError
+        If the directory cannot be synced.
+    """
+
+    if os.name == "nt":
+        return
+    fd = os.open(long_dir_name, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
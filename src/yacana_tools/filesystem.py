@@ -0,0 +1,704 @@
+"""
+Filesystem Backends for Yacana
+
+This module provides the filesystems the tools can work on instead of the local disk:
+the local disk itself, an in-memory filesystem and a read-only zip or tar snapshot.
+The copy-on-write overlay of another filesystem is in the module 'overlay_filesystem'.
+"""
+
+# pylint: disable=C0301
+
+import abc
+import errno
+import io
+import lzma
+import os
+import posixpath
+import stat
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from typing import BinaryIO
+from yacana import ToolError
+from . import tool_metrics
+from .directory_index import IndexEntry
+from .path_resolver import PathResolver
+
+class FileSystem(abc.ABC):
+    """
+    The base class of the filesystem backends of the tools.
+
+    A backend is addressed with relative POSIX paths, normalized, '.' being the
+    root of the backend. The status of a path is returned as an 'IndexEntry', so
+    a backend listing is handled by the tools like a listing of the local disk.
+    Errors are raised as 'OSError', with the same subclasses as the 'os' module.
+    A backend is thread-safe and can be shared between several tools.
+    A backend implements all the abstract methods, so an incomplete backend
+    cannot be created.
+
+    Attributes
+    ----------
+    read_only : bool
+        Whether the backend rejects the writes.
+    """
+
+    read_only = False
+
+    def root(self, root_dir: str) -> str:
+        """
+        Validate the root directory of a tool in the backend.
+
+        Parameters
+        ----------
+        root_dir : str
+            The root directory, relative to the root of the backend.
+
+        Returns
+        -------
+        str
+            The normalized path of the root directory.
+
+        Raises
+        ------
+        ValueError
+            If the root directory is not a directory of the backend.
+        """
+
+        path = posixpath.normpath(str(root_dir).replace("\\", "/"))
+        if posixpath.isabs(path) or path == os.pardir or path.startswith(os.pardir + "/"):
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+        entry = self.stat(path)
+        if entry is None or not entry.is_dir():
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+        return path
+
+    def resolve(self, root_dir: str, name: str, label: str = "File") -> str:
+        """
+        Validate a relative path given by the LLM against the root directory of a tool.
+
+        Parameters
+        ----------
+        root_dir : str
+            The normalized path of the root directory, as returned by 'root'.
+        name : str
+            The relative path.
+        label : str
+            The kind of path, used in the error messages: "File" or "Directory".
+            Defaults to "File".
+
+        Returns
+        -------
+        str
+            The normalized path in the backend.
+
+        Raises
+        ------
+        ToolError
+            If the path is not provided, is not relative or is not in the root directory.
+        """
+
+        # Validate that the path is provided and relative
+        if not name:
+            raise ToolError(f"{label} name was not provided or None.")
+        name = str(name).replace("\\", "/")
+        if posixpath.isabs(name) or os.path.isabs(name):
+            raise ToolError(f"{label} name is not a relative path.")
+
+        # Validate that the normalized path is inside the root directory
+        path = posixpath.normpath(posixpath.join(root_dir, name))
+        if path == os.pardir or path.startswith(os.pardir + "/") or not (root_dir == "." or path == root_dir or path.startswith(root_dir + "/")):
+            raise ToolError(f"{label} name is not in root directory.")
+        return path
+
+    @abc.abstractmethod
+    def stat(self, path: str) -> IndexEntry | None:
+        """
+        Get the status of a path.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path.
+
+        Returns
+        -------
+        IndexEntry | None
+            The status of the path, or None if it does not exist.
+
+        Raises
+        ------
+        OSError
+            If the status cannot be read.
+        """
+
+    @abc.abstractmethod
+    def list_dir(self, path: str) -> list[IndexEntry]:
+        """
+        List the entries of a directory.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the directory.
+
+        Returns
+        -------
+        list[IndexEntry]
+            The entries of the directory, in no particular order.
+
+        Raises
+        ------
+        OSError
+            If the directory does not exist or cannot be listed.
+        """
+
+    @abc.abstractmethod
+    def read_bytes(self, path: str) -> bytes:
+        """
+        Read the content of a file.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the file.
+
+        Returns
+        -------
+        bytes
+            The content of the file.
+
+        Raises
+        ------
+        OSError
+            If the file does not exist or cannot be read.
+        """
+
+    def open(self, path: str) -> BinaryIO:
+        """
+        Open a file for reading, so it can be read by ranges.
+
+        The default implementation reads the whole file in memory, a backend
+        storing its files on disk streams them instead.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the file.
+
+        Returns
+        -------
+        BinaryIO
+            The file opened in binary mode, to close after use.
+
+        Raises
+        ------
+        OSError
+            If the file does not exist or cannot be read.
+        """
+
+        return io.BytesIO(self.read_bytes(path))
+
+    @abc.abstractmethod
+    def write_bytes(self, path: str, data: bytes) -> None:
+        """
+        Replace the content of a file, creating it if needed.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the file, whose directory must exist.
+        data : bytes
+            The content of the file.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If the file cannot be written, or if the backend is read-only.
+        """
+
+    @abc.abstractmethod
+    def make_dirs(self, path: str) -> None:
+        """
+        Create a directory and its missing parents.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the directory.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If the directory cannot be created, or if the backend is read-only.
+        """
+
+
+class LocalFileSystem(FileSystem):
+    """
+    The local disk, under a root directory.
+
+    Paths are validated like the paths given to the tools, so neither '..' nor a
+    symbolic link can escape the root directory. A file is written atomically,
+    through a temporary file which replaces it and gets its permissions.
+
+    Parameters
+    ----------
+    root_dir : str
+        The directory of the local disk which is the root of the backend.
+        Defaults to ".".
+
+    Attributes
+    ----------
+    root_dir : str
+        The full path of the root directory.
+    path_resolver : PathResolver
+        The validator of the paths.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+    """
+
+    def __init__(self, root_dir: str = "."):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+
+    def stat(self, path: str) -> IndexEntry | None:
+        tool_metrics.count("stat_calls")
+        try:
+            stat_result = os.stat(self.long_name(path))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return IndexEntry(posixpath.basename(path), stat_result.st_mode, stat_result.st_size, stat_result.st_mtime_ns)
+
+    def list_dir(self, path: str) -> list[IndexEntry]:
+        entries = []
+        with os.scandir(self.long_name(path)) as iterator:
+            for entry in iterator:
+                try:
+                    # Symbolic links are listed, but not followed
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError:
+                    # The entry was removed since the directory was listed
+                    continue
+                # The mode of the target of a symbolic link types it like 'os.DirEntry' does
+                target_mode = None
+                if stat.S_ISLNK(stat_result.st_mode):
+                    tool_metrics.count("stat_calls")
+                    try:
+                        target_mode = entry.stat().st_mode
+                    except OSError:
+                        target_mode = 0
+                entries.append(IndexEntry(entry.name, stat_result.st_mode, stat_result.st_size, stat_result.st_mtime_ns, target_mode))
+        tool_metrics.count("entries_scanned", len(entries))
+        return entries
+
+    def read_bytes(self, path: str) -> bytes:
+        with open(self.long_name(path), mode='rb') as fd:
+            return fd.read()
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self.long_name(path), mode='rb') # pylint: disable=R1732
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        # The file is replaced atomically, keeping its permissions
+        long_file_name = self.long_name(path)
+        long_dir_name, base_name = os.path.split(long_file_name)
+        temp_file_name = os.path.join(long_dir_name, f".{base_name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(temp_file_name, mode='xb') as fd:
+                fd.write(data)
+            try:
+                os.chmod(temp_file_name, os.stat(long_file_name).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_file_name, long_file_name)
+        except BaseException:
+            try:
+                os.remove(temp_file_name)
+            except OSError:
+                pass
+            raise
+
+    def make_dirs(self, path: str) -> None:
+        os.makedirs(self.long_name(path), exist_ok=True)
+
+    def long_name(self, path: str) -> str:
+        """
+        Build and validate the full path of a path of the backend.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path.
+
+        Returns
+        -------
+        str
+            The full path on the local disk.
+
+        Raises
+        ------
+        PermissionError
+            If the path is not in the root directory.
+        """
+
+        long_name = os.path.normpath(os.path.join(self.root_dir, path))
+        if not self.path_resolver.contains(long_name):
+            raise PermissionError(errno.EACCES, "Path is not in root directory", path)
+        return long_name
+
+
+class MemoryFileSystem(FileSystem):
+    """
+    An in-memory filesystem.
+
+    Files and directories only live in memory, so tests and ephemeral agents pay
+    no disk I/O. Each write gets a new modification time, strictly increasing,
+    so a changed file never has the status of its previous content.
+
+    Parameters
+    ----------
+    files : dict[str, str | bytes] | None
+        The initial files by relative path, a text being encoded as UTF-8. The
+        directories of the files are created.
+        Defaults to None, meaning an empty filesystem.
+
+    Raises
+    ------
+    ValueError
+        If a path of 'files' is not relative or leaves the root.
+    """
+
+    def __init__(self, files: dict[str, str | bytes] | None = None):
+
+        # Set all attributes
+        self._files: dict[str, tuple[bytes, int]] = {}
+        self._dirs: dict[str, int] = {".": time.time_ns()}
+        self._children: dict[str, set[str]] = {".": set()}
+        self._clock = self._dirs["."]
+        self._lock = threading.Lock()
+
+        # Validate and create the initial files
+        for name, content in (files or {}).items():
+            path = posixpath.normpath(str(name).replace("\\", "/"))
+            if posixpath.isabs(path) or path in (".", os.pardir) or path.startswith(os.pardir + "/"):
+                raise ValueError("Parameter 'files' expected relative file paths")
+            self.make_dirs(posixpath.dirname(path) or ".")
+            self.write_bytes(path, content.encode('utf-8') if isinstance(content, str) else bytes(content))
+
+    def stat(self, path: str) -> IndexEntry | None:
+        with self._lock:
+            return self._stat(path)
+
+    def list_dir(self, path: str) -> list[IndexEntry]:
+        with self._lock:
+            if path in self._files:
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            if path not in self._dirs:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            entries = [self._stat(posixpath.join(path, name) if path != "." else name) for name in self._children[path]]
+        tool_metrics.count("entries_scanned", len(entries))
+        return entries
+
+    def read_bytes(self, path: str) -> bytes:
+        with self._lock:
+            if path in self._dirs:
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+            if path not in self._files:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            return self._files[path][0]
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        parent = posixpath.dirname(path) or "."
+        with self._lock:
+            if path in self._dirs:
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+            if parent in self._files:
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            if parent not in self._dirs:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            mtime = self._tick()
+            if path not in self._files:
+                self._children[parent].add(posixpath.basename(path))
+                self._dirs[parent] = mtime
+            self._files[path] = (bytes(data), mtime)
+
+    def make_dirs(self, path: str) -> None:
+        with self._lock:
+            current = "."
+            for part in [] if path == "." else path.split("/"):
+                parent, current = current, part if current == "." else f"{current}/{part}"
+                if current in self._files:
+                    raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), current)
+                if current not in self._dirs:
+                    mtime = self._tick()
+                    self._dirs[current] = mtime
+                    self._children[current] = set()
+                    self._children[parent].add(part)
+                    self._dirs[parent] = mtime
+
+    def _stat(self, path: str) -> IndexEntry | None:
+        """
+        Get the status of a path, the lock being held.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path.
+
+        Returns
+        -------
+        IndexEntry | None
+            The status of the path, or None if it does not exist.
+        """
+
+        if path in self._files:
+            data, mtime = self._files[path]
+            return IndexEntry(posixpath.basename(path), stat.S_IFREG | 0o644, len(data), mtime)
+        if path in self._dirs:
+            return IndexEntry(posixpath.basename(path), stat.S_IFDIR | 0o755, 0, self._dirs[path])
+        return None
+
+    def _tick(self) -> int:
+        """
+        Get a new modification time, greater than all the previous ones, the lock being held.
+
+        Returns
+        -------
+        int
+            The modification time in nanoseconds.
+        """
+
+        self._clock = max(time.time_ns(), self._clock + 1)
+        return self._clock
+
+
+class ArchiveFileSystem(FileSystem):
+    """
+    A read-only snapshot of a tree, stored in a zip or a tar archive.
+
+    The members of the archive are indexed when the backend is created, and each
+    file is decompressed straight from the archive when it is read, so the archive
+    is never extracted. The directories which are not members of the archive are
+    derived from the paths of the files. Only regular files and directories are
+    served, symbolic links and special members are skipped.
+    A compressed tar archive ('.tar.gz', '.tar.xz', '.tar.bz2') is decompressed
+    from its beginning for each read, so a zip archive, whose members are
+    compressed separately, serves random reads faster.
+
+    Parameters
+    ----------
+    archive_file : str
+        The path of the zip or tar archive on the local disk.
+
+    Attributes
+    ----------
+    archive_file : str
+        The full path of the archive.
+
+    Raises
+    ------
+    ValueError
+        If the archive is not a valid zip or tar archive.
+    """
+
+    read_only = True
+
+    def __init__(self, archive_file: str):
+
+        # Validate that the parameter 'archive_file' is a zip or tar archive
+        archive_file = os.path.abspath(archive_file)
+        if not os.path.isfile(archive_file):
+            raise ValueError("Parameter 'archive_file' expected a valid file")
+        self.archive_file = archive_file
+        self._lock = threading.Lock()
+        self._zip = None
+        self._tar = None
+        try:
+            try:
+                if zipfile.is_zipfile(archive_file):
+                    self._zip = zipfile.ZipFile(archive_file) # pylint: disable=R1732
+                    members = [(info.filename, info, _zip_mode(info), info.file_size, _zip_mtime(info)) for info in self._zip.infolist()]
+                elif tarfile.is_tarfile(archive_file):
+                    self._tar = tarfile.open(archive_file, mode='r:*') # pylint: disable=R1732
+                    members = [(info.name, info, (stat.S_IFDIR if info.isdir() else stat.S_IFREG if info.isreg() else 0) | (info.mode & 0o7777),
+                                info.size, int(info.mtime * 1_000_000_000)) for info in self._tar.getmembers()]
+                else:
+                    raise ValueError("Parameter 'archive_file' expected a zip or tar archive")
+            except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error, lzma.LZMAError, OSError) as error:
+                raise ValueError(f"Parameter 'archive_file' expected a valid archive: {error}") from error
+            self._index(members, os.stat(archive_file).st_mtime_ns)
+        except BaseException:
+            # The archive is only kept open by a backend which was created
+            self.close()
+            raise
+
+    def _index(self, members: list[tuple[str, zipfile.ZipInfo | tarfile.TarInfo, int, int, int]], archive_mtime: int) -> None:
+        """
+        Index the files and the directories of the archive, a later member replacing an earlier one.
+
+        Parameters
+        ----------
+        members : list[tuple[str, zipfile.ZipInfo | tarfile.TarInfo, int, int, int]]
+            The name, the information, the mode, the size and the modification
+            time in nanoseconds of each member of the archive.
+        archive_mtime : int
+            The modification time of the archive in nanoseconds, given to the directories.
+
+        Returns
+        -------
+        None
+        """
+
+        self._entries: dict[str, tuple[IndexEntry, zipfile.ZipInfo | tarfile.TarInfo | None]] = {
+            ".": (IndexEntry(".", stat.S_IFDIR | 0o755, 0, archive_mtime), None)}
+        self._children: dict[str, set[str]] = {".": set()}
+        for name, info, mode, size, mtime in members:
+            path = posixpath.normpath(name.replace("\\", "/").lstrip("/"))
+            if path in (".", os.pardir) or path.startswith(os.pardir + "/") or not (stat.S_ISDIR(mode) or stat.S_ISREG(mode)):
+                continue
+            parent = self._add_dirs(posixpath.dirname(path) or ".", archive_mtime)
+            if stat.S_ISDIR(mode):
+                self._children.setdefault(path, set())
+                info, size = None, 0
+            self._entries[path] = (IndexEntry(posixpath.basename(path), mode, size, mtime), info)
+            self._children[parent].add(posixpath.basename(path))
+
+    def __enter__(self) -> "ArchiveFileSystem":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the archive.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+            if self._tar is not None:
+                self._tar.close()
+
+    def stat(self, path: str) -> IndexEntry | None:
+        entry = self._entries.get(path)
+        return None if entry is None else entry[0]
+
+    def list_dir(self, path: str) -> list[IndexEntry]:
+        if path not in self._entries:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        if path not in self._children:
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        entries = [self._entries[posixpath.join(path, name) if path != "." else name][0] for name in self._children[path]]
+        tool_metrics.count("entries_scanned", len(entries))
+        return entries
+
+    def read_bytes(self, path: str) -> bytes:
+        entry = self._entries.get(path)
+        if entry is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        if entry[1] is None:
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+        try:
+            # The archive file is shared, so its members are read one at a time
+            with self._lock:
+                if self._zip is not None:
+                    return self._zip.read(entry[1])
+                with self._tar.extractfile(entry[1]) as fd:
+                    return fd.read()
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error, lzma.LZMAError) as error:
+            raise OSError(errno.EIO, f"Archive member cannot be read: {error}", path) from error
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        raise OSError(errno.EROFS, os.strerror(errno.EROFS), path)
+
+    def make_dirs(self, path: str) -> None:
+        raise OSError(errno.EROFS, os.strerror(errno.EROFS), path)
+
+    def _add_dirs(self, path: str, mtime: int) -> str:
+        """
+        Index a directory and its parents, unless they are members of the archive.
+
+        Parameters
+        ----------
+        path : str
+            The normalized path of the directory.
+        mtime : int
+            The modification time of a derived directory.
+
+        Returns
+        -------
+        str
+            The path of the directory.
+        """
+
+        if path not in self._children:
+            parent = self._add_dirs(posixpath.dirname(path) or ".", mtime)
+            self._children[path] = set()
+            self._entries[path] = (IndexEntry(posixpath.basename(path), stat.S_IFDIR | 0o755, 0, mtime), None)
+            self._children[parent].add(posixpath.basename(path))
+        return path
+
+
+def _zip_mode(info: zipfile.ZipInfo) -> int:
+    """
+    Get the mode of a zip member, from its Unix attributes when recorded.
+
+    Parameters
+    ----------
+    info : zipfile.ZipInfo
+        The zip member.
+
+    Returns
+    -------
+    int
+        The mode of the member.
+    """
+
+    mode = info.external_attr >> 16
+    if stat.S_IFMT(mode) == 0:
+        mode |= stat.S_IFDIR if info.is_dir() else stat.S_IFREG
+    if mode & 0o7777 == 0:
+        mode |= 0o755 if info.is_dir() else 0o644
+    return mode
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> int:
+    """
+    Get the modification time of a zip member, recorded in local time.
+
+    Parameters
+    ----------
+    info : zipfile.ZipInfo
+        The zip member.
+
+    Returns
+    -------
+    int
+        The modification time in nanoseconds.
+    """
+
+    return int(time.mktime(info.date_time + (0, 0, -1)) * 1_000_000_000)
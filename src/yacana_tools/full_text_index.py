@@ -0,0 +1,399 @@
+"""
+Full Text Index for Yacana
+
+This module provides an SQLite FTS5 full-text index of the text files of a directory tree.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0902,R0913,R0917
+
+import multiprocessing
+import os
+import re
+import sqlite3
+import stat
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+_INDEX_FORMAT_VERSION = "1"
+# The default number of processes reading the files, above which the disk is the bottleneck
+_MAX_DEFAULT_WORKERS = 8
+_BINARY_SNIFF_SIZE = 8192
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(body, tokenize='unicode61 remove_diacritics 2');
+"""
+
+class FullTextIndex:
+    """
+    An SQLite FTS5 full-text index of the text files under a root directory.
+
+    This class stores the content of every readable text file under the root
+    directory in an SQLite FTS5 table, so keyword queries are answered with ranked
+    results and snippets in milliseconds, whatever the size of the tree.
+    The index is refreshed incrementally: only the files whose size or modification
+    time changed since the last refresh are read again. Files are read and decoded
+    by a pool of worker processes, and written to the database in large
+    transactions, so the initial build of a large tree scales with the cores.
+    Symbolic links are never followed, binary files and files over 'max_file_size'
+    are recorded but not indexed.
+    The index is thread-safe.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path to index.
+        Defaults to ".".
+    index_file : str | None
+        The path of the SQLite database where the index is stored. None means an in-memory database.
+        Defaults to None.
+    max_file_size : int
+        The maximum size in bytes of an indexed file.
+        Defaults to 1 MiB.
+    batch_size : int
+        The number of files written to the database in a single transaction.
+        Defaults to 1000.
+    max_workers : int | None
+        The number of processes reading the files. 1 means the files are read in
+        the current process. None means the number of CPUs, at most 8. The processes
+        are started with 'forkserver' where available, 'spawn' otherwise, so they
+        are never forked from the threads of the caller.
+        Defaults to None.
+    refresh_interval : float
+        The number of seconds during which the index is considered up to date
+        after a refresh. 0 means the index is refreshed before every query.
+        Defaults to 60.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path to index.
+    index_file : str | None
+        The path of the SQLite database where the index is stored.
+    max_file_size : int
+        The maximum size in bytes of an indexed file.
+    batch_size : int
+        The number of files written to the database in a single transaction.
+    max_workers : int
+        The number of processes reading the files.
+    refresh_interval : float
+        The number of seconds during which the index is considered up to date after a refresh.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_file_size', 'batch_size' or 'max_workers' is not a positive integer.
+        If 'refresh_interval' is negative.
+        If SQLite is built without the FTS5 extension.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 index_file: str | None = None,
+                 max_file_size: int = 1024 * 1024,
+                 batch_size: int = 1000,
+                 max_workers: int | None = None,
+                 refresh_interval: float = 60):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        root_dir = os.path.normpath(root_dir)
+        root_dir = os.path.abspath(root_dir)
+
+        if not os.path.isdir(root_dir):
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+
+        # Validate the limits
+        if max_workers is None:
+            max_workers = min(os.cpu_count() or 1, _MAX_DEFAULT_WORKERS)
+        for name, value in (("max_file_size", max_file_size), ("batch_size", batch_size), ("max_workers", max_workers)):
+            if value < 1:
+                raise ValueError(f"Parameter '{name}' expected a positive integer")
+        if refresh_interval < 0:
+            raise ValueError("Parameter 'refresh_interval' expected a non-negative number")
+
+        # Set all attributes
+        self.root_dir = root_dir
+        self.index_file = index_file
+        self.max_file_size = max_file_size
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh: float | None = None
+        self._connection = self._open()
+
+    def __enter__(self) -> 'FullTextIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the database.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date with the filesystem.
+
+        Only the files which are new or whose size or modification time changed are read.
+
+        Parameters
+        ----------
+        force : bool
+            Whether to refresh even if the index is considered up to date.
+            Defaults to False.
+
+        Returns
+        -------
+        int
+            The number of files added, updated or removed.
+        """
+
+        with self._refresh_lock:
+            if not force and self._last_refresh is not None and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return 0
+
+            with self._lock:
+                known = {path: (file_id, size, mtime_ns) for file_id, path, size, mtime_ns in self._connection.execute("SELECT id, path, size, mtime_ns FROM files")}
+
+            # List the files which are new or changed, and those which were removed
+            changed = []
+            for rel_path, size, mtime_ns in self._walk():
+                fields = known.pop(rel_path, None)
+                if fields is None or fields[1] != size or fields[2] != mtime_ns:
+                    changed.append((rel_path, size, mtime_ns, fields[0] if fields is not None else None))
+            removed = [fields[0] for fields in known.values()]
+
+            for start in range(0, len(removed), self.batch_size):
+                batch = [(file_id,) for file_id in removed[start:start + self.batch_size]]
+                with self._lock, self._connection:
+                    self._connection.executemany("DELETE FROM documents WHERE rowid = ?", batch)
+                    self._connection.executemany("DELETE FROM files WHERE id = ?", batch)
+
+            self._ingest(changed)
+
+            # Merge the index segments after a large update, so the queries stay fast
+            if len(changed) + len(removed) > self.batch_size:
+                with self._lock, self._connection:
+                    self._connection.execute("INSERT INTO documents(documents) VALUES('optimize')")
+
+            self._last_refresh = time.monotonic()
+            return len(changed) + len(removed)
+
+    def query(self, keywords: str, rel_dir: str = "", limit: int = 20, match_all: bool = True) -> list[tuple[str, str]]:
+        """
+        Search keywords in the index, refreshing it if needed.
+
+        Parameters
+        ----------
+        keywords : str
+            The keywords to search. Punctuation is ignored.
+        rel_dir : str
+            The path of the directory where to search, relative to the root directory.
+            Defaults to "", meaning the root directory.
+        limit : int
+            The maximum number of results.
+            Defaults to 20.
+        match_all : bool
+            Whether a result must hold all keywords, or any of them.
+            Defaults to True.
+
+        Returns
+        -------
+        list[tuple[str, str]]
+            The relative path and a snippet of each matching file, the best match first.
+        """
+
+        terms = re.findall(r"\w+", keywords)
+        if not terms:
+            return []
+        match = (" AND " if match_all else " OR ").join('"' + term.replace('"', '""') + '"' for term in terms)
+
+        self.refresh()
+        rel_dir = os.path.normpath(rel_dir)
+        prefix = "" if rel_dir == "." else rel_dir + os.sep
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT files.path, snippet(documents, 0, '[', ']', '...', 16) FROM documents"
+                " JOIN files ON files.id = documents.rowid"
+                " WHERE documents MATCH ? AND substr(files.path, 1, ?) = ?"
+                " ORDER BY bm25(documents) LIMIT ?",
+                (match, len(prefix), prefix, limit)).fetchall()
+        return [(path, " ".join(snippet.split())) for path, snippet in rows]
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Open the database, creating its schema, and reset it if it indexes another directory.
+
+        Returns
+        -------
+        sqlite3.Connection
+            The connection to the database.
+
+        Raises
+        ------
+        ValueError
+            If SQLite is built without the FTS5 extension.
+        """
+
+        connection = sqlite3.connect(self.index_file or ":memory:", check_same_thread=False)
+
+        # Validate that SQLite has the FTS5 extension, before the database is changed
+        try:
+            connection.execute("SELECT fts5(?1)", (None,)).close()
+        except sqlite3.OperationalError as error:
+            connection.close()
+            raise ValueError("SQLite is built without the FTS5 extension required by the full-text index") from error
+
+        if self.index_file is not None:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            connection.executescript(_SCHEMA)
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            expected = {"version": _INDEX_FORMAT_VERSION, "root_dir": self.root_dir, "max_file_size": str(self.max_file_size)}
+            if meta != expected:
+                connection.execute("DELETE FROM documents")
+                connection.execute("DELETE FROM files")
+                connection.execute("DELETE FROM meta")
+                connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+        return connection
+
+    def _walk(self) -> Iterator[tuple[str, int, int]]:
+        """
+        Iterate over the regular files under the root directory.
+
+        Yields
+        ------
+        tuple[str, int, int]
+            The relative path, the size and the modification time of each file.
+        """
+
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            try:
+                with os.scandir(os.path.join(self.root_dir, rel_dir)) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(stat_result.st_mode):
+                    pending.append(rel_path)
+                elif stat.S_ISREG(stat_result.st_mode):
+                    yield rel_path, stat_result.st_size, stat_result.st_mtime_ns
+
+    def _ingest(self, changed: list[tuple[str, int, int, int | None]]) -> None:
+        """
+        Read the new and changed files and write them to the database, batch by batch.
+
+        Parameters
+        ----------
+        changed : list[tuple[str, int, int, int | None]]
+            The relative path, size, modification time and previous identifier of each file.
+
+        Returns
+        -------
+        None
+        """
+
+        if not changed:
+            return
+
+        # Worker processes only pay off when there are enough files to read, and are not forked from the threads of the caller
+        executor = None
+        if self.max_workers > 1 and len(changed) > self.batch_size:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(method))
+        try:
+            # Submit a few batches at a time, so the read contents never pile up in memory
+            step = self.batch_size * (self.max_workers if executor is not None else 1)
+            for start in range(0, len(changed), step):
+                chunk = changed[start:start + step]
+                jobs = [(os.path.join(self.root_dir, rel_path), size, self.max_file_size) for rel_path, size, _, _ in chunk]
+                if executor is not None:
+                    bodies = list(executor.map(_read_document, jobs, chunksize=max(1, len(jobs) // (4 * self.max_workers))))
+                else:
+                    bodies = [_read_document(job) for job in jobs]
+                for batch_start in range(0, len(chunk), self.batch_size):
+                    self._write_batch(chunk[batch_start:batch_start + self.batch_size], bodies[batch_start:batch_start + self.batch_size])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _write_batch(self, batch: list[tuple[str, int, int, int | None]], bodies: list[str | None]) -> None:
+        """
+        Write a batch of files to the database in a single transaction.
+
+        Parameters
+        ----------
+        batch : list[tuple[str, int, int, int | None]]
+            The relative path, size, modification time and previous identifier of each file.
+        bodies : list[str | None]
+            The content of each file, or None if the file is not indexed.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock, self._connection:
+            for (rel_path, size, mtime_ns, file_id), body in zip(batch, bodies):
+                if file_id is not None:
+                    self._connection.execute("DELETE FROM documents WHERE rowid = ?", (file_id,))
+                    self._connection.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (size, mtime_ns, file_id))
+                else:
+                    file_id = self._connection.execute("INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)", (rel_path, size, mtime_ns)).lastrowid
+                if body is not None:
+                    self._connection.execute("INSERT INTO documents (rowid, body) VALUES (?, ?)", (file_id, body))
+
+
+def _read_document(job: tuple[str, int, int]) -> str | None:
+    """
+    Read the content of a file to index, in a worker process.
+
+    Parameters
+    ----------
+    job : tuple[str, int, int]
+        The full path of the file, its size and the maximum size of an indexed file.
+
+    Returns
+    -------
+    str | None
+        The decoded content of the file, or None if the file is binary, too large or cannot be read.
+    """
+
+    long_file_name, size, max_file_size = job
+    if size > max_file_size:
+        return None
+    try:
+        with open(long_file_name, mode='rb') as fd:
+            data = fd.read(max_file_size + 1)
+    except OSError:
+        return None
+    if len(data) > max_file_size or b"\0" in data[:_BINARY_SNIFF_SIZE]:
+        return None
+    return data.decode("utf-8", errors="replace")
@@ -0,0 +1,174 @@
+"""
+Full Text Search Tool for Yacana
+
+This module provides a tool for a ranked keyword search in the files of the local filesystem.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0913,R0917
+
+import os
+from yacana import Tool, ToolError, ToolType
+from .full_text_index import FullTextIndex
+from .path_resolver import PathResolver
+from .tool_metrics import ToolMetrics
+from .validation import validate_bool
+
+class FullTextSearchTool(Tool):
+    """
+    A tool for a ranked keyword search in the files of the local filesystem.
+
+    This class provides functionality to search keywords in all text files under a
+    directory and return the best matching files with a snippet of their content.
+    The search is answered by a full-text index, refreshed incrementally, so it stays
+    fast on trees of millions of files. It ensures that the provided path is valid
+    and that the directory exists before attempting to search it.
+    This class is based to Tool class.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    index : FullTextIndex | None
+        The full-text index of the directory tree, possibly shared with other tools.
+        Its root directory must hold the root directory of the tool. None means an
+        in-memory index of the root directory, built on the first search.
+        Defaults to None.
+    max_results : int
+        The maximum number of files returned by a search.
+        Defaults to 20.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls, possibly shared with other tools.
+        None means no instrumentation.
+        Defaults to None.
+    optional : bool
+        Whether the tool is optional.
+        Defaults to False.
+    max_custom_error : int
+        Maximum number of custom errors allowed.
+        Defaults to 5.
+    max_call_error : int
+        Maximum number of call errors allowed.
+        Defaults to 5.
+    tool_type : ToolType
+        Type of tool (e.g., YACANA, OPENAI).
+        Defaults to YACANA.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path from where the files are searched.
+        Defaults to ".".
+    path_resolver : PathResolver
+        The validator of the directory paths.
+    index : FullTextIndex
+        The full-text index of the directory tree.
+    max_results : int
+        The maximum number of files returned by a search.
+        Defaults to 20.
+    metrics : ToolMetrics | None
+        The instrumentation of the tool calls.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If the root directory is not under the root directory of the index.
+        If 'max_results' is not a positive integer.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 index: FullTextIndex | None = None,
+                 max_results: int = 20,
+                 metrics: ToolMetrics | None = None,
+                 optional: bool = False,
+                 max_custom_error: int = 5,
+                 max_call_error: int = 5,
+                 tool_type: ToolType = ToolType.YACANA):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        path_resolver = PathResolver(root_dir)
+
+        # Validate that the root directory is covered by the index
+        if index is None:
+            index = FullTextIndex(path_resolver.root_dir)
+        index_prefix = os.path.relpath(path_resolver.root_dir, index.root_dir)
+        if index_prefix == os.pardir or index_prefix.startswith(os.pardir + os.sep):
+            raise ValueError("Parameter 'index' expected an index of a directory holding 'root_dir'")
+
+        # Validate that the parameter 'max_results' is a positive integer
+        if max_results < 1:
+            raise ValueError("Parameter 'max_results' expected a positive integer")
+
+        # Set all attributes
+        self.root_dir = path_resolver.root_dir
+        self.path_resolver = path_resolver
+        self.index = index
+        self.max_results = max_results
+        self.metrics = metrics
+
+        # Call the parent class constructor to initialize the tool
+        super().__init__(
+            tool_name="FullTextSearch",
+            function_description="Search keywords in all text files under a directory in the local filesystem and return the best matching files with a snippet of their content.",
+            function_ref=self.search_keywords if metrics is None else metrics.instrument("FullTextSearch", self.search_keywords),
+            optional=optional,
+            max_custom_error=max_custom_error,
+            max_call_error=max_call_error,
+            tool_type=tool_type
+        )
+
+    def search_keywords(self, keywords: str, dir_name: str = ".", match_all: bool = True) -> str:
+        """
+        Search keywords in all text files under a directory.
+
+        Each matching file is returned as '* file: snippet', the best match first,
+        the file path being relative to the root directory and the keywords being
+        enclosed in '[' and ']' in the snippet.
+
+        Note: this function is expected to be called the LLM.
+
+        Parameters
+        ----------
+        keywords : str
+            The keywords to search, separated by spaces.
+        dir_name : str
+            The name of the directory where to search.
+            Note: the path of this directory MUST be relative.
+        match_all : bool
+            Whether a file must hold all keywords, or any of them.
+            Defaults to True.
+
+        Returns
+        -------
+        str
+            The matching files with a snippet, or a message if nothing matches.
+
+        Raises
+        ------
+        ToolError
+            If the keywords are not provided.
+            If the directory name is not provided or is invalid.
+            If the directory does not exist.
+        """
+
+        # Validate that the keywords are provided
+        if not keywords or not keywords.strip():
+            raise ToolError("Keywords were not provided or are empty.")
+        match_all = validate_bool(match_all)
+
+        # Validate that the path of the directory is provided, relative and inside the root directory path
+        resolved = self.path_resolver.resolve(dir_name, "Directory")
+
+        # Validate that the directory exists
+        if not resolved.is_dir():
+            raise ToolError("Directory does not exist.")
+
+        results = self.index.query(keywords, os.path.relpath(resolved.long_name, self.index.root_dir), self.max_results, match_all)
+        if not results:
+            return "No match found."
+
+        return "\n".join(f"* {os.path.relpath(os.path.join(self.index.root_dir, path), self.root_dir)}: {snippet}" for path, snippet in results)
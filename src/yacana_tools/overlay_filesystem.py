@@ -0,0 +1,347 @@
+"""
+Copy-on-write Filesystem Overlay for Yacana
+
+This module provides a copy-on-write overlay of another filesystem, so the writes
+of an agent can be reviewed before they are committed to it in one batch.
+"""
+
+# pylint: disable=C0301
+
+import errno
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import BinaryIO
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from .directory_index import IndexEntry
+from .filesystem import FileSystem, LocalFileSystem, MemoryFileSystem
+
+# The ioctl cloning a file on Linux filesystems with copy-on-write extents (Btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+class OverlayFileSystem(FileSystem):
+    """
+    A copy-on-write overlay of a filesystem.
+
+    The writes land in a scratch upper layer, while the lower filesystem is left
+    untouched, and the reads and listings see the merged view, the upper layer
+    hiding the lower one. A file of the lower layer is only copied when it is
+    written. The writes of a run are then committed to the lower filesystem in one
+    batch, or thrown away by switching to a fresh upper layer.
+    The upper layer lives in memory, or in a scratch directory on the local disk
+    for large writes. When both the scratch directory and the lower filesystem are
+    on the local disk, a committed file is moved with a rename when they share a
+    device, or else cloned with a reflink or 'copy_file_range' where the
+    filesystem supports them, so its content is not copied through user space.
+    Files cannot be deleted through the tools, so no deletion is recorded.
+
+    Parameters
+    ----------
+    lower : FileSystem
+        The filesystem seen through the overlay, e.g. a LocalFileSystem of the
+        workspace of an agent or a read-only ArchiveFileSystem.
+    scratch_dir : str | None
+        The local directory where the upper layers are created, ideally on the
+        same device as the lower filesystem but outside of it. None means
+        in-memory upper layers.
+        Defaults to None.
+
+    Attributes
+    ----------
+    lower : FileSystem
+        The filesystem seen through the overlay.
+    upper : FileSystem
+        The current upper layer, holding the writes since the last commit or discard.
+    scratch_dir : str | None
+        The local directory where the upper layers are created.
+
+    Raises
+    ------
+    ValueError
+        If 'scratch_dir' is not a valid directory.
+    """
+
+    def __init__(self, lower: FileSystem, scratch_dir: str | None = None):
+
+        # Validate that the parameter 'scratch_dir' is a valid directory
+        if scratch_dir is not None:
+            scratch_dir = os.path.abspath(scratch_dir)
+            if not os.path.isdir(scratch_dir):
+                raise ValueError("Parameter 'scratch_dir' expected a valid directory")
+
+        # Set all attributes
+        self.lower = lower
+        self.scratch_dir = scratch_dir
+        self._lock = threading.RLock()
+        self.upper = self._new_upper()
+        # Paths of the directories and of the files written in the upper layer, in the order of the writes
+        self._dirs: dict[str, None] = {}
+        self._files: dict[str, None] = {}
+
+    def stat(self, path: str) -> IndexEntry | None:
+        with self._lock:
+            entry = self.upper.stat(path)
+            return entry if entry is not None else self.lower.stat(path)
+
+    def list_dir(self, path: str) -> list[IndexEntry]:
+        with self._lock:
+            entries = {}
+            found = False
+            # The entries of the upper layer hide the ones of the lower layer with the same name
+            for layer in (self.lower, self.upper):
+                try:
+                    listed = layer.list_dir(path)
+                except FileNotFoundError:
+                    continue
+                found = True
+                entries.update((entry.name, entry) for entry in listed)
+            if not found:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            return list(entries.values())
+
+    def read_bytes(self, path: str) -> bytes:
+        with self._lock:
+            if path in self._files:
+                return self.upper.read_bytes(path)
+        return self.lower.read_bytes(path)
+
+    def open(self, path: str) -> BinaryIO:
+        with self._lock:
+            if path in self._files:
+                return self.upper.open(path)
+        return self.lower.open(path)
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        parent = posixpath.dirname(path) or "."
+        with self._lock:
+            # The directory must exist in the merged view, it is then created in the upper layer
+            entry = self.stat(parent)
+            if entry is None:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            if not entry.is_dir():
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            entry = self.stat(path)
+            if entry is not None and entry.is_dir():
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+            self.upper.make_dirs(parent)
+            self.upper.write_bytes(path, data)
+            self._files[path] = None
+
+    def make_dirs(self, path: str) -> None:
+        with self._lock:
+            # A file of the merged view cannot be hidden by a directory
+            parts = [] if path == "." else path.split("/")
+            for index in range(1, len(parts) + 1):
+                current = "/".join(parts[:index])
+                entry = self.stat(current)
+                if entry is not None and not entry.is_dir():
+                    raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), current)
+                if entry is None:
+                    self._dirs[current] = None
+            self.upper.make_dirs(path)
+
+    def changed_files(self) -> list[str]:
+        """
+        Get the files written since the last commit or discard.
+
+        Returns
+        -------
+        list[str]
+            The paths of the files, in the order of their first write.
+        """
+
+        with self._lock:
+            return list(self._files)
+
+    def commit(self) -> int:
+        """
+        Apply the writes of the upper layer to the lower filesystem in one batch, then start a fresh upper layer.
+
+        The new directories are created first, then each file replaces its
+        lower version atomically, keeping the permissions of the replaced file.
+
+        Returns
+        -------
+        int
+            The number of files committed.
+
+        Raises
+        ------
+        OSError
+            If the lower filesystem is read-only, or if a file cannot be committed.
+            The files committed before the error are kept, the others stay in
+            the upper layer.
+        """
+
+        with self._lock:
+            if self.lower.read_only and (self._dirs or self._files):
+                raise OSError(errno.EROFS, os.strerror(errno.EROFS), ".")
+            local = isinstance(self.lower, LocalFileSystem) and isinstance(self.upper, LocalFileSystem)
+            for path in list(self._dirs):
+                self.lower.make_dirs(path)
+                del self._dirs[path]
+            count = 0
+            for path in list(self._files):
+                if local:
+                    _commit_local_file(self.upper.long_name(path), self.lower.long_name(path))
+                else:
+                    self.lower.write_bytes(path, self.upper.read_bytes(path))
+                del self._files[path]
+                count += 1
+            self._reset()
+            return count
+
+    def discard(self) -> None:
+        """
+        Throw away the writes of the upper layer by starting a fresh one.
+
+        The switch does not depend on the number of writes. The scratch directory
+        of a discarded upper layer is removed in the background.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        """
+        Start a fresh upper layer, removing the previous one, the lock being held.
+
+        Returns
+        -------
+        None
+        """
+
+        previous = self.upper
+        self.upper = self._new_upper()
+        self._dirs = {}
+        self._files = {}
+        if isinstance(previous, LocalFileSystem):
+            threading.Thread(target=shutil.rmtree, args=(previous.root_dir, True), name="yacana_tools_overlay", daemon=True).start()
+
+    def _new_upper(self) -> FileSystem:
+        """
+        Create an empty upper layer.
+
+        Returns
+        -------
+        FileSystem
+            An in-memory filesystem, or a filesystem in a new directory of the scratch directory.
+        """
+
+        if self.scratch_dir is None:
+            return MemoryFileSystem()
+        return LocalFileSystem(tempfile.mkdtemp(prefix=".overlay-", dir=self.scratch_dir))
+
+
+def _commit_local_file(source_name: str, target_name: str) -> None:
+    """
+    Move a file of the local disk over another one atomically, without copying its content when possible.
+
+    The file is renamed when both paths are on the same device. Otherwise it is
+    cloned next to the target, with a reflink, else 'copy_file_range', else a
+    plain copy, and the clone replaces the target.
+
+    Parameters
+    ----------
+    source_name : str
+        The full path of the file to move.
+    target_name : str
+        The full path of the file to replace.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    OSError
+        If the file cannot be moved.
+    """
+
+    # Keep the permissions of the replaced file
+    try:
+        os.chmod(source_name, os.stat(target_name).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+    try:
+        os.replace(source_name, target_name)
+        return
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+
+    long_dir_name, base_name = os.path.split(target_name)
+    temp_file_name = os.path.join(long_dir_name, f".{base_name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(source_name, mode='rb') as source, open(temp_file_name, mode='xb') as target:
+            _clone_file(source, target)
+        shutil.copymode(source_name, temp_file_name)
+        os.replace(temp_file_name, target_name)
+    except BaseException:
+        try:
+            os.remove(temp_file_name)
+        except OSError:
+            pass
+        raise
+
+
+def _clone_file(source, target) -> None:
+    """
+    Copy the content of a file to an empty file, sharing its extents when the filesystem supports it.
+
+    Parameters
+    ----------
+    source : BinaryIO
+        The file to copy, opened for reading.
+    target : BinaryIO
+        The empty file, opened for writing.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    OSError
+        If the file cannot be copied.
+    """
+
+    # A reflink shares the extents of the file, so nothing is copied until one of them is modified
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            return
+        except OSError:
+            pass
+
+    # 'copy_file_range' copies in the kernel, or on the server for network filesystems
+    size = os.fstat(source.fileno()).st_size
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                length = os.copy_file_range(source.fileno(), target.fileno(), size - copied)
+                if length == 0:
+                    break
+                copied += length
+            if copied == size:
+                return
+        except OSError as error:
+            if error.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+        # Start again from the beginning, since copy_file_range moved the offsets
+        source.seek(0)
+        target.seek(0)
+        target.truncate()
+
+    shutil.copyfileobj(source, target)
@@ -0,0 +1,255 @@
+"""
+Path Resolver for Yacana
+
+This module provides the validation of the paths given by the LLM, shared by all tools.
+"""
+
+# pylint: disable=C0301
+
+import os
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+from yacana import ToolError
+from . import tool_metrics
+
+class ResolvedPath(NamedTuple):
+    """
+    A path given by the LLM, validated against the root directory.
+
+    The status is the one of the target of the path, symbolic links being
+    followed, or None if the path does not exist.
+    """
+
+    name: str
+    long_name: str
+    stat_result: os.stat_result | None
+
+    def exists(self) -> bool:
+        """
+        Return True if the path exists.
+        """
+
+        return self.stat_result is not None
+
+    def is_file(self) -> bool:
+        """
+        Return True if the path is a regular file.
+        """
+
+        return self.stat_result is not None and stat.S_ISREG(self.stat_result.st_mode)
+
+    def is_dir(self) -> bool:
+        """
+        Return True if the path is a directory.
+        """
+
+        return self.stat_result is not None and stat.S_ISDIR(self.stat_result.st_mode)
+
+class PathResolver:
+    """
+    A validator of the relative paths given by the LLM.
+
+    This class checks that a path is provided, is relative and stays inside the
+    root directory, both lexically and once symbolic links are resolved, so
+    neither '..' nor a symbolic link can escape the root directory. A path is then
+    checked with a single 'os.stat', whose result is returned for reuse.
+    The lexically normalized full paths are kept in an LRU cache, so validating a
+    hot path again skips the normalization. The symbolic links are resolved again
+    on every validation, so a directory replaced by a symbolic link leaving the
+    root directory after its path was cached is still rejected.
+    The resolver is thread-safe.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path where the paths are resolved.
+        Defaults to ".".
+    cache_size : int
+        The maximum number of normalized paths kept in cache. 0 disables the cache.
+        Defaults to 1024.
+
+    Attributes
+    ----------
+    root_dir : str
+        The normalized absolute root directory path.
+    cache_size : int
+        The maximum number of normalized paths kept in cache.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'cache_size' is negative.
+    """
+
+    def __init__(self, root_dir: str = ".", cache_size: int = 1024):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        root_dir = os.path.normpath(root_dir)
+        root_dir = os.path.abspath(root_dir)
+
+        if not Path(root_dir).is_dir():
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+
+        # Validate that the parameter 'cache_size' is not negative
+        if cache_size < 0:
+            raise ValueError("Parameter 'cache_size' expected a non-negative integer")
+
+        # Set all attributes
+        self.root_dir = root_dir
+        self.cache_size = cache_size
+        self._real_root_dir = os.path.realpath(root_dir)
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, name: str, label: str = "File", stat_path: bool = True) -> ResolvedPath:
+        """
+        Validate a relative path given by the LLM and get its status.
+
+        Parameters
+        ----------
+        name : str
+            The relative path.
+        label : str
+            The kind of path, used in the error messages: "File" or "Directory".
+            Defaults to "File".
+        stat_path : bool
+            Whether to get the status of the path. If False, the status is None.
+            Defaults to True.
+
+        Returns
+        -------
+        ResolvedPath
+            The validated path, with its full path and its status.
+
+        Raises
+        ------
+        ToolError
+            If the path is not provided, is not relative or is not in the root directory.
+            If the status of the path cannot be read.
+        """
+
+        # Validate that the path is provided
+        if not name:
+            raise ToolError(f"{label} name was not provided or None.")
+
+        long_name = self._long_name(name, label)
+
+        # Get the status of the path, a missing path having no status
+        stat_result = None
+        if stat_path:
+            tool_metrics.count("stat_calls")
+            try:
+                stat_result = os.stat(long_name)
+            except (FileNotFoundError, NotADirectoryError):
+                stat_result = None
+            except OSError as error:
+                raise ToolError(str(error)) from error
+
+        return ResolvedPath(name, long_name, stat_result)
+
+    def contains(self, long_name: str) -> bool:
+        """
+        Check that a normalized full path is the root directory or is inside it.
+
+        Parameters
+        ----------
+        long_name : str
+            The normalized full path.
+
+        Returns
+        -------
+        bool
+            True if the path is inside the root directory.
+        """
+
+        return _is_within(long_name, self.root_dir) and _is_within(os.path.realpath(long_name), self._real_root_dir)
+
+    def clear(self) -> None:
+        """
+        Remove all validated paths from the cache.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._cache.clear()
+
+    def _long_name(self, name: str, label: str) -> str:
+        """
+        Build and validate the full path of a relative path.
+
+        Only the lexical normalization is cached, the symbolic links being
+        resolved on every call.
+
+        Parameters
+        ----------
+        name : str
+            The relative path.
+        label : str
+            The kind of path, used in the error messages.
+
+        Returns
+        -------
+        str
+            The normalized full path.
+
+        Raises
+        ------
+        ToolError
+            If the path is not relative or is not in the root directory.
+        """
+
+        with self._lock:
+            long_name = self._cache.get(name)
+            if long_name is not None:
+                self._cache.move_to_end(name)
+
+        if long_name is None:
+            # Validate that the path is relative
+            if Path(name).is_absolute():
+                raise ToolError(f"{label} name is not a relative path.")
+
+            # Construct and normalize the full path, and validate that it is lexically inside the root directory
+            long_name = os.path.normpath(os.path.join(self.root_dir, name))
+            if not _is_within(long_name, self.root_dir):
+                raise ToolError(f"{label} name is not in root directory.")
+
+            if self.cache_size > 0:
+                with self._lock:
+                    self._cache[name] = long_name
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        # Validate that the full path is still inside the root directory once symbolic links are resolved
+        if not _is_within(os.path.realpath(long_name), self._real_root_dir):
+            raise ToolError(f"{label} name is not in root directory.")
+
+        return long_name
+
+
+def _is_within(long_name: str, root_dir: str) -> bool:
+    """
+    Check that a path is a directory or is inside it, component by component.
+
+    Parameters
+    ----------
+    long_name : str
+        The normalized full path.
+    root_dir : str
+        The normalized full path of the directory.
+
+    Returns
+    -------
+    bool
+        True if the path is the directory or is inside it.
+    """
+
+    if long_name == root_dir:
+        return True
+    return long_name.startswith(root_dir if root_dir.endswith(os.sep) else root_dir + os.sep)
@@ -0,0 +1,143 @@
+"""
+Read Session for Yacana
+
+This module provides the memory of the file contents returned to an agent during a
+conversation, shared between tools.
+"""
+
+# pylint: disable=C0301
+
+import threading
+from collections import OrderedDict
+
+class ReadSession:
+    """
+    The memory of the file contents returned to an agent during a conversation.
+
+    This class remembers the content last returned for each file, with the status
+    of the file when it was read. A tool reading a file again in the same session
+    then returns only what changed since: a notice when the file is unchanged, which
+    a single 'os.stat' is enough to detect, or a unified diff against the content
+    last returned. A session must be used for a single conversation, since the
+    agent is expected to still hold the contents returned before. When more files
+    than 'max_files' were read, the least recently read ones are forgotten and read
+    entirely again.
+    The session is thread-safe and can be shared between several tools.
+
+    Parameters
+    ----------
+    max_files : int
+        The maximum number of files remembered.
+        Defaults to 1000.
+    max_diff_ratio : float
+        The maximum size of a diff, relative to the size of the new content. A
+        larger diff is replaced by the whole new content.
+        Defaults to 0.5.
+
+    Attributes
+    ----------
+    max_files : int
+        The maximum number of files remembered.
+    max_diff_ratio : float
+        The maximum size of a diff, relative to the size of the new content.
+    unchanged : int
+        The number of reads answered as unchanged.
+    diffs : int
+        The number of reads answered with a diff.
+
+    Raises
+    ------
+    ValueError
+        If 'max_files' is not a positive integer.
+        If 'max_diff_ratio' is not a positive number.
+    """
+
+    def __init__(self, max_files: int = 1000, max_diff_ratio: float = 0.5):
+
+        # Validate the limits
+        if max_files < 1:
+            raise ValueError("Parameter 'max_files' expected a positive integer")
+        if max_diff_ratio <= 0:
+            raise ValueError("Parameter 'max_diff_ratio' expected a positive number")
+
+        # Set all attributes
+        self.max_files = max_files
+        self.max_diff_ratio = max_diff_ratio
+        self.unchanged = 0
+        self.diffs = 0
+        # Status key and content last returned by full path of file, the least recently read first
+        self._entries: OrderedDict[str, tuple[tuple[int, int, int, int] | None, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, long_file_name: str) -> tuple[tuple[int, int, int, int] | None, str] | None:
+        """
+        Get the content last returned for a file.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+
+        Returns
+        -------
+        tuple[tuple[int, int, int, int] | None, str] | None
+            The status key of the file when it was read, as returned by
+            'FileContentCache.key' or None if unknown, and the content returned,
+            or None if the file was not read in the session.
+        """
+
+        with self._lock:
+            entry = self._entries.get(long_file_name)
+            if entry is not None:
+                self._entries.move_to_end(long_file_name)
+            return entry
+
+    def put(self, long_file_name: str, key: tuple[int, int, int, int] | None, content: str) -> None:
+        """
+        Remember the content returned for a file.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        key : tuple[int, int, int, int] | None
+            The status key of the file when it was read, or None if unknown.
+        content : str
+            The content returned.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._entries[long_file_name] = (key, content)
+            self._entries.move_to_end(long_file_name)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+
+    def forget(self, long_file_name: str | None = None) -> None:
+        """
+        Forget the content returned for a file, so it is read entirely again.
+
+        Parameters
+        ----------
+        long_file_name : str | None
+            The full path of the file, or None to forget all files, e.g. when the
+            conversation history of the agent was truncated.
+            Defaults to None.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            if long_file_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(long_file_name, None)
@@ -0,0 +1,111 @@
+"""
+Text Edit for Yacana
+
+This module provides the streamed edits of a text file, replacing a text or a range
+of lines while copying the file to an output.
+"""
+
+# pylint: disable=C0301
+
+from typing import TextIO
+
+# The number of characters read at once when searching a text to replace
+CHUNK_SIZE = 1024 * 1024
+
+def stream_replace(source: TextIO, output: TextIO, search: str, replacement: str) -> int:
+    """
+    Copy a file to an output, replacing every occurrence of a text.
+
+    The file is read by chunks, keeping only the end of a chunk which may hold
+    the beginning of an occurrence, so memory does not depend on the file size.
+
+    Parameters
+    ----------
+    source : TextIO
+        The file to read, opened without newline translation.
+    output : TextIO
+        The output to write to.
+    search : str
+        The text to replace.
+    replacement : str
+        The replacement text.
+
+    Returns
+    -------
+    int
+        The number of occurrences replaced.
+    """
+
+    count = 0
+    buffer = ""
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        buffer = buffer + chunk
+        position = 0
+        while True:
+            index = buffer.find(search, position)
+            if index == -1:
+                break
+            output.write(buffer[position:index])
+            output.write(replacement)
+            count += 1
+            position = index + len(search)
+        if not chunk:
+            output.write(buffer[position:])
+            return count
+        # Keep the end of the buffer which may hold the beginning of an occurrence
+        safe = max(position, len(buffer) - len(search) + 1)
+        output.write(buffer[position:safe])
+        buffer = buffer[safe:]
+
+
+def stream_lines(source: TextIO, output: TextIO, start_line: int, end_line: int, replacement: str) -> int:
+    """
+    Copy a file to an output line by line, replacing a range of lines.
+
+    Parameters
+    ----------
+    source : TextIO
+        The file to read, opened without newline translation.
+    output : TextIO
+        The output to write to.
+    start_line : int
+        The number of the first line to replace, starting from 1.
+    end_line : int
+        The number of the last line to replace. A value of 'start_line' - 1
+        inserts the replacement before 'start_line'.
+    replacement : str
+        The replacement text. A line break is added if it does not end with one
+        and a line follows it.
+
+    Returns
+    -------
+    int
+        The number of lines of the file.
+    """
+
+    line_number = 0
+    line_break = ""
+    pending_break = False
+    for line in source:
+        line_number += 1
+        if line_number == start_line:
+            output.write(replacement)
+            pending_break = replacement != "" and not replacement.endswith(("\n", "\r"))
+        line_break = line[len(line.rstrip("\r\n")):]
+        if start_line <= line_number <= end_line:
+            continue
+        if pending_break:
+            output.write(line_break or "\n")
+            pending_break = False
+        output.write(line)
+
+    if start_line == line_number + 1:
+        # Append the replacement after the last line
+        if line_number > 0 and not line_break and replacement:
+            output.write("\n")
+        output.write(replacement)
+    elif pending_break:
+        # The replaced lines were the last ones, so keep their final line break
+        output.write(line_break)
+    return line_number
@@ -0,0 +1,181 @@
+"""
+Text Encoding for Yacana
+
+This module provides the detection of the encoding of the files, or that they are
+binary, and the decoding helpers shared by the tools reading and editing text.
+"""
+
+# pylint: disable=C0301
+
+# The size of the head of a file inspected to detect its encoding, or that it is binary
+SNIFF_SIZE = 4096
+# The encodings in which a window of bytes can be decoded on its own
+WINDOW_ENCODINGS = ('utf-8', 'utf-8-sig', 'latin-1')
+# The byte order marks and their encodings, the UTF-32 ones holding the UTF-16 ones
+_BYTE_ORDER_MARKS = (
+    ((b"\xff\xfe\x00\x00", b"\x00\x00\xfe\xff"), 'utf-32'),
+    ((b"\xff\xfe", b"\xfe\xff"), 'utf-16'),
+    (b"\xef\xbb\xbf", 'utf-8-sig'),
+)
+# The leading bytes of common binary formats, and their names
+_MAGIC_NUMBERS = (
+    (b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"GIF87a", "GIF image"),
+    (b"GIF89a", "GIF image"),
+    (b"%PDF-", "PDF document"),
+    (b"PK\x03\x04", "ZIP archive"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"\xfd7zXZ\x00", "xz archive"),
+    (b"BZh", "bzip2 archive"),
+    (b"\x7fELF", "ELF executable"),
+    (b"MZ", "Windows executable"),
+    (b"SQLite format 3\x00", "SQLite database"),
+    (b"\x00asm", "WebAssembly module"),
+)
+
+def sniff_encoding(head: bytes, truncated: bool) -> str | None:
+    """
+    Detect the encoding of a file from its head, or that it is binary.
+
+    A byte order mark gives the encoding. Otherwise a NUL byte, or more than 10%
+    of control characters, means a binary file. A text file is UTF-8 if its head
+    is valid UTF-8, and Latin-1 otherwise, which decodes any byte.
+
+    Parameters
+    ----------
+    head : bytes
+        The first bytes of the file.
+    truncated : bool
+        Whether the file has more bytes after its head.
+
+    Returns
+    -------
+    str | None
+        The encoding of the file, or None if the file is binary.
+    """
+
+    # Validate the byte order marks
+    encoding = next((name for marks, name in _BYTE_ORDER_MARKS if head.startswith(marks)), None)
+    if encoding is not None:
+        return encoding
+
+    # Validate that the head holds text, and not binary data
+    controls = len(head) - len(head.translate(None, bytes(range(0x20)).translate(None, b"\t\n\f\r\x1b")))
+    if b"\0" in head or controls * 10 > len(head):
+        return None
+
+    # Validate that the head is UTF-8, ignoring a sequence cut at the end of the head
+    if truncated:
+        head = head[:len(head) - incomplete_tail(head)]
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8'
+
+
+def binary_summary(file_name: str, size: int | None, head: bytes) -> str:
+    """
+    Summarize a binary file: its size, its type and a hex dump of its first bytes.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the file, as provided by the LLM.
+    size : int | None
+        The size of the file in bytes, or None if unknown.
+    head : bytes
+        The first bytes of the file.
+
+    Returns
+    -------
+    str
+        The summary of the file.
+    """
+
+    kind = next((name for magic, name in _MAGIC_NUMBERS if head.startswith(magic)), None)
+    if kind is None and head[257:262] == b"ustar":
+        kind = "tar archive"
+    length = f"{size} bytes" if size is not None else "unknown size"
+    lines = [f"Binary file '{file_name}' ({length}, {kind or 'unknown type'}), first bytes:"]
+    for start in range(0, min(64, len(head)), 16):
+        chunk = head[start:start + 16]
+        text = "".join(chr(byte) if 0x20 <= byte < 0x7F else "." for byte in chunk)
+        lines.append(f"{start:08x}: {chunk.hex(' ', 2):<39}  {text}")
+    return "\n".join(lines)
+
+
+def translate_newlines(text: str) -> str:
+    """
+    Translate the '\\r\\n' and '\\r' line breaks to '\\n', like the text mode of 'open'.
+
+    Every read path applies this translation, so a file reads the same whether it
+    is read whole, memory-mapped or by windows.
+
+    Parameters
+    ----------
+    text : str
+        The decoded text.
+
+    Returns
+    -------
+    str
+        The text with '\\n' line breaks only.
+    """
+
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def continuation_head(data: bytes) -> int:
+    """
+    Count the UTF-8 continuation bytes at the beginning of a buffer.
+
+    Parameters
+    ----------
+    data : bytes
+        The buffer to inspect.
+
+    Returns
+    -------
+    int
+        The number of leading bytes that belong to a sequence started before the buffer.
+    """
+
+    count = 0
+    while count < min(3, len(data)) and data[count] & 0xC0 == 0x80:
+        count += 1
+    return count
+
+
+def incomplete_tail(data: bytes) -> int:
+    """
+    Count the bytes of an incomplete UTF-8 sequence at the end of a buffer.
+
+    Parameters
+    ----------
+    data : bytes
+        The buffer to inspect.
+
+    Returns
+    -------
+    int
+        The number of trailing bytes that belong to an incomplete sequence.
+    """
+
+    for index in range(1, min(4, len(data)) + 1):
+        byte = data[-index]
+        if byte & 0xC0 == 0x80:
+            continue
+        if byte & 0xE0 == 0xC0:
+            size = 2
+        elif byte & 0xF0 == 0xE0:
+            size = 3
+        elif byte & 0xF8 == 0xF0:
+            size = 4
+        else:
+            size = 1
+        return index if size > index else 0
+    return 0
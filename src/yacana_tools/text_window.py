@@ -0,0 +1,425 @@
+"""
+Text Windows for Yacana
+
+This module provides the reading of a window of a text file, as a range of lines,
+a range of bytes or a page of a token budget, and its continuation cursors.
+"""
+
+# pylint: disable=C0301
+# pylint: disable=R0913,R0917
+
+import mmap
+from typing import Callable, NamedTuple
+from yacana import ToolError
+from . import text_encoding, tool_metrics
+
+# A token is assumed to never span more bytes than this, to bound the window read for a token budget
+MAX_BYTES_PER_TOKEN = 16
+
+class Window(NamedTuple):
+    """
+    The window of a file requested by a read, from the slice arguments and the cursor.
+    """
+
+    by_bytes: bool = False
+    by_lines: bool = False
+    by_tokens: bool = False
+    position: int = 0
+    line: int = 0
+    offset: int | None = None
+    limit: int | None = None
+    byte_start: int | None = None
+    byte_len: int | None = None
+
+    @property
+    def whole(self) -> bool:
+        """
+        Whether the whole file is requested, without slice nor page.
+        """
+
+        return not self.by_bytes and not self.by_lines and not self.by_tokens
+
+
+def read_window(source, size: int, encoding: str, window: Window, max_bytes: int | None,
+                max_tokens: int | None, token_estimator: Callable[[str], int]) -> str:
+    """
+    Read and decode a window of a file.
+
+    Parameters
+    ----------
+    source : BinaryIO | mmap.mmap
+        The file opened in binary mode, or its memory map.
+    size : int
+        The size of the file in bytes.
+    encoding : str
+        The encoding of the file.
+    window : Window
+        The requested window. A range of bytes starts at 'byte_start' after 'position',
+        a range of lines skips 'offset' lines after 'position'.
+    max_bytes : int | None
+        The maximum number of bytes returned, or None for no budget.
+    max_tokens : int | None
+        The maximum number of tokens returned, or None for no budget.
+    token_estimator : Callable[[str], int]
+        The function estimating the number of tokens of a text.
+
+    Returns
+    -------
+    str
+        The decoded window, followed by a continuation notice if the file
+        has content left after the window.
+    """
+
+    # Whole file: decode it entirely if it fits in the budget, else only its head and tail
+    if window.whole:
+        if max_bytes is None or size <= max_bytes:
+            tool_metrics.count("bytes_read", size)
+            return text_encoding.translate_newlines(str(source if isinstance(source, mmap.mmap) else source.read(), encoding, errors='replace'))
+        tool_metrics.count("bytes_read", max_bytes)
+        return read_head_tail(source, size, max_bytes, encoding)
+
+    data, position, line, more, length = _read_range(source, window, max_bytes, max_tokens)
+    tool_metrics.count("bytes_read", len(data))
+
+    # Cut the window to the token budget, the rest being read with the next page
+    by_tokens = window.by_tokens
+    if max_tokens is not None:
+        fitted = fit_tokens(data, max_tokens, token_estimator, encoding)
+        if fitted < len(data):
+            line -= data.count(b"\n", fitted)
+            position -= len(data) - fitted
+            data = data[:fitted]
+            more = by_tokens = True
+
+    # Leave a carriage return ending the window to the next one, so a '\r\n' cut in two is still translated once
+    if more and len(data) > 1 and data.endswith(b"\r"):
+        data = data[:-1]
+        position -= 1
+
+    content = text_encoding.translate_newlines(data.decode(encoding, errors='replace'))
+    if more and by_tokens:
+        content = content + f"\n[Content truncated at byte {position} to fit the budget of {max_tokens} tokens. To continue reading, call again with cursor=\"{format_cursor(position, line, 't', None)}\".]"
+    elif more and window.by_bytes:
+        content = content + f"\n[Content truncated at byte {position}. To continue reading, call again with cursor=\"{format_cursor(position, line, 'b', length)}\".]"
+    elif more:
+        content = content + f"\n[Content truncated after line {line}. To continue reading, call again with cursor=\"{format_cursor(position, line, 'l', window.limit)}\".]"
+
+    return content
+
+
+def _read_range(source, window: Window, max_bytes: int | None, max_tokens: int | None) -> tuple[bytes, int, int, bool, int | None]:
+    """
+    Read the bytes of a window of a file, capped to the budgets.
+
+    Parameters
+    ----------
+    source : BinaryIO | mmap.mmap
+        The file opened in binary mode, or its memory map.
+    window : Window
+        The requested window, which is not the whole file.
+    max_bytes : int | None
+        The maximum number of bytes read, or None for no budget.
+    max_tokens : int | None
+        The maximum number of tokens returned, or None for no budget.
+
+    Returns
+    -------
+    tuple[bytes, int, int, bool, int | None]
+        The bytes read, the byte position and the line number where the next read
+        starts, whether there is content left after the window and the number of
+        bytes requested by a read by bytes.
+    """
+
+    if window.by_tokens:
+        length = None if max_tokens is None else max_tokens * MAX_BYTES_PER_TOKEN
+        if max_bytes is not None:
+            length = min(length or max_bytes, max_bytes)
+        data, position, more = read_bytes(source, window.position, length)
+        return data, position, window.line + data.count(b"\n"), more, length
+    if window.by_bytes:
+        length = window.byte_len if max_bytes is None else min(window.byte_len or max_bytes, max_bytes)
+        data, position, more = read_bytes(source, window.position + (window.byte_start or 0), length)
+        return data, position, window.line, more, length
+    data, position, line, more = read_lines(source, window.position, window.line, window.offset or 0, window.limit, max_bytes)
+    return data, position, line, more, None
+
+
+def fit_tokens(data: bytes, max_tokens: int, token_estimator: Callable[[str], int], encoding: str = 'utf-8') -> int:
+    """
+    Find the length of the longest head of a window which fits in the token budget.
+
+    The head is cut after a line break when possible, and never in the middle
+    of a UTF-8 sequence. At least one character is kept, so paging always progresses.
+
+    Parameters
+    ----------
+    data : bytes
+        The window.
+    max_tokens : int
+        The token budget.
+    token_estimator : Callable[[str], int]
+        The function estimating the number of tokens of a text.
+    encoding : str
+        The encoding of the window.
+        Defaults to 'utf-8'.
+
+    Returns
+    -------
+    int
+        The length of the head in bytes, 'len(data)' if the whole window fits.
+    """
+
+    def fits(length: int) -> bool:
+        return token_estimator(data[:length].decode(encoding, errors='replace')) <= max_tokens
+
+    # Shrink the head in proportion of the excess of tokens until it fits
+    fitting, over = 0, len(data)
+    length = len(data)
+    for _ in range(8):
+        tokens = token_estimator(data[:length].decode(encoding, errors='replace'))
+        if tokens <= max_tokens:
+            fitting = length
+            break
+        over = length
+        length = min(length - 1, int(length * max_tokens / tokens * 0.95))
+        if length <= 0:
+            break
+    if fitting == len(data):
+        return fitting
+
+    # Search the last line break which fits, between the fitting head and the head over the budget
+    line_ends = []
+    line_end = data.find(b"\n", fitting, over - 1)
+    while line_end != -1:
+        line_ends.append(line_end + 1)
+        line_end = data.find(b"\n", line_end + 1, over - 1)
+    low, high = 0, len(line_ends) - 1
+    while low <= high:
+        middle = (low + high) // 2
+        if fits(line_ends[middle]):
+            fitting = line_ends[middle]
+            low = middle + 1
+        else:
+            high = middle - 1
+    if fitting in line_ends:
+        return fitting
+
+    # Otherwise cut after the last line break of the fitting head, or in the middle of the line
+    line_end = data.rfind(b"\n", 0, fitting)
+    if line_end >= fitting // 2:
+        return line_end + 1
+    fitting -= text_encoding.incomplete_tail(data[:fitting])
+    if fitting <= 0:
+        # Keep the first character, even if it is over the budget
+        fitting = 1 + text_encoding.continuation_head(data[1:4])
+    return fitting
+
+
+def format_cursor(position: int, line: int, unit: str, size: int | None) -> str:
+    """
+    Build the continuation cursor of a partial read.
+
+    Parameters
+    ----------
+    position : int
+        The byte position where the next read starts.
+    line : int
+        The line number where the next read starts.
+    unit : str
+        The unit of the page size: "l" for lines, "b" for bytes, "t" for the token budget.
+    size : int | None
+        The page size of the read, or None if the read has no page size.
+
+    Returns
+    -------
+    str
+        The continuation cursor.
+    """
+
+    return f"{position}:{line}:{unit}{size or 0}"
+
+
+def parse_cursor(cursor: str) -> tuple[int, int, str, int | None]:
+    """
+    Decode a continuation cursor built by 'format_cursor'.
+
+    Parameters
+    ----------
+    cursor : str
+        The continuation cursor.
+
+    Returns
+    -------
+    tuple[int, int, str, int | None]
+        The byte position and the line number where the next read starts,
+        the unit and the page size of the previous read.
+
+    Raises
+    ------
+    ToolError
+        If the cursor is invalid.
+    """
+
+    try:
+        position, line, page = str(cursor).split(":")
+        position, line, unit, size = int(position), int(line), page[:1], int(page[1:])
+    except ValueError as error:
+        raise ToolError("Cursor is not valid.") from error
+    if position < 0 or line < 0 or size < 0 or unit not in ("l", "b", "t"):
+        raise ToolError("Cursor is not valid.")
+    return position, line, unit, size or None
+
+
+def read_bytes(fd, start: int, length: int | None) -> tuple[bytes, int, bool]:
+    """
+    Read a range of bytes from a file opened in binary mode.
+
+    Incomplete UTF-8 sequences at the end of the range are left for the next read.
+
+    Parameters
+    ----------
+    fd : BinaryIO
+        The file to read.
+    start : int
+        The position of the first byte to read.
+    length : int | None
+        The maximum number of bytes to read, or None to read until the end.
+
+    Returns
+    -------
+    tuple[bytes, int, bool]
+        The bytes read, the position where the next read starts and whether
+        there is content left after the range.
+    """
+
+    fd.seek(start)
+    data = fd.read() if length is None else fd.read(length)
+    more = length is not None and fd.read(1) != b""
+    if more:
+        data = data[:len(data) - text_encoding.incomplete_tail(data)]
+    return data, start + len(data), more
+
+
+def read_lines(source, start: int, line: int, offset: int, limit: int | None, max_bytes: int | None = None) -> tuple[bytes, int, int, bool]:
+    """
+    Read a range of lines from a file opened in binary mode or from its memory map.
+
+    The file is streamed line by line, so only the requested lines are kept in memory.
+
+    Parameters
+    ----------
+    source : BinaryIO | mmap.mmap
+        The file to read.
+    start : int
+        The byte position where the reading starts.
+    line : int
+        The line number at the byte position 'start'.
+    offset : int
+        The number of lines to skip.
+    limit : int | None
+        The maximum number of lines to read, or None to read until the end.
+    max_bytes : int | None
+        The maximum number of bytes to read, or None for no budget.
+        A line longer than the budget is cut.
+        Defaults to None.
+
+    Returns
+    -------
+    tuple[bytes, int, int, bool]
+        The bytes read, the byte position and the line number where the next
+        read starts and whether there is content left after the range.
+    """
+
+    source.seek(start)
+    position = start
+    for _ in range(offset):
+        skipped = source.readline()
+        if not skipped:
+            break
+        position += len(skipped)
+        line += 1
+    lines = []
+    length = 0
+    while limit is None or len(lines) < limit:
+        current = _readline(source, None if max_bytes is None else max_bytes - length + 1)
+        if not current:
+            break
+        if max_bytes is not None and length + len(current) > max_bytes:
+            if not lines:
+                # A single line is over the budget, so return its beginning
+                current = current[:max_bytes]
+                current = current[:len(current) - text_encoding.incomplete_tail(current)]
+                lines.append(current)
+                position += len(current)
+            source.seek(position)
+            break
+        lines.append(current)
+        length += len(current)
+        position += len(current)
+    line += sum(1 for current in lines if current.endswith(b"\n"))
+    more = source.read(1) != b""
+    return b"".join(lines), position, line, more
+
+
+def _readline(source, size: int | None) -> bytes:
+    """
+    Read a line from a file opened in binary mode or from its memory map.
+
+    Parameters
+    ----------
+    source : BinaryIO | mmap.mmap
+        The file to read.
+    size : int | None
+        The maximum number of bytes to read, or None to read the whole line.
+
+    Returns
+    -------
+    bytes
+        The line, including its line break if it was fully read.
+    """
+
+    if size is None:
+        return source.readline()
+    if isinstance(source, mmap.mmap):
+        # mmap.readline() has no size argument, so search the line break within the size
+        start = source.tell()
+        end = source.find(b"\n", start, start + size)
+        data = source[start:start + size] if end == -1 else source[start:end + 1]
+        source.seek(start + len(data))
+        return data
+    return source.readline(size)
+
+
+def read_head_tail(source, size: int, max_bytes: int, encoding: str = 'utf-8') -> str:
+    """
+    Decode the head and the tail of a file over the read budget.
+
+    Parameters
+    ----------
+    source : BinaryIO | mmap.mmap
+        The file to read.
+    size : int
+        The size of the file in bytes.
+    max_bytes : int
+        The read budget, shared between the head and the tail.
+    encoding : str
+        The encoding of the file.
+        Defaults to 'utf-8'.
+
+    Returns
+    -------
+    str
+        The head and the tail of the file, separated by a notice of the omitted bytes.
+    """
+
+    head_len = max_bytes - max_bytes // 2
+    source.seek(0)
+    head = source.read(head_len)
+    head = head[:len(head) - text_encoding.incomplete_tail(head)]
+    source.seek(size - max_bytes // 2)
+    tail = source.read(max_bytes // 2)
+    tail = tail[text_encoding.continuation_head(tail):]
+    omitted = size - len(head) - len(tail)
+    return (text_encoding.translate_newlines(head.decode(encoding, errors='replace'))
+            + f"\n[... {omitted} bytes omitted. Use 'offset' and 'limit' or 'byte_start' and 'byte_len' to read them ...]\n"
+            + text_encoding.translate_newlines(tail.decode(encoding, errors='replace')))
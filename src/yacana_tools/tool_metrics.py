@@ -0,0 +1,508 @@
+"""
+Tool Metrics for Yacana
+
+This module provides an opt-in instrumentation of the tool calls, exported as
+Prometheus text or JSON.
+"""
+
+# pylint: disable=C0301
+
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, NamedTuple
+
+COUNTERS = ("bytes_read", "bytes_written", "entries_scanned", "stat_calls", "cache_hits")
+EXPORT_FORMATS = ("prometheus", "json")
+# The upper bounds in seconds of the buckets of the duration histogram
+_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# The counters of the tool call running in the current context, None outside of an instrumented call
+_current_call: contextvars.ContextVar["_CallCounters | None"] = contextvars.ContextVar("yacana_tools_current_call", default=None)
+
+class CallRecord(NamedTuple):
+    """
+    The measures of a single tool call.
+
+    Attributes
+    ----------
+    tool : str
+        The name of the tool.
+    function : str
+        The name of the called function.
+    path : str | None
+        The file or directory name passed to the function, i.e. its 'file_name'
+        or 'dir_name' argument, default included, if any.
+    duration : float
+        The wall time of the call, in seconds.
+    bytes_read : int
+        The number of bytes read from the files.
+    bytes_written : int
+        The number of bytes written to the files.
+    entries_scanned : int
+        The number of directory entries scanned.
+    stat_calls : int
+        The number of status calls to the filesystem.
+    cache_hits : int
+        The number of lookups served by a cache or an index.
+    error : str | None
+        The type name of the error raised by the call, or None if it succeeded.
+    """
+
+    tool: str
+    function: str
+    path: str | None
+    duration: float
+    bytes_read: int
+    bytes_written: int
+    entries_scanned: int
+    stat_calls: int
+    cache_hits: int
+    error: str | None
+
+
+class ToolMetrics:
+    """
+    An opt-in instrumentation of the tool calls.
+
+    This class measures each call of the tools it instruments: its wall time,
+    the bytes read and written, the directory entries scanned, the status calls,
+    the cache hits and the type of the raised error. Each measure is passed to the
+    callback, if any, and aggregated by tool and function. The aggregates and the
+    slowest calls can be exported as a Prometheus text or a JSON snapshot, written
+    to a file or served over HTTP on the local host.
+    The metrics are thread-safe and can be shared between several tools.
+
+    Parameters
+    ----------
+    callback : Callable[[CallRecord], None] | None
+        The function called with the measures of each call. None means no callback.
+        Defaults to None.
+    max_slowest : int
+        The number of slowest calls kept in the snapshot.
+        Defaults to 10.
+
+    Attributes
+    ----------
+    callback : Callable[[CallRecord], None] | None
+        The function called with the measures of each call.
+    max_slowest : int
+        The number of slowest calls kept in the snapshot.
+
+    Raises
+    ------
+    ValueError
+        If 'max_slowest' is negative.
+    """
+
+    def __init__(self, callback: Callable[[CallRecord], None] | None = None, max_slowest: int = 10):
+
+        # Validate that the parameter 'max_slowest' is a non-negative integer
+        if max_slowest < 0:
+            raise ValueError("Parameter 'max_slowest' expected a non-negative integer")
+
+        # Set all attributes
+        self.callback = callback
+        self.max_slowest = max_slowest
+        # Calls, errors by type, duration sum, maximum and histogram, and counters by tool and function
+        self._aggregates: dict[tuple[str, str], dict] = {}
+        self._slowest: list[CallRecord] = []
+        self._lock = threading.Lock()
+
+    def instrument(self, tool: str, func: Callable) -> Callable:
+        """
+        Wrap a tool function so each of its calls is measured.
+
+        The wrapper keeps the name and the signature of the function, so it can be
+        the function of a Tool. The call is measured once the function returned or
+        raised, so the callback never replaces its result or its error.
+
+        Parameters
+        ----------
+        tool : str
+            The name of the tool.
+        func : Callable
+            The function to instrument.
+
+        Returns
+        -------
+        Callable
+            The instrumented function.
+        """
+
+        signature = inspect.signature(func)
+
+        def measure(args: tuple, kwargs: dict, start: float, counters: "_CallCounters", error: str | None) -> CallRecord:
+            duration = time.perf_counter() - start
+            try:
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                path = arguments.arguments.get("file_name", arguments.arguments.get("dir_name"))
+            except TypeError:
+                path = None
+            return CallRecord(tool, func.__name__, path if isinstance(path, str) else None, duration, *counters.values(), error)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            counters = _CallCounters()
+            token = _current_call.set(counters)
+            start = time.perf_counter()
+            try:
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    _current_call.reset(token)
+            except Exception as exception:
+                self.record(measure(args, kwargs, start, counters, type(exception).__name__))
+                raise
+            self.record(measure(args, kwargs, start, counters, None))
+            return result
+
+        return wrapper
+
+    def record(self, call: CallRecord) -> None:
+        """
+        Aggregate the measures of a call and pass them to the callback.
+
+        An error raised by the callback is logged, not raised, so it never fails
+        the measured call.
+
+        Parameters
+        ----------
+        call : CallRecord
+            The measures of the call.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            aggregate = self._aggregates.get((call.tool, call.function))
+            if aggregate is None:
+                aggregate = {"calls": 0, "errors": {}, "duration_sum": 0.0, "duration_max": 0.0,
+                             "duration_buckets": [0] * (len(_DURATION_BUCKETS) + 1), **{name: 0 for name in COUNTERS}}
+                self._aggregates[(call.tool, call.function)] = aggregate
+            aggregate["calls"] += 1
+            if call.error is not None:
+                aggregate["errors"][call.error] = aggregate["errors"].get(call.error, 0) + 1
+            aggregate["duration_sum"] += call.duration
+            aggregate["duration_max"] = max(aggregate["duration_max"], call.duration)
+            aggregate["duration_buckets"][bisect.bisect_left(_DURATION_BUCKETS, call.duration)] += 1
+            for name in COUNTERS:
+                aggregate[name] += getattr(call, name)
+            if self.max_slowest > 0 and (len(self._slowest) < self.max_slowest or call.duration > self._slowest[-1].duration):
+                self._slowest.append(call)
+                self._slowest.sort(key=lambda slow_call: slow_call.duration, reverse=True)
+                del self._slowest[self.max_slowest:]
+
+        if self.callback is not None:
+            try:
+                self.callback(call)
+            except Exception: # pylint: disable=W0718
+                logging.exception("Metrics callback failed on a call of %s.%s", call.tool, call.function)
+
+    def snapshot(self) -> dict:
+        """
+        Get the aggregated measures of the calls.
+
+        Returns
+        -------
+        dict
+            The aggregates by tool and function under 'tools', and the slowest
+            calls under 'slowest'.
+        """
+
+        with self._lock:
+            tools = [{"tool": tool, "function": function, **aggregate, "errors": dict(aggregate["errors"]),
+                      "duration_buckets": dict(zip([*map(str, _DURATION_BUCKETS), "+Inf"], aggregate["duration_buckets"]))}
+                     for (tool, function), aggregate in sorted(self._aggregates.items())]
+            slowest = [call._asdict() for call in self._slowest]
+        return {"tools": tools, "slowest": slowest}
+
+    def to_json(self) -> str:
+        """
+        Export the aggregated measures of the calls as JSON.
+
+        Returns
+        -------
+        str
+            The snapshot of the measures, as JSON.
+        """
+
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Export the aggregated measures of the calls in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            The measures, as Prometheus metrics prefixed with 'yacana_tools_'.
+        """
+
+        tools = self.snapshot()["tools"]
+        lines = ["# HELP yacana_tools_calls_total Number of tool calls.", "# TYPE yacana_tools_calls_total counter"]
+        lines.extend(f"yacana_tools_calls_total{_labels(aggregate)} {aggregate['calls']}" for aggregate in tools)
+        lines.extend(["# HELP yacana_tools_errors_total Number of tool calls which raised an error, by error type.", "# TYPE yacana_tools_errors_total counter"])
+        lines.extend(f"yacana_tools_errors_total{_labels(aggregate, error=error)} {errors}" for aggregate in tools for error, errors in aggregate["errors"].items())
+        lines.extend(["# HELP yacana_tools_call_duration_seconds Wall time of the tool calls.", "# TYPE yacana_tools_call_duration_seconds histogram"])
+        for aggregate in tools:
+            cumulated = 0
+            for bound, calls in aggregate["duration_buckets"].items():
+                cumulated += calls
+                lines.append(f"yacana_tools_call_duration_seconds_bucket{_labels(aggregate, le=bound)} {cumulated}")
+            lines.append(f"yacana_tools_call_duration_seconds_sum{_labels(aggregate)} {aggregate['duration_sum']}")
+            lines.append(f"yacana_tools_call_duration_seconds_count{_labels(aggregate)} {aggregate['calls']}")
+        for name in COUNTERS:
+            lines.extend([f"# HELP yacana_tools_{name}_total Number of {name.replace('_', ' ')} by the tool calls.", f"# TYPE yacana_tools_{name}_total counter"])
+            lines.extend(f"yacana_tools_{name}_total{_labels(aggregate)} {aggregate[name]}" for aggregate in tools)
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_name: str, export_format: str = "prometheus") -> None:
+        """
+        Write the aggregated measures of the calls to a file, e.g. for the textfile
+        collector of the Prometheus node exporter.
+
+        The file is written next to its final location then renamed, so a reader
+        never sees a partial file.
+
+        Parameters
+        ----------
+        file_name : str
+            The path of the file.
+        export_format : str
+            The format of the file, "prometheus" or "json".
+            Defaults to "prometheus".
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the format is not valid.
+        OSError
+            If the file cannot be written.
+        """
+
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Parameter 'export_format' expected one of {', '.join(EXPORT_FORMATS)}")
+
+        content = self.to_prometheus() if export_format == "prometheus" else self.to_json()
+        temp_file = f"{file_name}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp_file, mode='w', encoding='utf-8') as fd:
+                fd.write(content)
+            os.replace(temp_file, file_name)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+        """
+        Serve the aggregated measures of the calls over HTTP, from a background thread.
+
+        The Prometheus text is served at '/metrics' and the JSON snapshot at '/metrics.json'.
+
+        Parameters
+        ----------
+        host : str
+            The address to listen on.
+            Defaults to "127.0.0.1", the local host only.
+        port : int
+            The port to listen on, 0 meaning any free port.
+            Defaults to 9464.
+
+        Returns
+        -------
+        ThreadingHTTPServer
+            The running server, to stop with 'shutdown()' then 'server_close()'.
+
+        Raises
+        ------
+        OSError
+            If the address cannot be listened on.
+        """
+
+        metrics = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self): # pylint: disable=C0103
+                """
+                Answer a request for the Prometheus text or the JSON snapshot.
+                """
+
+                if self.path == "/metrics":
+                    body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body, content_type = metrics.to_json(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args): # pylint: disable=W0622
+                """
+                Do not log the requests.
+                """
+
+                return
+
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="yacana-tools-metrics", daemon=True).start()
+        return server
+
+    def clear(self) -> None:
+        """
+        Remove all aggregated measures.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._aggregates.clear()
+            self._slowest.clear()
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Add a value to a counter of the tool call running in the current context.
+
+    Outside of an instrumented call, this function does nothing, so the tools
+    can always call it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter, one of 'COUNTERS'.
+    value : int
+        The value to add.
+        Defaults to 1.
+
+    Returns
+    -------
+    None
+    """
+
+    counters = _current_call.get()
+    if counters is not None:
+        counters.add(name, value)
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    Bind a function to the tool call running in the current context, so the
+    counters of the call are also incremented when the function runs on another thread.
+
+    Parameters
+    ----------
+    func : Callable
+        The function, e.g. submitted to a pool of threads.
+
+    Returns
+    -------
+    Callable
+        The bound function, or the function itself outside of an instrumented call.
+    """
+
+    counters = _current_call.get()
+    if counters is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_call.set(counters)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_call.reset(token)
+
+    return wrapper
+
+
+def _labels(aggregate: dict, **extra: str) -> str:
+    """
+    Format the Prometheus labels of an aggregate.
+
+    Parameters
+    ----------
+    aggregate : dict
+        The aggregate, holding the tool and the function.
+    **extra : str
+        The other labels.
+
+    Returns
+    -------
+    str
+        The labels, enclosed in '{' and '}'.
+    """
+
+    labels = {"tool": aggregate["tool"], "function": aggregate["function"], **extra}
+    formatted = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        formatted.append(f'{name}="{value}"')
+    return "{" + ",".join(formatted) + "}"
+
+
+class _CallCounters:
+    """
+    The counters of a tool call, incremented from any thread working for the call.
+    """
+
+    def __init__(self):
+        self._values = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: int) -> None:
+        """
+        Add a value to a counter.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter, one of 'COUNTERS'.
+        value : int
+            The value to add.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._values[name] += value
+
+    def values(self) -> list[int]:
+        """
+        Get the values of the counters.
+
+        Returns
+        -------
+        list[int]
+            The values, in the order of 'COUNTERS'.
+        """
+
+        with self._lock:
+            return [self._values[name] for name in COUNTERS]
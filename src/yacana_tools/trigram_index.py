@@ -0,0 +1,473 @@
+"""
+Trigram Index for Yacana
+
+This module provides an on-disk trigram index of the text files of a directory tree,
+used to speed up searches.
+"""
+
+# pylint: disable=C0301,R0902
+
+import importlib
+import json
+import logging
+import os
+import re
+import stat
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Iterator
+from .directory_index import DirectoryIndex
+
+_INDEX_FORMAT_VERSION = 1
+_BINARY_SNIFF_SIZE = 8192
+
+class TrigramIndex:
+    """
+    A trigram index of the text files under a root directory.
+
+    This class records, for each text file under the root directory, the set of
+    the 3-character substrings of its lower-cased content. A search for a literal
+    text then only needs to read the files holding all trigrams of this text, the
+    other files cannot match. The index is refreshed incrementally: only the files
+    whose size or modification time changed since the last refresh are read again.
+    The index can be persisted to a file, so a restart only reads the files which
+    changed in the meantime.
+    Symbolic links are never followed, binary files and files over 'max_file_size'
+    are not indexed and are always returned as candidates.
+    A refresh walks and stats the whole tree, which is most of the cost of a query
+    when the index is refreshed before each one. With a directory index, the sizes
+    and modification times come from its memory, kept up to date by inotify, so a
+    refresh makes no system call but the reads of the changed files.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory path to index.
+        Defaults to ".".
+    index_file : str | None
+        The path of the file where the index is persisted. None means no persistence.
+        Defaults to None.
+    max_file_size : int
+        The maximum size in bytes of an indexed file.
+        Defaults to 1 MiB.
+    refresh_interval : float
+        The number of seconds during which the index is considered up to date
+        after a refresh, a file changed in the meantime possibly being missed.
+        0 means the index is refreshed before every query.
+        Defaults to 0.
+    directory_index : DirectoryIndex | None
+        The index of the paths of the same root directory, giving the sizes and
+        modification times of the files. None means the tree is walked on disk.
+        Defaults to None.
+
+    Attributes
+    ----------
+    root_dir : str
+        The root directory path to index.
+    index_file : str | None
+        The path of the file where the index is persisted.
+    max_file_size : int
+        The maximum size in bytes of an indexed file.
+    refresh_interval : float
+        The number of seconds during which the index is considered up to date after a refresh.
+    directory_index : DirectoryIndex | None
+        The index of the paths of the same root directory.
+
+    Raises
+    ------
+    ValueError
+        If the provided path is not a valid directory.
+        If 'max_file_size' is not a positive integer.
+        If 'refresh_interval' is negative.
+        If 'directory_index' does not index the same root directory.
+    """
+
+    def __init__(self,
+                 root_dir: str = ".",
+                 index_file: str | None = None,
+                 max_file_size: int = 1024 * 1024,
+                 refresh_interval: float = 0,
+                 directory_index: DirectoryIndex | None = None):
+
+        # Validate that the parameter 'rootdir' is a valid directory
+        root_dir = os.path.normpath(root_dir)
+        root_dir = os.path.abspath(root_dir)
+
+        if not os.path.isdir(root_dir):
+            raise ValueError("Parameter 'root_dir' expected a valid directory")
+
+        # Validate the limits
+        if max_file_size < 1:
+            raise ValueError("Parameter 'max_file_size' expected a positive integer")
+        if refresh_interval < 0:
+            raise ValueError("Parameter 'refresh_interval' expected a non-negative number")
+        if directory_index is not None and directory_index.root_dir != root_dir:
+            raise ValueError("Parameter 'directory_index' expected an index of the same root directory")
+
+        # Set all attributes
+        self.root_dir = root_dir
+        self.index_file = index_file
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        self.directory_index = directory_index
+        # Size, modification time and trigrams by relative file path, the trigrams being None for a file not indexed
+        self._files: dict[str, tuple[int, int, frozenset[str] | None]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh: float | None = None
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._files)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date with the filesystem.
+
+        Only the files which are new or whose size or modification time changed are read.
+
+        Parameters
+        ----------
+        force : bool
+            Whether to refresh even if the index is considered up to date.
+            Defaults to False.
+
+        Returns
+        -------
+        int
+            The number of files added, updated or removed.
+        """
+
+        with self._refresh_lock:
+            if not force and self._last_refresh is not None and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return 0
+
+            seen = set()
+            changes = 0
+            for rel_path, size, mtime_ns in self._walk():
+                seen.add(rel_path)
+                with self._lock:
+                    known = self._files.get(rel_path)
+                if known is None or known[0] != size or known[1] != mtime_ns:
+                    self._set(rel_path, size, mtime_ns, self._extract(os.path.join(self.root_dir, rel_path), size))
+                    changes += 1
+
+            with self._lock:
+                removed = [rel_path for rel_path in self._files if rel_path not in seen]
+            for rel_path in removed:
+                self._set(rel_path, 0, 0, None, remove=True)
+            self._last_refresh = time.monotonic()
+            return changes + len(removed)
+
+    def candidates(self, literals: list[str], rel_dir: str = "") -> list[str] | None:
+        """
+        Get the files which may hold all the given texts, refreshing the index if needed.
+
+        Parameters
+        ----------
+        literals : list[str]
+            The texts which must all be in a matching file. Texts shorter than
+            3 characters do not prune any file.
+        rel_dir : str
+            The path of the directory where to search, relative to the root directory.
+            Defaults to "", meaning the root directory.
+
+        Returns
+        -------
+        list[str] | None
+            The sorted relative paths of the candidate files under the directory,
+            or None if the texts cannot prune any file.
+        """
+
+        trigrams = {trigram for literal in literals for trigram in _trigrams(literal.lower())}
+        if not trigrams:
+            return None
+
+        self.refresh()
+        rel_dir = os.path.normpath(rel_dir)
+        prefix = "" if rel_dir == "." else rel_dir + os.sep
+        with self._lock:
+            # Intersect the postings from the rarest trigram
+            postings = sorted((self._postings.get(trigram, set()) for trigram in trigrams), key=len)
+            found = set(postings[0]).intersection(*postings[1:])
+            found.update(rel_path for rel_path, fields in self._files.items() if fields[2] is None)
+        return sorted(rel_path for rel_path in found if rel_path.startswith(prefix))
+
+    def save(self) -> None:
+        """
+        Persist the index to the index file.
+
+        The file is written next to its final location then renamed, so a crash
+        never leaves a partial index file.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If no index file is set.
+        """
+
+        if self.index_file is None:
+            raise ValueError("No index file to save the index to")
+
+        with self._lock:
+            data = {
+                "version": _INDEX_FORMAT_VERSION,
+                "root_dir": self.root_dir,
+                "max_file_size": self.max_file_size,
+                "files": {rel_path: [size, mtime_ns, "".join(sorted(trigrams)) if trigrams is not None else None]
+                          for rel_path, (size, mtime_ns, trigrams) in self._files.items()},
+            }
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, mode='w', encoding='utf-8') as fd:
+            json.dump(data, fd, separators=(",", ":"))
+        os.replace(temp_file, self.index_file)
+
+    @staticmethod
+    def literals(pattern: str, regex: bool = False) -> list[str]:
+        """
+        Get the texts which any match of a search pattern must hold.
+
+        For a regular expression, these are the runs of literal characters which
+        are required by the expression outside of any group, alternation or repeat.
+
+        Parameters
+        ----------
+        pattern : str
+            The search pattern.
+        regex : bool
+            Whether the pattern is a regular expression.
+            Defaults to False.
+
+        Returns
+        -------
+        list[str]
+            The required texts, possibly empty.
+        """
+
+        if not regex:
+            return [pattern]
+
+        # Without a parser, or if the parser fails, no file is pruned and the search is a full scan
+        if _sre_parse is None:
+            return []
+        try:
+            return _regex_literals(pattern)
+        except (re.error, AttributeError, OverflowError, RecursionError, TypeError, ValueError):
+            return []
+
+    def _walk(self) -> Iterator[tuple[str, int, int]]:
+        """
+        Iterate over the regular files under the root directory, from the directory
+        index if any, otherwise from the filesystem.
+
+        Yields
+        ------
+        tuple[str, int, int]
+            The path of each file relative to the root directory, its size and its
+            modification time in nanoseconds.
+        """
+
+        if self.directory_index is not None:
+            for rel_path, entry in self.directory_index.walk():
+                if stat.S_ISREG(entry.st_mode):
+                    yield rel_path, entry.st_size, entry.st_mtime_ns
+            return
+
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            try:
+                with os.scandir(os.path.join(self.root_dir, rel_dir)) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(stat_result.st_mode):
+                    pending.append(rel_path)
+                elif stat.S_ISREG(stat_result.st_mode):
+                    yield rel_path, stat_result.st_size, stat_result.st_mtime_ns
+
+    def _extract(self, long_file_name: str, size: int) -> frozenset[str] | None:
+        """
+        Read the trigrams of a file.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        size : int
+            The size of the file.
+
+        Returns
+        -------
+        frozenset[str] | None
+            The trigrams of the lower-cased content, or None if the file is binary,
+            too large or cannot be read.
+        """
+
+        if size > self.max_file_size:
+            return None
+        try:
+            with open(long_file_name, mode='rb') as fd:
+                data = fd.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_size or b"\0" in data[:_BINARY_SNIFF_SIZE]:
+            return None
+        return frozenset(_trigrams(data.decode("utf-8", errors="replace").lower()))
+
+    def _set(self, rel_path: str, size: int, mtime_ns: int, trigrams: frozenset[str] | None, remove: bool = False) -> None:
+        """
+        Update the entry of a file and the postings of its trigrams.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the file, relative to the root directory.
+        size : int
+            The size of the file.
+        mtime_ns : int
+            The modification time of the file, in nanoseconds.
+        trigrams : frozenset[str] | None
+            The trigrams of the file, or None if the file is not indexed.
+        remove : bool
+            Whether to remove the file from the index instead.
+            Defaults to False.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            previous = self._files.pop(rel_path, None)
+            if previous is not None and previous[2] is not None:
+                for trigram in previous[2]:
+                    posting = self._postings.get(trigram)
+                    if posting is not None:
+                        posting.discard(rel_path)
+                        if not posting:
+                            del self._postings[trigram]
+            if remove:
+                return
+            self._files[rel_path] = (size, mtime_ns, trigrams)
+            if trigrams is not None:
+                for trigram in trigrams:
+                    self._postings.setdefault(trigram, set()).add(rel_path)
+
+    def _load(self) -> bool:
+        """
+        Load the index from the index file, if it exists and matches the root directory.
+
+        Returns
+        -------
+        bool
+            True if the index was loaded, False otherwise.
+        """
+
+        if self.index_file is None or not os.path.isfile(self.index_file):
+            return False
+
+        try:
+            with open(self.index_file, mode='r', encoding='utf-8') as fd:
+                data = json.load(fd)
+            if (data.get("version") != _INDEX_FORMAT_VERSION or data.get("root_dir") != self.root_dir
+                    or data.get("max_file_size") != self.max_file_size):
+                return False
+            files = {rel_path: (size, mtime_ns, frozenset(packed[i:i + 3] for i in range(0, len(packed), 3)) if packed is not None else None)
+                     for rel_path, (size, mtime_ns, packed) in data["files"].items()}
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logging.warning("Index file '%s' cannot be loaded: %s", self.index_file, error)
+            return False
+
+        for rel_path, (size, mtime_ns, trigrams) in files.items():
+            self._set(rel_path, size, mtime_ns, trigrams)
+        return True
+
+
+def _trigrams(text: str) -> set[str]:
+    """
+    Get the 3-character substrings of a text.
+
+    Parameters
+    ----------
+    text : str
+        The text.
+
+    Returns
+    -------
+    set[str]
+        The trigrams of the text.
+    """
+
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _regex_literals(pattern: str) -> list[str]:
+    """
+    Get the runs of literal characters which a regular expression requires outside
+    of any group, alternation or repeat.
+
+    Parameters
+    ----------
+    pattern : str
+        The regular expression.
+
+    Returns
+    -------
+    list[str]
+        The required texts, possibly empty.
+    """
+
+    literals = []
+    run = []
+    for op, value in _sre_parse.parse(pattern):
+        if op == _sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if op == _sre_parse.BRANCH:
+            # An alternation of the whole expression has no required text
+            return []
+        if run:
+            literals.append("".join(run))
+            run = []
+    if run:
+        literals.append("".join(run))
+    return literals
+
+
+def _load_regex_parser() -> ModuleType | None:
+    """
+    Load the parser of the regular expressions of the standard library.
+
+    The parser is private: it is 're._parser' since Python 3.11, the deprecated
+    'sre_parse' before, and may move again.
+
+    Returns
+    -------
+    ModuleType | None
+        The parser module, or None if it cannot be found.
+    """
+
+    name = "re._parser" if sys.version_info >= (3, 11) else "sre_parse"
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        logging.warning("Regular expression parser '%s' not found, searches by regular expression are full scans", name)
+        return None
+
+
+_sre_parse = _load_regex_parser()
@@ -0,0 +1,68 @@
+"""
+Argument Validation for Yacana
+
+This module provides the validation of the arguments given by the LLM, shared by all tools.
+"""
+
+# pylint: disable=C0301
+
+from yacana import ToolError
+
+def validate_bool(value: bool) -> bool:
+    """
+    Validate a boolean argument provided by the LLM, which may be given as a string.
+
+    Parameters
+    ----------
+    value : bool
+        The value to validate.
+
+    Returns
+    -------
+    bool
+        The value as a boolean.
+    """
+
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def validate_int(value: int | None, name: str, minimum: int = 0) -> int | None:
+    """
+    Validate an optional integer argument provided by the LLM, which may be given as a string.
+
+    Parameters
+    ----------
+    value : int | None
+        The value to validate.
+    name : str
+        The name of the argument, used in the error messages.
+    minimum : int
+        The minimum value of the argument.
+        Defaults to 0.
+
+    Returns
+    -------
+    int | None
+        The value as an integer, or None if not provided.
+
+    Raises
+    ------
+    ToolError
+        If the value is not an integer or is below the minimum.
+    """
+
+    if value is None:
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        raise ToolError(f"Argument '{name}' is not an integer.")
+    try:
+        integer = int(value)
+    except (TypeError, ValueError) as error:
+        raise ToolError(f"Argument '{name}' is not an integer.") from error
+    if integer < minimum:
+        if minimum == 0:
+            raise ToolError(f"Argument '{name}' must be a non-negative integer.")
+        raise ToolError(f"Argument '{name}' must be greater than {minimum - 1}.")
+    return integer
@@ -0,0 +1,298 @@
+"""
+Write Buffer for Yacana
+
+This module provides an in-memory write-behind buffer of file contents, shared between tools.
+"""
+
+# pylint: disable=C0301,R0902
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable
+
+# The buffers still alive, flushed when the interpreter exits
+_BUFFERS: weakref.WeakSet = weakref.WeakSet()
+
+class WriteBuffer:
+    """
+    An in-memory write-behind buffer of file contents.
+
+    This class keeps the content written to a file in memory instead of writing
+    it to disk right away. Successive writes to the same file are coalesced, so
+    only the last content is written when the buffer is flushed. The buffer is
+    flushed explicitly, when leaving its context, or when a threshold is hit:
+    the oldest files are written when the total size of the pending contents
+    exceeds the byte cap, and a file is written when its content has been
+    pending for longer than the maximum age. The thresholds are checked on every
+    access to the buffer, no background thread is started. The buffers still
+    alive are flushed when the interpreter exits normally, but the pending
+    contents are lost if the process is killed or exits with 'os._exit', so a
+    buffer should be flushed or used as a context manager.
+    The buffer is thread-safe and can be shared between several tools, e.g. a
+    FileWriteTool and a FileReadTool which then reads the pending contents.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum total size in bytes of the pending contents.
+        Defaults to 8 MiB.
+    max_age : float
+        The maximum number of seconds a content stays pending.
+        Defaults to 5.
+
+    Attributes
+    ----------
+    max_bytes : int
+        The maximum total size in bytes of the pending contents.
+    max_age : float
+        The maximum number of seconds a content stays pending.
+    size : int
+        The total size in bytes of the pending contents.
+    writes : int
+        The number of writes received by the buffer.
+    flushes : int
+        The number of contents written to disk.
+
+    Raises
+    ------
+    ValueError
+        If 'max_bytes' is not a positive integer.
+        If 'max_age' is negative.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, max_age: float = 5):
+
+        # Validate the thresholds
+        if max_bytes < 1:
+            raise ValueError("Parameter 'max_bytes' expected a positive integer")
+        if max_age < 0:
+            raise ValueError("Parameter 'max_age' expected a non-negative number")
+
+        # Set all attributes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        self.writes = 0
+        self.flushes = 0
+        # Content, size, time of the first pending write and writer by full file path, the oldest first
+        self._entries: OrderedDict[str, tuple[str, int, float, Callable[[str, str], None]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        _BUFFERS.add(self)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __enter__(self) -> "WriteBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.flush()
+
+    def get(self, long_file_name: str) -> str | None:
+        """
+        Get the pending content of a file, flushing the contents over a threshold first.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+
+        Returns
+        -------
+        str | None
+            The pending content of the file, or None if nothing is pending.
+
+        Raises
+        ------
+        OSError
+            If a content over a threshold cannot be written.
+        """
+
+        self._flush_due()
+        with self._lock:
+            entry = self._entries.get(long_file_name)
+            return None if entry is None else entry[0]
+
+    def put(self, long_file_name: str, content: str, writer: Callable[[str, str], None]) -> None:
+        """
+        Store the content written to a file, replacing its pending content.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        content : str
+            The whole content of the file.
+        writer : Callable[[str, str], None]
+            The function writing a content to the file when flushed, called with
+            the full path of the file and the content.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If a content over a threshold cannot be written.
+        """
+
+        content_size = len(content.encode('utf-8', errors='replace'))
+        with self._lock:
+            # A coalesced write keeps the time and the place of the first pending write
+            previous = self._entries.get(long_file_name)
+            if previous is not None:
+                self.size -= previous[1]
+            created = previous[2] if previous is not None else time.monotonic()
+            self._entries[long_file_name] = (content, content_size, created, writer)
+            self.size += content_size
+            self.writes += 1
+        self._flush_due()
+
+    def append(self, long_file_name: str, content: str) -> bool:
+        """
+        Append a content to the pending content of a file, if any.
+
+        Parameters
+        ----------
+        long_file_name : str
+            The full path of the file.
+        content : str
+            The content to append.
+
+        Returns
+        -------
+        bool
+            True if the content was appended, False if nothing is pending for the file.
+
+        Raises
+        ------
+        OSError
+            If a content over a threshold cannot be written.
+        """
+
+        content_size = len(content.encode('utf-8', errors='replace'))
+        with self._lock:
+            previous = self._entries.get(long_file_name)
+            if previous is None:
+                return False
+            self._entries[long_file_name] = (previous[0] + content, previous[1] + content_size, previous[2], previous[3])
+            self.size += content_size
+            self.writes += 1
+        self._flush_due()
+        return True
+
+    def flush(self, long_file_name: str | None = None) -> int:
+        """
+        Write the pending contents to disk.
+
+        The files are written the oldest first. If a file cannot be written, its
+        content stays pending and the error is raised.
+
+        Parameters
+        ----------
+        long_file_name : str | None
+            The full path of the file to write, or None to write all files.
+            Defaults to None.
+
+        Returns
+        -------
+        int
+            The number of files written.
+
+        Raises
+        ------
+        OSError
+            If a file cannot be written.
+        """
+
+        with self._lock:
+            names = list(self._entries) if long_file_name is None else [name for name in (long_file_name,) if name in self._entries]
+        return self._flush_names(names)
+
+    def _flush_due(self) -> int:
+        """
+        Write the pending contents over the age threshold, and the oldest ones over the byte cap.
+
+        Returns
+        -------
+        int
+            The number of files written.
+
+        Raises
+        ------
+        OSError
+            If a file cannot be written.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            names = []
+            size = self.size
+            for name, (_, content_size, created, _) in self._entries.items():
+                if size <= self.max_bytes and now - created <= self.max_age:
+                    break
+                names.append(name)
+                size -= content_size
+        return self._flush_names(names) if names else 0
+
+    def _flush_names(self, names: list[str]) -> int:
+        """
+        Write the pending contents of some files.
+
+        Parameters
+        ----------
+        names : list[str]
+            The full paths of the files to write.
+
+        Returns
+        -------
+        int
+            The number of files written.
+
+        Raises
+        ------
+        OSError
+            If a file cannot be written.
+        """
+
+        count = 0
+        with self._flush_lock:
+            for name in names:
+                with self._lock:
+                    entry = self._entries.get(name)
+                if entry is None:
+                    continue
+                content, content_size, _, writer = entry
+                writer(name, content)
+                with self._lock:
+                    # Keep a content written in the meantime pending
+                    if self._entries.get(name) is entry:
+                        del self._entries[name]
+                        self.size -= content_size
+                self.flushes += 1
+                count += 1
+        return count
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    """
+    Write the pending contents of the buffers still alive when the interpreter exits.
+
+    Returns
+    -------
+    None
+    """
+
+    for buffer in list(_BUFFERS):
+        try:
+            buffer.flush()
+        except OSError:
+            logging.exception("Write buffer failed to write its pending contents at exit")
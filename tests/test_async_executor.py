@@ -0,0 +1,129 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import asyncio
+import os
+import pathlib
+import shutil
+import sys
+import threading
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.async_executor import AsyncExecutor, shared_executor # pylint: disable=C0413
+from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestAsyncExecutor:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_limits(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_workers' expected a positive integer"):
+            AsyncExecutor(0)
+        with pytest.raises(ValueError, match="Parameter 'max_pending' expected an integer not lower than 'max_workers'"):
+            AsyncExecutor(4, 2)
+
+    def test_run_bounds_pending_calls(self):
+        """
+        TBC
+        """
+
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def call(value):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            release.wait(5)
+            with lock:
+                running -= 1
+            return value
+
+        async def main(executor):
+            tasks = [asyncio.create_task(executor.run(call, value)) for value in range(10)]
+            await asyncio.sleep(0.2)
+            # The event loop is not blocked while the calls wait for the threads
+            assert executor._semaphore._value == 0 # pylint: disable=W0212
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        with AsyncExecutor(max_workers=2, max_pending=3) as executor:
+            assert asyncio.run(main(executor)) == list(range(10))
+        assert peak == 2
+
+    def test_tools_async_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        async def main():
+            executor = AsyncExecutor(max_workers=2)
+            read_tool = FileReadTool(DIR_NAME, executor=executor)
+            write_tool = FileWriteTool(DIR_NAME, executor=executor)
+            list_tool = FileListTool(DIR_NAME, executor=executor)
+            results = await asyncio.gather(read_tool.aread_content("alice.txt"),
+                                           write_tool.awrite_content("bob.txt", "bob"),
+                                           list_tool.aget_file_list("toto"))
+            assert results[0] == "alice"
+            assert results[1].startswith("Content written to file 'bob.txt'")
+            assert results[2] == "No file nor directory found."
+            assert await read_tool.aread_content("bob.txt") == "bob"
+            with pytest.raises(ToolError, match="File does not exist."):
+                await read_tool.aread_content("martin.txt")
+            executor.shutdown()
+
+        asyncio.run(main())
+
+    def test_shared_executor_started_lazily(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        read_tool = FileReadTool(DIR_NAME)
+        assert read_tool.executor is shared_executor()
+        assert FileWriteTool(DIR_NAME).executor is read_tool.executor
+        assert FileListTool(DIR_NAME).executor is read_tool.executor
+
+        with AsyncExecutor() as executor:
+            assert executor._executor is None # pylint: disable=W0212
+            read_tool = FileReadTool(DIR_NAME, executor=executor)
+            assert asyncio.run(read_tool.aread_content("alice.txt")) == "alice"
+            assert executor._executor is not None # pylint: disable=W0212
+            executor.close()
+            assert executor._executor is None # pylint: disable=W0212
+            # A closed executor starts new threads, also from another event loop
+            assert asyncio.run(read_tool.aread_content("alice.txt")) == "alice"
+        assert executor._executor is None # pylint: disable=W0212
@@ -0,0 +1,148 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+import time
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.directory_index import DirectoryIndex # pylint: disable=C0413
+from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+INDEX_FILE_NAME = "tmp_index.json"
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """
+    TBC
+    """
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+class TestDirectoryIndex:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+        if os.path.exists(INDEX_FILE_NAME):
+            os.remove(INDEX_FILE_NAME)
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError):
+            DirectoryIndex("bob")
+
+    def test_index_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME, use_inotify=False) as index:
+            entries = {entry.name: entry for entry in index.list_dir("")}
+            assert sorted(entries) == ["alice.txt", "toto"]
+            assert entries["toto"].is_dir()
+            assert entries["alice.txt"].st_size == 5
+            assert index.list_dir("toto") == []
+            assert index.list_dir("bob") is None
+            assert index.get("alice.txt").is_file()
+            assert sorted(rel_path for rel_path, _ in index.walk()) == ["alice.txt", "toto"]
+
+    def test_index_rescan_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME, use_inotify=False) as index:
+            with open(f"{DIR_NAME}/toto/bob.txt", mode='w', encoding='utf-8') as fd:
+                fd.write("bob")
+            assert index.list_dir("toto") == []
+            index.rescan()
+            assert [entry.name for entry in index.list_dir("toto")] == ["bob.txt"]
+
+    def test_index_inotify_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME) as index:
+            if not index.watching:
+                pytest.skip("inotify is not available")
+            pathlib.Path(f"{DIR_NAME}/titi/tata").mkdir(parents=True)
+            with open(f"{DIR_NAME}/titi/tata/bob.txt", mode='w', encoding='utf-8') as fd:
+                fd.write("bob")
+            os.remove(f"{DIR_NAME}/alice.txt")
+            assert wait_for(lambda: index.get("titi/tata/bob.txt") is not None)
+            assert wait_for(lambda: index.get("alice.txt") is None)
+            shutil.rmtree(f"{DIR_NAME}/titi")
+            assert wait_for(lambda: index.list_dir("titi") is None)
+
+    def test_index_persistence_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME, index_file=INDEX_FILE_NAME, use_inotify=False):
+            pass
+        assert os.path.exists(INDEX_FILE_NAME)
+        index = DirectoryIndex(DIR_NAME, index_file=INDEX_FILE_NAME, use_inotify=False)
+        assert index._load() # pylint: disable=W0212
+        assert sorted(entry.name for entry in index.list_dir("")) == ["alice.txt", "toto"]
+
+    def test_file_list_tool_index_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME, use_inotify=False, rescan_interval=None) as index:
+            file_list_tool = FileListTool(DIR_NAME, index=index)
+            with open(f"{DIR_NAME}/bob.txt", mode='w', encoding='utf-8') as fd:
+                fd.write("bob")
+            # The index was not refreshed, so the new file is not listed
+            assert file_list_tool.get_file_list(".").split("\n") == [
+                "* [file] alice.txt",
+                "* [directory] toto",
+            ]
+
+    def test_file_list_tool_index_symlink_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        os.symlink(os.path.abspath(f"{DIR_NAME}/toto"), f"{DIR_NAME}/toto_link")
+        os.symlink("missing.txt", f"{DIR_NAME}/dangling_link")
+        with DirectoryIndex(DIR_NAME, use_inotify=False, rescan_interval=None) as index:
+            # The index types a symbolic link like the filesystem listing it accelerates
+            assert FileListTool(DIR_NAME, index=index).get_file_list(".") == FileListTool(DIR_NAME).get_file_list(".")
+            assert index.get("toto_link").is_dir()
+            assert not index.get("toto_link").is_dir(follow_symlinks=False)
+            assert not index.get("dangling_link").is_file()
+            assert sorted(rel_path for rel_path, _ in index.walk()) == ["alice.txt", "dangling_link", "toto", "toto_link"]
@@ -0,0 +1,65 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301
+
+import os
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_content_cache import FileContentCache # pylint: disable=C0413
+
+class TestFileContentCache:
+    """
+    TBC
+    """
+
+    def test_init_failed_invalid_max_bytes(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_bytes' expected a positive integer"):
+            FileContentCache(0)
+
+    def test_get_put_succeeded(self):
+        """
+        TBC
+        """
+
+        cache = FileContentCache(100)
+        assert cache.get((1, 1, 5, 1)) is None
+        cache.put((1, 1, 5, 1), "alice")
+        assert cache.get((1, 1, 5, 1)) == "alice"
+        assert cache.get((1, 1, 5, 2)) is None
+        assert cache.hits == 1
+        assert cache.misses == 2
+        assert cache.size == 5
+
+    def test_put_evicts_least_recently_used(self):
+        """
+        TBC
+        """
+
+        cache = FileContentCache(10)
+        cache.put((1, 1, 5, 1), "alice")
+        cache.put((1, 2, 3, 1), "bob")
+        cache.get((1, 1, 5, 1))
+        cache.put((1, 3, 6, 1), "martin")
+        assert cache.get((1, 2, 3, 1)) is None
+        assert cache.get((1, 1, 5, 1)) is None
+        assert cache.get((1, 3, 6, 1)) == "martin"
+        assert cache.size == 6
+
+    def test_put_ignores_file_over_cap(self):
+        """
+        TBC
+        """
+
+        cache = FileContentCache(4)
+        cache.put((1, 1, 5, 1), "alice")
+        assert len(cache) == 0
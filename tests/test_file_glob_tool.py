@@ -0,0 +1,143 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_glob_tool import FileGlobTool # pylint: disable=C0413
+from src.yacana_tools.tool_metrics import ToolMetrics # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestFileGlobTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        for dir_name in ("src/alice", "src/bob/build", "node_modules/martin", "env/lib", "docs"):
+            pathlib.Path(f"{DIR_NAME}/{dir_name}").mkdir(parents=True, exist_ok=True)
+        for file_name in ("src/alice/alice.py", "src/alice/alice.txt", "src/bob/bob.py", "src/bob/build/bob.py",
+                          "src/bob/debug.log", "src/bob/keep.log", "node_modules/martin/martin.py",
+                          "env/pyvenv.cfg", "env/lib/site.py", "docs/index.md", "setup.py"):
+            with open(f"{DIR_NAME}/{file_name}", mode='w', encoding='utf-8') as fd:
+                fd.write(file_name)
+        with open(f"{DIR_NAME}/.gitignore", mode='w', encoding='utf-8') as fd:
+            fd.write("# Build outputs\nbuild/\n*.log\n")
+        with open(f"{DIR_NAME}/src/bob/.ignore", mode='w', encoding='utf-8') as fd:
+            fd.write("!keep.log\n")
+
+        yield
+
+        shutil.rmtree(DIR_NAME)
+
+    @pytest.fixture
+    def file_glob_tool(self):
+        """
+        TBC
+        """
+
+        return FileGlobTool(DIR_NAME, max_custom_error=0, max_call_error=0)
+
+    def test_init_succeeded(self):
+        """
+        TBC
+        """
+
+        file_glob_tool = FileGlobTool(".")
+        assert file_glob_tool.tool_name == "FileGlob"
+        assert file_glob_tool.root_dir == os.getcwd()
+
+    def test_init_failed_invalid_max_results(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_results' expected a positive integer"):
+            FileGlobTool(".", max_results=0)
+
+    def test_glob_succeeded(self, setup_and_teardown, file_glob_tool):
+        """
+        TBC
+        """
+
+        assert file_glob_tool.glob("**/*.py") == "* setup.py\n* src/alice/alice.py\n* src/bob/bob.py"
+        assert file_glob_tool.glob("src/*/alice.*") == "* src/alice/alice.py\n* src/alice/alice.txt"
+        assert file_glob_tool.glob("src/*") == "* src/alice/\n* src/bob/"
+        assert file_glob_tool.glob("*.py", "src/alice") == "* src/alice/alice.py"
+        assert file_glob_tool.glob("docs/**") == "* docs/\n* docs/index.md"
+
+    def test_glob_ignored_succeeded(self, setup_and_teardown, file_glob_tool):
+        """
+        TBC
+        """
+
+        assert file_glob_tool.glob("**/*.log") == "* src/bob/keep.log"
+        assert file_glob_tool.glob("*.log", "src/bob") == "* src/bob/keep.log"
+        assert file_glob_tool.glob("**/*.py", include_ignored=True) == "\n".join([
+            "* setup.py", "* env/lib/site.py", "* node_modules/martin/martin.py",
+            "* src/alice/alice.py", "* src/bob/bob.py", "* src/bob/build/bob.py"])
+
+    def test_glob_pruned_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        calls = []
+        file_glob_tool = FileGlobTool(DIR_NAME, metrics=ToolMetrics(callback=calls.append))
+        assert file_glob_tool.function_ref("src/alice/*.py") == "* src/alice/alice.py"
+        # Only the last directory of the pattern is listed
+        assert calls[0].entries_scanned == 2
+
+    def test_glob_max_results_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        content = FileGlobTool(DIR_NAME, max_results=2).glob("**/*")
+        assert content.split("\n")[-1] == "[Search stopped after 2 matches. Narrow the pattern or the directory to see more.]"
+
+    def test_glob_ignore_cache_succeeded(self, setup_and_teardown, file_glob_tool):
+        """
+        TBC
+        """
+
+        assert file_glob_tool.glob("*.md", "docs") == "* docs/index.md"
+        with open(f"{DIR_NAME}/.gitignore", mode='a', encoding='utf-8') as fd:
+            fd.write("/docs/index.md\n")
+        assert file_glob_tool.glob("*.md", "docs") == "No match found."
+
+    def test_glob_failed_invalid_pattern(self, setup_and_teardown, file_glob_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError, match="Pattern was not provided or is empty."):
+            file_glob_tool.glob("")
+        with pytest.raises(ToolError, match="Pattern must be relative to the directory."):
+            file_glob_tool.glob("/etc/*")
+        with pytest.raises(ToolError, match="Pattern must not hold '..'."):
+            file_glob_tool.glob("../*")
+
+    def test_glob_failed_missing_dir(self, setup_and_teardown, file_glob_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError, match="Directory does not exist."):
+            file_glob_tool.glob("*", "missing")
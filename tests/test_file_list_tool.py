@@ -12,7 +12,7 @@ import sys
 
 import pytest
 
-from yacana import OllamaAgent, Task, MaxToolErrorIter
+from yacana import OllamaAgent, Task, MaxToolErrorIter, ToolError
 path = os.getcwd()
 sys.path.append(path)
 from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
@@ -429,3 +429,137 @@ class TestFileListTool:
         task = Task(f"List all files and directories in the directory '../{DIR_NAME}'. If no file found, output ONLY 'No file found'.", agent, tools=[file_list_tool])
         with pytest.raises(MaxToolErrorIter):
             task.solve()
+
+    def test_list_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        content = file_list_tool.get_file_list(DIR_NAME)
+        assert content.split("\n") == [
+            "* [file] alice.txt",
+            "* [file] bob.txt",
+            "* [file] martin.txt",
+            "* [directory] tata",
+            "* [directory] titi",
+            "* [directory] toto",
+        ]
+
+    def test_list_empty_succeeded(self, setup_and_teardown, file_list_tool):
+        """
+        TBC
+        """
+
+        assert file_list_tool.get_file_list(DIR_NAME) == "No file nor directory found."
+
+    def test_list_cursor_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        names = []
+        content = file_list_tool.get_file_list(DIR_NAME, limit=4)
+        while True:
+            lines = content.split("\n")
+            names.extend(line.split("] ", 1)[1] for line in lines if line.startswith("* "))
+            if "cursor=" not in lines[-1]:
+                break
+            cursor = lines[-1].split('cursor="')[1].split('"')[0]
+            content = file_list_tool.get_file_list(DIR_NAME, limit=4, cursor=cursor)
+        assert names == ["alice.txt", "bob.txt", "martin.txt", "tata", "titi", "toto"]
+
+    def test_list_max_entries_succeeded(self, setup_and_teardown_many_files):
+        """
+        TBC
+        """
+
+        file_list_tool = FileListTool(".", max_entries=2)
+        content = file_list_tool.get_file_list(DIR_NAME, limit=10)
+        assert "martin.txt" not in content
+        assert "cursor=" in content
+
+    def test_list_failed_invalid_limit(self, setup_and_teardown, file_list_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_list_tool.get_file_list(DIR_NAME, limit=0)
+
+    def test_list_details_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        os.utime(f"{DIR_NAME}/alice.txt", (1700000000, 1700000000))
+        lines = file_list_tool.get_file_list(DIR_NAME, details=True).split("\n")
+        assert lines[0].startswith("* [file] alice.txt (5 bytes, modified ")
+        assert lines[0].endswith(", -rw-r--r--)") or platform.system() == "Windows"
+        assert lines[3].startswith("* [directory] tata (modified ")
+
+    def test_list_filters_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        assert file_list_tool.get_file_list(DIR_NAME, pattern="t*") == "* [directory] tata\n* [directory] titi\n* [directory] toto"
+        assert file_list_tool.get_file_list(DIR_NAME, extension="TXT", pattern="*i*") == "* [file] alice.txt\n* [file] martin.txt"
+        assert file_list_tool.get_file_list(DIR_NAME, entry_type="file") == "* [file] alice.txt\n* [file] bob.txt\n* [file] martin.txt"
+        assert file_list_tool.get_file_list(DIR_NAME, extension=".md") == "No file nor directory found."
+
+    def test_list_dir_symlink_succeeded(self, setup_and_teardown_1_dir, file_list_tool):
+        """
+        TBC
+        """
+
+        os.symlink("toto", f"{DIR_NAME}/link")
+        assert file_list_tool.get_file_list(DIR_NAME) == "* [file] link\n* [directory] toto"
+        assert file_list_tool.get_file_list(DIR_NAME, sort_by="size") == "* [file] link\n* [directory] toto"
+        assert file_list_tool.get_file_list(DIR_NAME, entry_type="directory") == "* [directory] toto"
+        assert file_list_tool.get_file_list(DIR_NAME, details=True).startswith("* [file] link (4 bytes, modified ")
+
+    def test_list_sort_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        for index, name in enumerate(("bob.txt", "martin.txt", "alice.txt")):
+            os.utime(f"{DIR_NAME}/{name}", (1700000000 + index, 1700000000 + index))
+        assert file_list_tool.get_file_list(DIR_NAME, entry_type="file", sort_by="size") == "* [file] martin.txt\n* [file] alice.txt\n* [file] bob.txt"
+        assert file_list_tool.get_file_list(DIR_NAME, entry_type="file", sort_by="mtime") == "* [file] alice.txt\n* [file] martin.txt\n* [file] bob.txt"
+        # The directories are listed by name after the files, their size not being the one of their content
+        assert file_list_tool.get_file_list(DIR_NAME, sort_by="size") == "* [file] martin.txt\n* [file] alice.txt\n* [file] bob.txt\n* [directory] tata\n* [directory] titi\n* [directory] toto"
+
+    def test_list_sort_cursor_succeeded(self, setup_and_teardown_many_files_many_dirs, file_list_tool):
+        """
+        TBC
+        """
+
+        content = file_list_tool.get_file_list(DIR_NAME, limit=2, entry_type="file", sort_by="size")
+        cursor = content.split('cursor="')[1].split('"')[0]
+        assert content.startswith("* [file] martin.txt\n* [file] alice.txt\n")
+        assert file_list_tool.get_file_list(DIR_NAME, limit=2, cursor=cursor, entry_type="file", sort_by="size") == "* [file] bob.txt"
+        content = file_list_tool.get_file_list(DIR_NAME, limit=4, sort_by="size")
+        cursor = content.split('cursor="')[1].split('"')[0]
+        assert file_list_tool.get_file_list(DIR_NAME, cursor=cursor, sort_by="size") == "* [directory] titi\n* [directory] toto"
+        with pytest.raises(ToolError, match="another sort key"):
+            file_list_tool.get_file_list(DIR_NAME, cursor=cursor)
+
+    @pytest.mark.parametrize("cursor", ["!!!", "=", "YWxpY2U=!", "YWxpY2U"])
+    def test_list_failed_invalid_cursor(self, setup_and_teardown, file_list_tool, cursor):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError, match="Cursor is not valid."):
+            file_list_tool.get_file_list(DIR_NAME, cursor=cursor)
+
+    def test_list_failed_invalid_sort(self, setup_and_teardown, file_list_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError, match="Sort key is not valid"):
+            file_list_tool.get_file_list(DIR_NAME, sort_by="owner")
+        with pytest.raises(ToolError, match="Entry type is not valid"):
+            file_list_tool.get_file_list(DIR_NAME, entry_type="link")
@@ -0,0 +1,124 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+from yacana import OllamaAgent, Task, MaxToolErrorIter, ToolError
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_read_many_tool import FileReadManyTool # pylint: disable=C0413
+
+AGENT_MODEL = "qwen3:4b-instruct"
+DIR_NAME = "tmp"
+FILE_NAMES = [f"{DIR_NAME}/alice.txt", f"{DIR_NAME}/bob.txt", f"{DIR_NAME}/martin.txt"]
+
+class TestFileReadManyTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(DIR_NAME).mkdir(parents=True, exist_ok=True)
+        for file_name in FILE_NAMES:
+            with open(file_name, "w", encoding="utf-8") as f:
+                f.write(f"Hello from {file_name}")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    @pytest.fixture
+    def file_read_many_tool(self):
+        """
+        TBC
+        """
+
+        return FileReadManyTool(os.getcwd(), max_files=5, max_custom_error=0, max_call_error=0)
+
+    @pytest.fixture
+    def agent(self):
+        """
+        TBC
+        """
+
+        return OllamaAgent("Test", AGENT_MODEL, "You are test agent")
+
+    def test_init_successed(self):
+        """
+        TBC
+        """
+
+        try:
+            FileReadManyTool(os.getcwd())
+        except ValueError:
+            assert False
+
+    def test_init_failed_not_dir_path(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            FileReadManyTool("bob")
+
+    def test_read_many_successed(self, setup_and_teardown, file_read_many_tool):
+        """
+        TBC
+        """
+
+        content = file_read_many_tool.read_many(FILE_NAMES)
+        for file_name in FILE_NAMES:
+            assert f"===== {file_name} =====\nHello from {file_name}" in content
+
+    def test_read_many_successed_with_errors(self, setup_and_teardown, file_read_many_tool):
+        """
+        TBC
+        """
+
+        content = file_read_many_tool.read_many([FILE_NAMES[0], f"{DIR_NAME}/bob", "../README.md"])
+        assert f"Hello from {FILE_NAMES[0]}" in content
+        assert f"===== {DIR_NAME}/bob =====\n[Error: File does not exist.]" in content
+        assert "===== ../README.md =====\n[Error: File name is not in root directory.]" in content
+
+    def test_read_many_failed_too_many_files(self, setup_and_teardown, file_read_many_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_read_many_tool.read_many([f"{DIR_NAME}/file{index}.txt" for index in range(6)])
+
+    def test_read_many_failed_not_provided(self, file_read_many_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_read_many_tool.read_many([])
+
+    def test_llm_successed(self, setup_and_teardown, file_read_many_tool, agent):
+        """
+        TBC
+        """
+
+        task = Task(f"Read the content of the files '{FILE_NAMES[0]}' and '{FILE_NAMES[1]}' at once", agent, tools=[file_read_many_tool])
+        try:
+            result = task.solve()
+            assert result.content is not None
+            assert result.content.find(f"Hello from {FILE_NAMES[0]}", 0) != -1
+            assert result.content.find(f"Hello from {FILE_NAMES[1]}", 0) != -1
+        except MaxToolErrorIter:
+            assert False
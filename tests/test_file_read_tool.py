@@ -4,23 +4,31 @@ TBC
 
 # pylint: disable=C0301,W0613,W0621
 
+import bz2
+import gzip
+import lzma
 import os
 import pathlib
 import platform
 import shutil
 import sys
+import tarfile
+import zipfile
 
 import pytest
 
-from yacana import OllamaAgent, Task, MaxToolErrorIter
+from yacana import OllamaAgent, Task, MaxToolErrorIter, ToolError
 path = os.getcwd()
 sys.path.append(path)
+from src.yacana_tools.file_content_cache import FileContentCache # pylint: disable=C0413
 from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
 
 AGENT_MODEL = "qwen3:4b-instruct"
 DIR_NAME = "tmp"
 FILE_NAME = f"{DIR_NAME}/alice.txt"
 FILE_CONTENT = "Hello World!!!"
+MANY_LINES_FILE_NAME = f"{DIR_NAME}/bob.txt"
+MANY_LINES_FILE_CONTENT = "".join(f"line {index}\n" for index in range(10))
 
 class TestFileReadTool:
     """
@@ -42,6 +50,20 @@ class TestFileReadTool:
         if os.path.exists(FILE_NAME):
             shutil.rmtree(DIR_NAME)
 
+    @pytest.fixture
+    def setup_and_teardown_many_lines(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(DIR_NAME).mkdir(parents=True, exist_ok=True)
+        with open(MANY_LINES_FILE_NAME, "w", encoding="utf-8") as f:
+            f.write(MANY_LINES_FILE_CONTENT)
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
     @pytest.fixture
     def set_write_only_test_file(self):
         """
@@ -153,3 +175,274 @@ class TestFileReadTool:
         task = Task(f"Read the content of the file '../{FILE_NAME}'", agent, tools=[file_read_tool])
         with pytest.raises(MaxToolErrorIter):
             task.solve()
+
+    def test_read_succeeded(self, setup_and_teardown, file_read_tool):
+        """
+        TBC
+        """
+
+        assert file_read_tool.read_content(FILE_NAME) == FILE_CONTENT
+
+    def test_read_lines_succeeded(self, setup_and_teardown_many_lines, file_read_tool):
+        """
+        TBC
+        """
+
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME, offset=2, limit=3)
+        assert content.startswith("line 2\nline 3\nline 4\n")
+        assert "line 5\n" not in content
+        assert "cursor=" in content
+
+    def test_read_lines_until_end_succeeded(self, setup_and_teardown_many_lines, file_read_tool):
+        """
+        TBC
+        """
+
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME, offset=8, limit=5)
+        assert content == "line 8\nline 9\n"
+
+    def test_read_lines_cursor_succeeded(self, setup_and_teardown_many_lines, file_read_tool):
+        """
+        TBC
+        """
+
+        pages = []
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME, limit=4)
+        while "cursor=" in content:
+            cursor = content.split('cursor="')[1].split('"')[0]
+            pages.append(content[:content.rindex("\n[Content truncated")])
+            content = file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor=cursor)
+        pages.append(content)
+        assert len(pages) == 3
+        assert "".join(pages) == MANY_LINES_FILE_CONTENT
+
+    def test_read_bytes_succeeded(self, setup_and_teardown, file_read_tool):
+        """
+        TBC
+        """
+
+        content = file_read_tool.read_content(FILE_NAME, byte_start=6, byte_len=5)
+        assert content.startswith("World")
+        assert "cursor=" in content
+        assert file_read_tool.read_content(FILE_NAME, byte_start=6) == "World!!!"
+
+    def test_read_failed_lines_and_bytes(self, setup_and_teardown, file_read_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_read_tool.read_content(FILE_NAME, offset=1, byte_len=5)
+
+    def test_read_failed_invalid_cursor(self, setup_and_teardown, file_read_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_read_tool.read_content(FILE_NAME, cursor="bob")
+
+    def test_read_failed_cursor_other_unit(self, setup_and_teardown_many_lines, file_read_tool):
+        """
+        TBC
+        """
+
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME, byte_len=10)
+        cursor = content.split('cursor="')[1].split('"')[0]
+        with pytest.raises(ToolError, match="Cursor continues a read by bytes"):
+            file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor=cursor, limit=2)
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME, limit=2)
+        cursor = content.split('cursor="')[1].split('"')[0]
+        with pytest.raises(ToolError, match="Cursor continues a read by lines"):
+            file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor=cursor, byte_len=10)
+        assert file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor=cursor, limit=1).startswith("line 2\n")
+
+    def test_read_mmap_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        file_read_tool = FileReadTool(os.getcwd(), mmap_threshold=1)
+        assert file_read_tool.read_content(MANY_LINES_FILE_NAME) == MANY_LINES_FILE_CONTENT
+        assert file_read_tool.read_content(MANY_LINES_FILE_NAME, offset=9) == "line 9\n"
+        assert file_read_tool.read_content(MANY_LINES_FILE_NAME, byte_start=7, byte_len=6).startswith("line 1")
+
+    @pytest.mark.parametrize("mmap_threshold", [1, 1024])
+    @pytest.mark.parametrize("kwargs", [{}, {"limit": 1}, {"byte_len": 7}, {"byte_len": 3}])
+    def test_read_crlf_succeeded(self, setup_and_teardown, mmap_threshold, kwargs):
+        """
+        TBC
+        """
+
+        file_read_tool = FileReadTool(os.getcwd(), mmap_threshold=mmap_threshold)
+        with open(f"{DIR_NAME}/crlf.txt", mode='wb') as fd:
+            fd.write(b"line 0\r\nline 1\r\nline 2\rline 3\r\n")
+
+        # The line breaks are translated the same way whole, memory-mapped or page by page
+        pages = []
+        content = file_read_tool.read_content(f"{DIR_NAME}/crlf.txt", **kwargs)
+        while "cursor=" in content:
+            cursor = content.split('cursor="')[1].split('"')[0]
+            pages.append(content[:content.rindex("\n[Content truncated")])
+            content = file_read_tool.read_content(f"{DIR_NAME}/crlf.txt", cursor=cursor)
+        pages.append(content)
+        assert "".join(pages) == "line 0\nline 1\nline 2\nline 3\n"
+
+    def test_read_max_bytes_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        for mmap_threshold in (1, 1024):
+            file_read_tool = FileReadTool(os.getcwd(), mmap_threshold=mmap_threshold, max_bytes=14)
+            content = file_read_tool.read_content(MANY_LINES_FILE_NAME)
+            assert content.startswith("line 0\n")
+            assert content.endswith("line 9\n")
+            assert "bytes omitted" in content
+            content = file_read_tool.read_content(MANY_LINES_FILE_NAME, limit=5)
+            assert content.startswith("line 0\nline 1\n\n")
+            assert "cursor=" in content
+
+    def test_init_failed_invalid_max_bytes(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError):
+            FileReadTool(os.getcwd(), max_bytes=0)
+
+    def test_read_cache_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        cache = FileContentCache()
+        file_read_tool = FileReadTool(os.getcwd(), cache=cache)
+        assert file_read_tool.read_content(FILE_NAME) == FILE_CONTENT
+        assert file_read_tool.read_content(FILE_NAME) == FILE_CONTENT
+        assert cache.hits == 1
+        assert cache.misses == 1
+        with open(FILE_NAME, "w", encoding="utf-8") as f:
+            f.write("Goodbye World!!!")
+        assert file_read_tool.read_content(FILE_NAME) == "Goodbye World!!!"
+        assert cache.misses == 2
+
+    def test_read_max_tokens_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        for mmap_threshold in (1, 1024):
+            file_read_tool = FileReadTool(os.getcwd(), mmap_threshold=mmap_threshold, max_tokens=4)
+            content = file_read_tool.read_content(MANY_LINES_FILE_NAME)
+            assert content == "line 0\nline 1\n\n[Content truncated at byte 14 to fit the budget of 4 tokens. To continue reading, call again with cursor=\"14:2:t0\".]"
+            assert file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor="14:2:t0").startswith("line 2\nline 3\n\n")
+            assert file_read_tool.read_content(MANY_LINES_FILE_NAME, cursor="63:9:t0") == "line 9\n"
+            content = file_read_tool.read_content(MANY_LINES_FILE_NAME, offset=3, limit=5)
+            assert content.startswith("line 3\nline 4\n\n")
+            assert "cursor=\"35:5:t0\"" in content
+
+    def test_read_max_tokens_estimator_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        file_read_tool = FileReadTool(os.getcwd(), max_tokens=6, token_estimator=lambda text: len(text.split()))
+        content = file_read_tool.read_content(MANY_LINES_FILE_NAME)
+        assert content.startswith("line 0\nline 1\nline 2\n\n")
+        file_read_tool = FileReadTool(os.getcwd(), max_tokens=20)
+        assert file_read_tool.read_content(MANY_LINES_FILE_NAME) == MANY_LINES_FILE_CONTENT
+
+    def test_init_failed_invalid_max_tokens(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_tokens' expected a positive integer"):
+            FileReadTool(os.getcwd(), max_tokens=0)
+
+    def test_read_binary_failed(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with open(f"{DIR_NAME}/image.png", mode='wb') as fd:
+            fd.write(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + bytes(range(256)))
+        file_read_tool = FileReadTool(os.getcwd())
+        with pytest.raises(ToolError, match="File is binary and cannot be read as text."):
+            file_read_tool.read_content(f"{DIR_NAME}/image.png")
+        file_read_tool = FileReadTool(os.getcwd(), binary_summary=True)
+        content = file_read_tool.read_content(f"{DIR_NAME}/image.png")
+        assert content.startswith(f"Binary file '{DIR_NAME}/image.png' (272 bytes, PNG image), first bytes:\n")
+        assert "00000000: 8950 4e47 0d0a 1a0a 0000 000d 4948 4452  .PNG........IHDR" in content
+        assert len(content.splitlines()) == 5
+
+    def test_read_encodings_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_read_tool = FileReadTool(os.getcwd())
+        with open(f"{DIR_NAME}/utf16.txt", mode='w', encoding='utf-16') as fd:
+            fd.write("Hello Wörld\n")
+        assert file_read_tool.read_content(f"{DIR_NAME}/utf16.txt") == "Hello Wörld\n"
+        with pytest.raises(ToolError, match="File is encoded in utf-16, so it can only be read entirely"):
+            file_read_tool.read_content(f"{DIR_NAME}/utf16.txt", limit=1)
+        with open(f"{DIR_NAME}/latin1.txt", mode='w', encoding='latin-1') as fd:
+            fd.write("Hello Wörld\nline 2\n")
+        assert file_read_tool.read_content(f"{DIR_NAME}/latin1.txt") == "Hello Wörld\nline 2\n"
+        assert file_read_tool.read_content(f"{DIR_NAME}/latin1.txt", offset=0, limit=1).startswith("Hello Wörld\n")
+        with open(f"{DIR_NAME}/bom.txt", mode='w', encoding='utf-8-sig') as fd:
+            fd.write("Hello")
+        assert file_read_tool.read_content(f"{DIR_NAME}/bom.txt") == "Hello"
+
+    def test_read_compressed_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        for suffix, opener in ((".gz", gzip.open), (".xz", lzma.open), (".bz2", bz2.open)):
+            with opener(f"{MANY_LINES_FILE_NAME}{suffix}", mode='wb') as fd:
+                fd.write(MANY_LINES_FILE_CONTENT.encode('utf-8'))
+            file_read_tool = FileReadTool(os.getcwd())
+            assert file_read_tool.read_content(f"{MANY_LINES_FILE_NAME}{suffix}") == MANY_LINES_FILE_CONTENT
+            content = file_read_tool.read_content(f"{MANY_LINES_FILE_NAME}{suffix}", offset=2, limit=2)
+            assert content == "line 2\nline 3\n\n[Content truncated after line 4. To continue reading, call again with cursor=\"28:4:l2\".]"
+            file_read_tool = FileReadTool(os.getcwd(), max_bytes=14)
+            content = file_read_tool.read_content(f"{MANY_LINES_FILE_NAME}{suffix}")
+            assert content == "line 0\nline 1\n\n[Content truncated at byte 14. To continue reading, call again with cursor=\"14:0:b14\".]"
+            assert file_read_tool.read_content(f"{MANY_LINES_FILE_NAME}{suffix}", cursor="14:0:b14").startswith("line 2\nline 3\n")
+
+    def test_read_archive_member_succeeded(self, setup_and_teardown_many_lines):
+        """
+        TBC
+        """
+
+        with zipfile.ZipFile(f"{DIR_NAME}/bundle.zip", mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("inner/bob.txt", MANY_LINES_FILE_CONTENT)
+            archive.writestr("image.png", b"\x89PNG\r\n\x1a\n\x00\x00")
+        with tarfile.open(f"{DIR_NAME}/bundle.tar.gz", mode='w:gz') as archive:
+            archive.add(MANY_LINES_FILE_NAME, arcname="inner/bob.txt")
+
+        file_read_tool = FileReadTool(os.getcwd())
+        for archive_name in (f"{DIR_NAME}/bundle.zip", f"{DIR_NAME}/bundle.tar.gz"):
+            assert file_read_tool.read_content(f"{archive_name}/inner/bob.txt") == MANY_LINES_FILE_CONTENT
+            assert file_read_tool.read_content(f"{archive_name}/inner/bob.txt", byte_start=7, byte_len=6).startswith("line 1\n")
+            assert "* inner/bob.txt (70 bytes)" in file_read_tool.read_content(archive_name)
+            with pytest.raises(ToolError, match="File does not exist."):
+                file_read_tool.read_content(f"{archive_name}/inner/alice.txt")
+        with pytest.raises(ToolError, match="File is binary and cannot be read as text."):
+            file_read_tool.read_content(f"{DIR_NAME}/bundle.zip/image.png")
+        with pytest.raises(ToolError, match="File does not exist."):
+            file_read_tool.read_content(f"{MANY_LINES_FILE_NAME}/inner")
+
+    def test_read_compressed_failed_corrupted(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with open(f"{DIR_NAME}/broken.gz", mode='wb') as fd:
+            fd.write(b"not gzip data")
+        file_read_tool = FileReadTool(os.getcwd())
+        with pytest.raises(ToolError, match="Compressed file cannot be read"):
+            file_read_tool.read_content(f"{DIR_NAME}/broken.gz")
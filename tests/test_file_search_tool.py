@@ -0,0 +1,120 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_search_tool import FileSearchTool # pylint: disable=C0413
+from src.yacana_tools.trigram_index import TrigramIndex # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestFileSearchTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.py", mode='w', encoding='utf-8') as fd:
+            fd.write("def alice():\n    return 1\n\nclass Bob:\n    pass\n")
+        with open(f"{DIR_NAME}/toto/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice = 2\nx\ny\nz\nw\nAlice\n")
+        with open(f"{DIR_NAME}/toto/data.bin", mode='wb') as fd:
+            fd.write(b"alice\0")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            FileSearchTool("bob")
+
+    def test_search_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FileSearchTool(DIR_NAME)
+        assert file_search_tool.search("alice") == "alice.py:1:def alice():\ntoto/bob.txt:1:alice = 2"
+        assert file_search_tool.search("alice", "toto", ignore_case=True) == "toto/bob.txt:1:alice = 2\ntoto/bob.txt:6:Alice"
+        assert file_search_tool.search(r"^class \w+:", regex=True) == "alice.py:4:class Bob:"
+        assert file_search_tool.search("martin") == "No match found."
+
+    def test_search_line_breaks_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        # Only '\n' ends a line, so the other line separators of Python do not shift the line numbers
+        with open(f"{DIR_NAME}/toto/breaks.txt", mode='w', encoding='utf-8', newline='') as fd:
+            fd.write("x\fy\x1c\u2028z\r\nneedle\r\n")
+        assert FileSearchTool(DIR_NAME).search("needle") == "toto/breaks.txt:2:needle"
+        assert FileSearchTool(DIR_NAME).search(r"y\W+z$", regex=True) == "toto/breaks.txt:1:x\fy\x1c\u2028z"
+
+    def test_search_context_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FileSearchTool(DIR_NAME)
+        content = file_search_tool.search("alice", "toto", ignore_case=True, context=1)
+        assert content == "toto/bob.txt:1:alice = 2\ntoto/bob.txt-2-x\n--\ntoto/bob.txt-5-w\ntoto/bob.txt:6:Alice"
+
+    def test_search_max_results_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FileSearchTool(DIR_NAME, max_results=1)
+        content = file_search_tool.search("alice", max_results=5)
+        assert content.startswith("alice.py:1:def alice():\n[Search stopped after 1 matches.")
+
+    def test_search_with_index_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        index = TrigramIndex(DIR_NAME)
+        file_search_tool = FileSearchTool(DIR_NAME, index=index)
+        assert file_search_tool.search("Bob") == "alice.py:4:class Bob:"
+        with open(f"{DIR_NAME}/toto/bob.txt", mode='a', encoding='utf-8') as fd:
+            fd.write("class Bob2:\n")
+        assert file_search_tool.search("class Bob", "toto") == "toto/bob.txt:7:class Bob2:"
+
+    def test_search_failed_invalid_arguments(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FileSearchTool(DIR_NAME)
+        with pytest.raises(ToolError, match="Pattern was not provided or is empty."):
+            file_search_tool.search("")
+        with pytest.raises(ToolError, match="Pattern is not a valid regular expression"):
+            file_search_tool.search("(alice", regex=True)
+        with pytest.raises(ToolError, match="Argument 'context' is not an integer."):
+            file_search_tool.search("alice", context="bob")
+        with pytest.raises(ToolError, match="Directory name is not in root directory."):
+            file_search_tool.search("alice", "..")
+        with pytest.raises(ToolError, match="Directory does not exist."):
+            file_search_tool.search("alice", "titi")
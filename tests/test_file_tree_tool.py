@@ -0,0 +1,215 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+from yacana import OllamaAgent, Task, MaxToolErrorIter, ToolError
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_tree_tool import FileTreeTool # pylint: disable=C0413
+
+AGENT_MODEL = "qwen3:4b-instruct"
+DIR_NAME = "tmp"
+
+class TestFileTreeTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/docs/sources").mkdir(parents=True, exist_ok=True)
+        pathlib.Path(f"{DIR_NAME}/docs/build/html/static").mkdir(parents=True, exist_ok=True)
+        pathlib.Path(f"{DIR_NAME}/src/package").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/docs/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice")
+        with open(f"{DIR_NAME}/src/package/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("bob")
+        with open(f"{DIR_NAME}/martin.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("martin")
+
+        yield
+
+        shutil.rmtree(DIR_NAME)
+
+    @pytest.fixture
+    def setup_and_teardown_many_files(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(DIR_NAME).mkdir(parents=True, exist_ok=True)
+        for index in range(10):
+            with open(f"{DIR_NAME}/file{index}.txt", mode='w', encoding='utf-8') as fd:
+                fd.write("alice")
+
+        yield
+
+        shutil.rmtree(DIR_NAME)
+
+    @pytest.fixture
+    def file_tree_tool(self):
+        """
+        TBC
+        """
+
+        return FileTreeTool(".", max_custom_error=0, max_call_error=0)
+
+    @pytest.fixture
+    def agent(self):
+        """
+        TBC
+        """
+
+        return OllamaAgent("Test", AGENT_MODEL, "You are test agent")
+
+    def test_init_succeeded(self):
+        """
+        TBC
+        """
+
+        try:
+            FileTreeTool(os.getcwd())
+        except ValueError:
+            assert False
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError):
+            FileTreeTool("bob")
+
+    def test_init_failed_invalid_max_depth(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError):
+            FileTreeTool(".", max_depth=0)
+
+    def test_tree_succeeded(self, setup_and_teardown, file_tree_tool):
+        """
+        TBC
+        """
+
+        assert file_tree_tool.get_file_tree(DIR_NAME).split("\n") == [
+            "tmp/",
+            "  docs/",
+            "    build/html/static/",
+            "    sources/",
+            "    alice.txt",
+            "  src/package/",
+            "    bob.txt",
+            "  martin.txt",
+        ]
+
+    def test_tree_thread_pool_succeeded(self, setup_and_teardown, file_tree_tool):
+        """
+        TBC
+        """
+
+        assert FileTreeTool(".", max_workers=4).get_file_tree(DIR_NAME) == file_tree_tool.get_file_tree(DIR_NAME)
+
+    def test_tree_max_depth_succeeded(self, setup_and_teardown, file_tree_tool):
+        """
+        TBC
+        """
+
+        assert file_tree_tool.get_file_tree(DIR_NAME, max_depth=1).split("\n") == [
+            "tmp/",
+            "  docs/ [...]",
+            "  src/ [...]",
+            "  martin.txt",
+        ]
+
+    def test_tree_max_dir_entries_succeeded(self, setup_and_teardown_many_files):
+        """
+        TBC
+        """
+
+        content = FileTreeTool(".", max_dir_entries=3).get_file_tree(DIR_NAME)
+        assert "file2.txt" in content
+        assert "file3.txt" not in content
+        assert "[... 7 more entries: 0 directories, 7 files]" in content
+
+    def test_tree_max_entries_succeeded(self, setup_and_teardown_many_files):
+        """
+        TBC
+        """
+
+        content = FileTreeTool(".", max_entries=4).get_file_tree(DIR_NAME)
+        assert "file3.txt" in content
+        assert "file4.txt" not in content
+        assert "Tree truncated" in content
+
+    def test_tree_max_entries_stops_listing_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_tree_tool = FileTreeTool(".", max_entries=2)
+        scanned = []
+        scan_dir = file_tree_tool._scan_dir # pylint: disable=W0212
+        file_tree_tool._scan_dir = lambda path, budget: scanned.append(budget) or scan_dir(path, budget) # pylint: disable=W0212
+        assert file_tree_tool.get_file_tree(DIR_NAME).split("\n") == [
+            "tmp/",
+            "  docs/ [...]",
+            "  src/ [...]",
+            "[Tree truncated after 2 entries. List a subdirectory to see more.]",
+        ]
+        assert scanned == [2]
+
+    def test_tree_dir_symlink_succeeded(self, setup_and_teardown, file_tree_tool):
+        """
+        TBC
+        """
+
+        os.symlink("docs", f"{DIR_NAME}/link")
+        assert file_tree_tool.get_file_tree(DIR_NAME).split("\n")[-2:] == [
+            "  link@",
+            "  martin.txt",
+        ]
+
+    def test_tree_failed_missing_dir(self, file_tree_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_tree_tool.get_file_tree("bob")
+
+    def test_tree_failed_not_canonical_path(self, file_tree_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_tree_tool.get_file_tree("../tmp")
+
+    def test_llm_succeeded(self, setup_and_teardown, file_tree_tool, agent):
+        """
+        TBC
+        """
+
+        task = Task(f"Get the tree of all files and directories under the directory '{DIR_NAME}' and output only the content.", agent, tools=[file_tree_tool])
+        try:
+            result = task.solve()
+            assert "alice.txt" in result.content
+            assert "bob.txt" in result.content
+            assert "martin.txt" in result.content
+        except MaxToolErrorIter:
+            assert False
@@ -0,0 +1,107 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_usage_tool import FileUsageTool # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestFileUsageTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/docs/build").mkdir(parents=True, exist_ok=True)
+        pathlib.Path(f"{DIR_NAME}/src").mkdir(parents=True, exist_ok=True)
+        pathlib.Path(f"{DIR_NAME}/empty").mkdir(parents=True, exist_ok=True)
+        for name, size in (("README.md", 100), ("docs/alice.txt", 2000), ("docs/build/bob.html", 3000),
+                           ("src/main.py", 500), ("src/util.py", 700), ("src/Makefile", 10)):
+            with open(f"{DIR_NAME}/{name}", mode='wb') as fd:
+                fd.write(b"x" * size)
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_limits(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            FileUsageTool("bob")
+        with pytest.raises(ValueError, match="Parameter 'top' expected a positive integer"):
+            FileUsageTool(top=0)
+
+    def test_init_bounds_default_workers(self):
+        """
+        TBC
+        """
+
+        assert 1 <= FileUsageTool().max_workers <= 8
+
+    def test_usage_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        for max_workers, parallel_threshold in ((1, 20000), (2, 1)):
+            file_usage_tool = FileUsageTool(os.getcwd(), top=2, max_workers=max_workers, parallel_threshold=parallel_threshold)
+            assert file_usage_tool.get_usage(DIR_NAME) == "\n".join([
+                f"{DIR_NAME}/: 6.2 KiB in 6 files and 4 directories.",
+                "Largest directories:",
+                "* docs/: 4.9 KiB in 2 files",
+                "* src/: 1.2 KiB in 3 files",
+                "[1 smaller directories omitted.]",
+                "Largest files:",
+                f"* {DIR_NAME}/docs/build/bob.html: 2.9 KiB",
+                f"* {DIR_NAME}/docs/alice.txt: 2.0 KiB",
+                "Files by extension:",
+                "* .html: 1 files, 2.9 KiB",
+                "* .txt: 1 files, 2.0 KiB",
+                "[3 other extensions omitted.]",
+            ])
+
+        file_usage_tool = FileUsageTool(os.getcwd(), max_workers=1)
+        content = file_usage_tool.get_usage(f"{DIR_NAME}/src", top=1)
+        assert content == "\n".join([
+            f"{DIR_NAME}/src/: 1.2 KiB in 3 files and 0 directories.",
+            "Largest files:",
+            f"* {DIR_NAME}/src/util.py: 700 B",
+            "Files by extension:",
+            "* .py: 2 files, 1.2 KiB",
+            "[1 other extensions omitted.]",
+        ])
+
+    def test_usage_failed(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_usage_tool = FileUsageTool(os.getcwd(), max_workers=1)
+        with pytest.raises(ToolError, match="Directory does not exist."):
+            file_usage_tool.get_usage(f"{DIR_NAME}/martin")
+        with pytest.raises(ToolError, match="Argument 'top' must be greater than 0."):
+            file_usage_tool.get_usage(DIR_NAME, top=0)
+        with pytest.raises(ToolError, match="Argument 'top' is not an integer."):
+            file_usage_tool.get_usage(DIR_NAME, top=1.5)
+        with pytest.raises(ToolError, match="Directory name is not in root directory."):
+            file_usage_tool.get_usage("..")
@@ -10,10 +10,12 @@ import shutil
 import sys
 
 import pytest
-from yacana import OllamaAgent, Task, MaxToolErrorIter
+from yacana import OllamaAgent, Task, MaxToolErrorIter, ToolError
 
 path = os.getcwd()
 sys.path.append(path)
+from src.yacana_tools import text_edit # pylint: disable=C0413
+from src.yacana_tools import text_encoding # pylint: disable=C0413
 from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
 
 AGENT_MODEL = "qwen3:4b-instruct"
@@ -233,3 +235,176 @@ class TestFileWriteTool:
                 assert content[0].find(FILE_CONTENT) != -1
         except MaxToolErrorIter:
             assert False
+
+    def test_init_failed_invalid_fsync(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError):
+            FileWriteTool(os.getcwd(), fsync="always")
+
+    def test_write_succeeded(self, setup_and_teardown, file_write_tool):
+        """
+        TBC
+        """
+
+        result = file_write_tool.write_content(FILE_NAME, FILE_CONTENT)
+        assert "in-place write" in result
+        assert "fsync policy: none" in result
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == FILE_CONTENT
+
+    @pytest.mark.parametrize("fsync", ["none", "file", "file+dir"])
+    def test_write_atomic_succeeded(self, setup_and_teardown_existing_file, fsync):
+        """
+        TBC
+        """
+
+        os.chmod(FILE_NAME, 0o640)
+        file_write_tool = FileWriteTool(os.getcwd(), force=True, atomic=True, fsync=fsync)
+        result = file_write_tool.write_content(FILE_NAME, FILE_CONTENT)
+        assert "atomic write" in result
+        assert f"fsync policy: {fsync}" in result
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == FILE_CONTENT
+        assert os.listdir(DIR_NAME) == ["alice.txt"]
+        if os.name != "nt":
+            assert os.stat(FILE_NAME).st_mode & 0o777 == 0o640
+
+    def test_write_append_succeeded(self, setup_and_teardown_existing_file, file_write_tool_with_force):
+        """
+        TBC
+        """
+
+        file_write_tool_with_force.write_content(FILE_NAME, FILE_CONTENT, mode="append")
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == FILE_NAME + FILE_CONTENT
+
+    def test_write_append_existing_file_succeeded(self, setup_and_teardown_existing_file, file_write_tool):
+        """
+        TBC
+        """
+
+        assert file_write_tool.write_content(FILE_NAME, FILE_CONTENT, mode="append").startswith("Content appended")
+
+    def test_write_replace_succeeded(self, setup_and_teardown, file_write_tool_with_force, monkeypatch):
+        """
+        TBC
+        """
+
+        monkeypatch.setattr(text_edit, "CHUNK_SIZE", 4)
+        with open(FILE_NAME, mode='w', encoding='utf-8') as fd:
+            fd.write("alice and bob and alice")
+        result = file_write_tool_with_force.write_content(FILE_NAME, "martin", mode="replace", search="alice")
+        assert "Replaced 2 occurrence(s)" in result
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "martin and bob and martin"
+
+    def test_write_replace_failed_not_found(self, setup_and_teardown, file_write_tool_with_force):
+        """
+        TBC
+        """
+
+        with open(FILE_NAME, mode='w', encoding='utf-8') as fd:
+            fd.write(FILE_CONTENT)
+        with pytest.raises(ToolError):
+            file_write_tool_with_force.write_content(FILE_NAME, "martin", mode="replace", search="alice")
+        assert os.listdir(DIR_NAME) == ["alice.txt"]
+
+    @pytest.mark.parametrize("start_line,end_line,content,expected", [
+        (2, None, "X", "a\nX\nc\n"),
+        (2, 3, "X\n", "a\nX\n"),
+        (2, 1, "X", "a\nX\nb\nc\n"),
+        (4, None, "X\n", "a\nb\nc\nX\n"),
+        (1, 2, "", "c\n"),
+    ])
+    def test_write_lines_succeeded(self, setup_and_teardown, file_write_tool_with_force, start_line, end_line, content, expected):
+        """
+        TBC
+        """
+
+        with open(FILE_NAME, mode='w', encoding='utf-8') as fd:
+            fd.write("a\nb\nc\n")
+        file_write_tool_with_force.write_content(FILE_NAME, content, mode="lines", start_line=start_line, end_line=end_line)
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == expected
+
+    def test_write_lines_failed_after_end(self, setup_and_teardown, file_write_tool_with_force):
+        """
+        TBC
+        """
+
+        with open(FILE_NAME, mode='w', encoding='utf-8') as fd:
+            fd.write("a\nb\nc\n")
+        with pytest.raises(ToolError):
+            file_write_tool_with_force.write_content(FILE_NAME, "X", mode="lines", start_line=9)
+
+    @pytest.mark.parametrize("mode,kwargs,expected", [
+        ("append", {}, "a\nb\nX"),
+        ("replace", {"search": "b"}, "a\nX\n"),
+        ("lines", {"start_line": 1}, "X\nb\n"),
+    ])
+    def test_write_edit_without_force_succeeded(self, setup_and_teardown, file_write_tool, mode, kwargs, expected):
+        """
+        TBC
+        """
+
+        # An edit changes an existing file, which only the "write" mode cannot replace without 'force'
+        with open(FILE_NAME, mode='w', encoding='utf-8') as fd:
+            fd.write("a\nb\n")
+        file_write_tool.write_content(FILE_NAME, "X", mode=mode, **kwargs)
+        with open(FILE_NAME, mode='r', encoding='utf-8') as fd:
+            assert fd.read() == expected
+        with pytest.raises(ToolError, match="File already exists but cannot be overwritten."):
+            file_write_tool.write_content(FILE_NAME, "X")
+
+    def test_write_failed_invalid_mode(self, setup_and_teardown, file_write_tool):
+        """
+        TBC
+        """
+
+        with pytest.raises(ToolError):
+            file_write_tool.write_content(FILE_NAME, FILE_CONTENT, mode="truncate")
+
+    @pytest.mark.parametrize("mode,kwargs,expected", [
+        ("replace", {"search": "line2\n"}, b"caf\xe9\nd\xe9j\xe0\n"),
+        ("lines", {"start_line": 2}, b"caf\xe9\nd\xe9j\xe0\n"),
+        ("append", {}, b"caf\xe9\nline2\nd\xe9j\xe0\n"),
+    ])
+    def test_write_edit_latin1_succeeded(self, setup_and_teardown, file_write_tool_with_force, mode, kwargs, expected):
+        """
+        TBC
+        """
+
+        with open(FILE_NAME, mode='wb') as fd:
+            fd.write(b"caf\xe9\nline2\n")
+        file_write_tool_with_force.write_content(FILE_NAME, "déjà\n", mode=mode, **kwargs)
+        with open(FILE_NAME, mode='rb') as fd:
+            assert fd.read() == expected
+
+    def test_write_edit_failed_not_encodable(self, setup_and_teardown, file_write_tool_with_force):
+        """
+        TBC
+        """
+
+        with open(FILE_NAME, mode='wb') as fd:
+            fd.write(b"caf\xe9\nline2\n")
+        with pytest.raises(ToolError):
+            file_write_tool_with_force.write_content(FILE_NAME, "€", mode="replace", search="line2")
+        with open(FILE_NAME, mode='rb') as fd:
+            assert fd.read() == b"caf\xe9\nline2\n"
+        assert os.listdir(DIR_NAME) == ["alice.txt"]
+
+    def test_write_edit_failed_invalid_utf8(self, setup_and_teardown, file_write_tool_with_force, monkeypatch):
+        """
+        TBC
+        """
+
+        monkeypatch.setattr(text_encoding, "SNIFF_SIZE", 4)
+        with open(FILE_NAME, mode='wb') as fd:
+            fd.write(b"abcd\nline2 \xff\n")
+        with pytest.raises(ToolError):
+            file_write_tool_with_force.write_content(FILE_NAME, "X", mode="lines", start_line=1)
+        with open(FILE_NAME, mode='rb') as fd:
+            assert fd.read() == b"abcd\nline2 \xff\n"
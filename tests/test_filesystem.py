@@ -0,0 +1,216 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools import text_encoding # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from src.yacana_tools.filesystem import ArchiveFileSystem, FileSystem, LocalFileSystem, MemoryFileSystem # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestFileSystem:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/src/alice").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/src/alice/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice\nbob\n")
+        with open(f"{DIR_NAME}/src/martin.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("martin\n")
+
+        yield
+
+        shutil.rmtree(DIR_NAME)
+
+    def test_memory_init_failed_invalid_path(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'files' expected relative file paths"):
+            MemoryFileSystem({"../alice.txt": "alice"})
+
+    def test_memory_tools_succeeded(self):
+        """
+        TBC
+        """
+
+        backend = MemoryFileSystem({"src/alice/alice.txt": "alice\nbob\n", "src/martin.txt": b"martin\n"})
+        list_tool = FileListTool("src", backend=backend)
+        read_tool = FileReadTool("src", backend=backend)
+        write_tool = FileWriteTool("src", create_dir=True, force=True, backend=backend)
+
+        assert list_tool.get_file_list() == "* [directory] alice\n* [file] martin.txt"
+        assert read_tool.read_content("alice/alice.txt") == "alice\nbob\n"
+        assert read_tool.read_content("alice/alice.txt", offset=1, limit=1) == "bob\n"
+
+        assert write_tool.write_content("bob/bob.txt", "bob\n") == "Content written to file 'bob/bob.txt' (backend write)."
+        assert write_tool.write_content("bob/bob.txt", "martin\n", mode="append") == "Content appended to file 'bob/bob.txt' (backend write)."
+        assert write_tool.write_content("bob/bob.txt", "alice", mode="replace", search="martin") == "Replaced 1 occurrence(s) in file 'bob/bob.txt' (backend write)."
+        assert write_tool.write_content("bob/bob.txt", "toto\n", mode="lines", start_line=1) == "Replaced lines 1 to 1 in file 'bob/bob.txt' (backend write)."
+        assert read_tool.read_content("bob/bob.txt") == "toto\nalice\n"
+        assert list_tool.get_file_list("bob", details=True).startswith("* [file] bob.txt (11 bytes, modified ")
+        # Nothing is written to the local disk
+        assert not os.path.exists("src/bob")
+
+    def test_memory_tools_failed(self):
+        """
+        TBC
+        """
+
+        backend = MemoryFileSystem({"alice.txt": "alice"})
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            FileReadTool("alice.txt", backend=backend)
+        with pytest.raises(ToolError, match="File does not exist."):
+            FileReadTool(backend=backend).read_content("bob.txt")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            FileReadTool(backend=backend).read_content("../alice.txt")
+        with pytest.raises(ToolError, match="Directory does not exist."):
+            FileListTool(backend=backend).get_file_list("bob")
+        with pytest.raises(ToolError, match="File already exists but cannot be overwritten."):
+            FileWriteTool(backend=backend).write_content("alice.txt", "bob")
+        with pytest.raises(ToolError, match="File cannot be written because directory does not exist."):
+            FileWriteTool(backend=backend).write_content("bob/bob.txt", "bob")
+
+    def test_memory_edit_latin1_succeeded(self):
+        """
+        TBC
+        """
+
+        backend = MemoryFileSystem({"b.txt": b"caf\xe9\nline2\n"})
+        write_tool = FileWriteTool(force=True, backend=backend)
+        write_tool.write_content("b.txt", "d\xe9j\xe0\n", mode="lines", start_line=2)
+        assert backend.read_bytes("b.txt") == b"caf\xe9\nd\xe9j\xe0\n"
+        with pytest.raises(ToolError, match="Content cannot be encoded in latin-1"):
+            write_tool.write_content("b.txt", "\u20ac", mode="replace", search="caf")
+        assert backend.read_bytes("b.txt") == b"caf\xe9\nd\xe9j\xe0\n"
+
+    def test_memory_edit_failed_invalid_utf8(self, monkeypatch):
+        """
+        TBC
+        """
+
+        monkeypatch.setattr(text_encoding, "SNIFF_SIZE", 4)
+        backend = MemoryFileSystem({"b.txt": b"abcd\nline2 \xff\n"})
+        with pytest.raises(ToolError, match="File is not valid utf-8 text"):
+            FileWriteTool(force=True, backend=backend).write_content("b.txt", "X", mode="lines", start_line=1)
+        assert backend.read_bytes("b.txt") == b"abcd\nline2 \xff\n"
+
+    @pytest.mark.parametrize("archive_format", ["zip", "gztar"])
+    def test_archive_tools_succeeded(self, setup_and_teardown, archive_format):
+        """
+        TBC
+        """
+
+        archive_file = shutil.make_archive(f"{DIR_NAME}/snapshot", archive_format, f"{DIR_NAME}/src")
+        with ArchiveFileSystem(archive_file) as backend:
+            assert FileListTool(backend=backend).get_file_list() == "* [directory] alice\n* [file] martin.txt"
+            assert FileReadTool("alice", backend=backend).read_content("alice.txt") == "alice\nbob\n"
+            with pytest.raises(ToolError, match="Read-only file system"):
+                FileWriteTool(backend=backend, force=True).write_content("martin.txt", "alice")
+
+    def test_archive_implied_dirs_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with zipfile.ZipFile(f"{DIR_NAME}/snapshot.zip", mode='w') as archive:
+            archive.writestr("alice/bob/martin.txt", "martin")
+            archive.writestr("../evil.txt", "evil")
+        with tarfile.open(f"{DIR_NAME}/snapshot.tar", mode='w') as archive:
+            archive.add(f"{DIR_NAME}/src/martin.txt", "./martin.txt")
+        with ArchiveFileSystem(f"{DIR_NAME}/snapshot.zip") as backend:
+            assert FileListTool(backend=backend).get_file_list() == "* [directory] alice"
+            assert FileReadTool(backend=backend).read_content("alice/bob/martin.txt") == "martin"
+        with ArchiveFileSystem(f"{DIR_NAME}/snapshot.tar") as backend:
+            assert FileReadTool(backend=backend).read_content("martin.txt") == "martin\n"
+
+    def test_archive_init_failed_invalid_archive(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'archive_file' expected a zip or tar archive"):
+            ArchiveFileSystem(f"{DIR_NAME}/src/martin.txt")
+        with pytest.raises(ValueError, match="Parameter 'archive_file' expected a valid file"):
+            ArchiveFileSystem(f"{DIR_NAME}/missing.zip")
+
+    def test_local_tools_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        backend = LocalFileSystem(DIR_NAME)
+        write_tool = FileWriteTool("src", force=True, backend=backend)
+        write_tool.write_content("martin.txt", "alice", mode="replace", search="martin")
+        assert FileReadTool("src", backend=backend).read_content("martin.txt") == "alice\n"
+        with open(f"{DIR_NAME}/src/martin.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "alice\n"
+        assert FileListTool("src", backend=backend).get_file_list() == "* [directory] alice\n* [file] martin.txt"
+
+    def test_local_read_streamed_succeeded(self, setup_and_teardown, monkeypatch):
+        """
+        TBC
+        """
+
+        def read_bytes(self, path):
+            raise AssertionError("The whole file is read")
+
+        # A window of a file of the local disk is read without loading the whole file
+        monkeypatch.setattr(LocalFileSystem, "read_bytes", read_bytes)
+        read_tool = FileReadTool("src", max_bytes=4, backend=LocalFileSystem(DIR_NAME))
+        assert read_tool.read_content("alice/alice.txt", offset=1, limit=1) == "bob\n"
+        assert read_tool.read_content("alice/alice.txt", byte_start=6, byte_len=3).startswith("bob\n[Content truncated")
+
+    def test_init_failed_incomplete_backend(self):
+        """
+        TBC
+        """
+
+        class IncompleteFileSystem(FileSystem): # pylint: disable=W0223
+            """
+            TBC
+            """
+
+            def stat(self, path):
+                return None
+
+        with pytest.raises(TypeError, match="abstract"):
+            IncompleteFileSystem()
+
+    def test_archive_init_failed_closed(self, setup_and_teardown, monkeypatch):
+        """
+        TBC
+        """
+
+        closed = []
+        close = ArchiveFileSystem.close
+        monkeypatch.setattr(ArchiveFileSystem, "_index", lambda self, members, archive_mtime: 1 / 0)
+        monkeypatch.setattr(ArchiveFileSystem, "close", lambda self: closed.append(self._zip) or close(self))
+        archive_file = shutil.make_archive(f"{DIR_NAME}/snapshot", "zip", f"{DIR_NAME}/src")
+        with pytest.raises(ZeroDivisionError):
+            ArchiveFileSystem(archive_file)
+        assert len(closed) == 1 and closed[0].fp is None
@@ -0,0 +1,139 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.full_text_index import FullTextIndex # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+INDEX_FILE_NAME = "tmp_full_text_index.db"
+
+class TestFullTextIndex:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        for index in range(30):
+            with open(f"{DIR_NAME}/toto/file{index}.txt", mode='w', encoding='utf-8') as fd:
+                fd.write(f"Document {index} about yacana tools")
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Alice meets Bob in Wonderland")
+        with open(f"{DIR_NAME}/data.bin", mode='wb') as fd:
+            fd.write(b"Wonderland\0")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(INDEX_FILE_NAME + suffix):
+                os.remove(INDEX_FILE_NAME + suffix)
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            FullTextIndex("bob")
+
+    def test_init_failed_missing_fts5(self, setup_and_teardown, monkeypatch):
+        """
+        TBC
+        """
+
+        connect = sqlite3.connect
+
+        class Connection:
+            """
+            TBC
+            """
+
+            def __init__(self, *args, **kwargs):
+                self.connection = connect(*args, **kwargs)
+
+            def execute(self, sql, *args):
+                """
+                TBC
+                """
+
+                if "fts5" in sql:
+                    raise sqlite3.OperationalError("no such function: fts5")
+                return self.connection.execute(sql, *args)
+
+            def close(self):
+                """
+                TBC
+                """
+
+                self.connection.close()
+
+        monkeypatch.setattr(sqlite3, "connect", Connection)
+        with pytest.raises(ValueError, match="SQLite is built without the FTS5 extension"):
+            FullTextIndex(DIR_NAME)
+
+    def test_init_bounds_default_workers(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with FullTextIndex(DIR_NAME) as index:
+            assert 1 <= index.max_workers <= 8
+
+    def test_query_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with FullTextIndex(DIR_NAME, refresh_interval=0) as index:
+            assert index.query("wonderland") == [("alice.txt", "Alice meets Bob in [Wonderland]")]
+            assert index.query("alice tools") == []
+            assert len(index.query("alice tools", limit=100, match_all=False)) == 31
+            assert len(index.query("alice tools", match_all=False)) == 20
+            assert len(index.query("yacana", "toto", limit=100)) == 30
+            assert index.query("alice", "toto") == []
+            assert index.query("!!!") == []
+
+    def test_refresh_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with FullTextIndex(DIR_NAME, batch_size=8, max_workers=2) as index:
+            assert index.refresh() == 32
+            assert len(index) == 31
+            assert index.refresh() == 0
+            with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+                fd.write("Alice meets Martin")
+            os.remove(f"{DIR_NAME}/toto/file0.txt")
+            assert index.refresh(force=True) == 2
+            assert index.query("martin") == [("alice.txt", "Alice meets [Martin]")]
+            assert len(index) == 30
+
+    def test_persistence_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with FullTextIndex(DIR_NAME, index_file=INDEX_FILE_NAME) as index:
+            index.refresh()
+        with FullTextIndex(DIR_NAME, index_file=INDEX_FILE_NAME) as index:
+            assert len(index) == 31
+            assert index.refresh() == 0
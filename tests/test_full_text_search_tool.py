@@ -0,0 +1,83 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.full_text_index import FullTextIndex # pylint: disable=C0413
+from src.yacana_tools.full_text_search_tool import FullTextSearchTool # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestFullTextSearchTool:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Alice meets Bob in Wonderland")
+        with open(f"{DIR_NAME}/toto/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Bob stays at home")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_index(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'index' expected an index of a directory holding 'root_dir'"):
+            FullTextSearchTool(DIR_NAME, index=FullTextIndex(f"{DIR_NAME}/toto"))
+
+    def test_search_keywords_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FullTextSearchTool(DIR_NAME)
+        assert file_search_tool.search_keywords("wonderland") == "* alice.txt: Alice meets Bob in [Wonderland]"
+        assert file_search_tool.search_keywords("bob", "toto") == "* toto/bob.txt: [Bob] stays at home"
+        assert file_search_tool.search_keywords("home alice", match_all="false").count("\n") == 1
+        # Only "true", "1" and "yes" are true, like for the other tools
+        assert file_search_tool.search_keywords("home alice", match_all="n").count("\n") == 1
+        assert file_search_tool.search_keywords("martin") == "No match found."
+
+    def test_search_keywords_subdir_root_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FullTextSearchTool(f"{DIR_NAME}/toto", index=FullTextIndex(DIR_NAME))
+        assert file_search_tool.search_keywords("bob") == "* bob.txt: [Bob] stays at home"
+
+    def test_search_keywords_failed(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        file_search_tool = FullTextSearchTool(DIR_NAME)
+        with pytest.raises(ToolError, match="Keywords were not provided or are empty."):
+            file_search_tool.search_keywords(" ")
+        with pytest.raises(ToolError, match="Directory name is not in root directory."):
+            file_search_tool.search_keywords("bob", "..")
+        with pytest.raises(ToolError, match="Directory does not exist."):
+            file_search_tool.search_keywords("bob", "titi")
@@ -0,0 +1,108 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from src.yacana_tools.filesystem import ArchiveFileSystem, LocalFileSystem # pylint: disable=C0413
+from src.yacana_tools.overlay_filesystem import OverlayFileSystem, _clone_file # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestOverlayFileSystem:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/src/alice").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/src/alice/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice\nbob\n")
+        with open(f"{DIR_NAME}/src/martin.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("martin\n")
+
+        yield
+
+        shutil.rmtree(DIR_NAME)
+
+    @pytest.mark.parametrize("scratch", [False, True])
+    def test_overlay_commit_succeeded(self, setup_and_teardown, scratch):
+        """
+        TBC
+        """
+
+        scratch_dir = None
+        if scratch:
+            scratch_dir = f"{DIR_NAME}/scratch"
+            pathlib.Path(scratch_dir).mkdir()
+        os.chmod(f"{DIR_NAME}/src/martin.txt", 0o600)
+        backend = OverlayFileSystem(LocalFileSystem(f"{DIR_NAME}/src"), scratch_dir)
+        write_tool = FileWriteTool(create_dir=True, force=True, backend=backend)
+        write_tool.write_content("martin.txt", "bob", mode="replace", search="martin")
+        write_tool.write_content("bob/bob.txt", "bob\n")
+
+        # The writes are only seen through the overlay
+        assert FileReadTool(backend=backend).read_content("martin.txt") == "bob\n"
+        assert FileListTool(backend=backend).get_file_list() == "* [directory] alice\n* [directory] bob\n* [file] martin.txt"
+        assert FileListTool(f"{DIR_NAME}/src").get_file_list() == "* [directory] alice\n* [file] martin.txt"
+        assert backend.changed_files() == ["martin.txt", "bob/bob.txt"]
+
+        assert backend.commit() == 2
+        assert not backend.changed_files()
+        with open(f"{DIR_NAME}/src/martin.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "bob\n"
+        with open(f"{DIR_NAME}/src/bob/bob.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "bob\n"
+        assert os.stat(f"{DIR_NAME}/src/martin.txt").st_mode & 0o777 == 0o600
+
+    def test_overlay_discard_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        backend = OverlayFileSystem(LocalFileSystem(f"{DIR_NAME}/src"))
+        FileWriteTool(force=True, backend=backend).write_content("martin.txt", "alice\n")
+        assert FileReadTool(backend=backend).read_content("martin.txt") == "alice\n"
+        backend.discard()
+        assert FileReadTool(backend=backend).read_content("martin.txt") == "martin\n"
+        assert backend.commit() == 0
+
+    def test_overlay_archive_failed_commit(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        archive_file = shutil.make_archive(f"{DIR_NAME}/snapshot", "zip", f"{DIR_NAME}/src")
+        with ArchiveFileSystem(archive_file) as archive:
+            backend = OverlayFileSystem(archive)
+            FileWriteTool(force=True, backend=backend).write_content("martin.txt", "alice\n", mode="append")
+            assert FileReadTool(backend=backend).read_content("martin.txt") == "martin\nalice\n"
+            with pytest.raises(OSError, match="Read-only file system"):
+                backend.commit()
+
+    def test_clone_file_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with open(f"{DIR_NAME}/src/martin.txt", mode='rb') as source, open(f"{DIR_NAME}/clone.txt", mode='xb') as target:
+            _clone_file(source, target)
+        with open(f"{DIR_NAME}/clone.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "martin\n"
@@ -0,0 +1,132 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.path_resolver import PathResolver # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestPathResolver:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/root/toto").mkdir(parents=True, exist_ok=True)
+        pathlib.Path(f"{DIR_NAME}/root2").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/root/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice")
+        with open(f"{DIR_NAME}/root2/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("bob")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            PathResolver("bob")
+
+    def test_resolve_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        resolver = PathResolver(f"{DIR_NAME}/root")
+        resolved = resolver.resolve("toto/../alice.txt")
+        assert resolved.long_name == os.path.abspath(f"{DIR_NAME}/root/alice.txt")
+        assert resolved.is_file()
+        assert resolved.stat_result.st_size == 5
+        assert resolver.resolve("toto", "Directory").is_dir()
+        assert not resolver.resolve("bob.txt").exists()
+        assert resolver.resolve("bob.txt", stat_path=False).stat_result is None
+
+    def test_resolve_failed_invalid_name(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        resolver = PathResolver(f"{DIR_NAME}/root")
+        with pytest.raises(ToolError, match="File name was not provided or None."):
+            resolver.resolve("")
+        with pytest.raises(ToolError, match="Directory name is not a relative path."):
+            resolver.resolve("/toto", "Directory")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            resolver.resolve("../alice.txt")
+
+    def test_resolve_failed_sibling_dir(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        resolver = PathResolver(f"{DIR_NAME}/root")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            resolver.resolve("../root2/bob.txt")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            FileReadTool(f"{DIR_NAME}/root").read_content("../root2/bob.txt")
+
+    def test_resolve_failed_symlink_out_of_root(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        os.symlink(os.path.abspath(f"{DIR_NAME}/root2"), f"{DIR_NAME}/root/link")
+        os.symlink("alice.txt", f"{DIR_NAME}/root/alice_link.txt")
+        resolver = PathResolver(f"{DIR_NAME}/root")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            resolver.resolve("link/bob.txt")
+        assert resolver.resolve("alice_link.txt").is_file()
+
+    def test_resolve_cache_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        resolver = PathResolver(f"{DIR_NAME}/root", cache_size=1)
+        assert resolver.resolve("alice.txt").exists()
+        os.remove(f"{DIR_NAME}/root/alice.txt")
+        # The validated path is cached, but its status is always fresh
+        assert not resolver.resolve("alice.txt").exists()
+        resolver.resolve("toto")
+        assert list(resolver._cache) == ["toto"] # pylint: disable=W0212
+        resolver.clear()
+        assert not resolver._cache # pylint: disable=W0212
+
+    def test_resolve_failed_cached_symlink_swap(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with open(f"{DIR_NAME}/root2/secret.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("secret")
+        pathlib.Path(f"{DIR_NAME}/root/toto/secret.txt").touch()
+        file_read_tool = FileReadTool(f"{DIR_NAME}/root")
+        assert file_read_tool.read_content("toto/secret.txt") == ""
+
+        # The cached path is replaced by a symbolic link to a directory out of the root directory
+        shutil.rmtree(f"{DIR_NAME}/root/toto")
+        os.symlink(os.path.abspath(f"{DIR_NAME}/root2"), f"{DIR_NAME}/root/toto")
+        with pytest.raises(ToolError, match="File name is not in root directory."):
+            file_read_tool.read_content("toto/secret.txt")
@@ -0,0 +1,152 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_read_many_tool import FileReadManyTool # pylint: disable=C0413
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from src.yacana_tools.read_session import ReadSession # pylint: disable=C0413
+from src.yacana_tools.tool_metrics import ToolMetrics # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestReadSession:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(DIR_NAME).mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("".join(f"alice {index}\n" for index in range(200)))
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_limits(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_files' expected a positive integer"):
+            ReadSession(0)
+        with pytest.raises(ValueError, match="Parameter 'max_diff_ratio' expected a positive number"):
+            ReadSession(max_diff_ratio=0)
+
+    def test_put_evicts_least_recently_read(self):
+        """
+        TBC
+        """
+
+        session = ReadSession(2)
+        session.put("/tmp/alice.txt", None, "alice")
+        session.put("/tmp/bob.txt", None, "bob")
+        assert session.get("/tmp/alice.txt") == (None, "alice")
+        session.put("/tmp/martin.txt", None, "martin")
+        assert session.get("/tmp/bob.txt") is None
+        session.forget("/tmp/alice.txt")
+        assert len(session) == 1
+        session.forget()
+        assert len(session) == 0
+
+    def test_read_unchanged_and_diff(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        calls = []
+        session = ReadSession()
+        read_tool = FileReadTool(DIR_NAME, session=session, metrics=ToolMetrics(callback=calls.append))
+        content = read_tool.function_ref("alice.txt")
+        assert content.startswith("alice 0\n")
+        assert read_tool.function_ref("alice.txt") == "File is unchanged since last read."
+        # An unchanged file is not read again
+        assert calls[1].bytes_read == 0 and calls[1].cache_hits == 1
+
+        FileWriteTool(DIR_NAME, force=True).write_content("alice.txt", "bob 10\n", mode="replace", search="alice 10\n")
+        assert read_tool.read_content("alice.txt") == "\n".join([
+            "File changed since last read, unified diff against the last read:",
+            "--- a/alice.txt", "+++ b/alice.txt", "@@ -8,7 +8,7 @@",
+            " alice 7", " alice 8", " alice 9", "-alice 10", "+bob 10", " alice 11", " alice 12", " alice 13"])
+        assert session.unchanged == 1 and session.diffs == 1
+
+        # Slices and forced reads return the content
+        assert read_tool.read_content("alice.txt", offset=10, limit=1).startswith("bob 10\n\n[Content truncated")
+        assert read_tool.read_content("alice.txt", full=True) == content.replace("alice 10\n", "bob 10\n")
+
+    def test_read_large_diff_returns_content(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        read_tool = FileReadTool(DIR_NAME, session=ReadSession())
+        read_tool.read_content("alice.txt")
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("bob\n")
+        assert read_tool.read_content("alice.txt") == "bob\n"
+
+    def test_read_many_shares_session(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        session = ReadSession()
+        FileReadTool(DIR_NAME, session=session).read_content("alice.txt")
+        assert FileReadManyTool(DIR_NAME, session=session).read_many(["alice.txt"]) == "===== alice.txt =====\nFile is unchanged since last read."
+
+    def test_read_truncated_not_remembered(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        session = ReadSession()
+        read_tool = FileReadTool(DIR_NAME, max_bytes=100, session=session)
+        content = read_tool.read_content("alice.txt")
+        assert "bytes omitted" in content
+        assert read_tool.read_content("alice.txt") == content
+        assert len(session) == 0
+
+        read_tool = FileReadTool(DIR_NAME, max_tokens=100, session=session)
+        content = read_tool.read_content("alice.txt")
+        assert "[Content truncated" in content
+        assert read_tool.read_content("alice.txt") == content
+        assert len(session) == 0
+
+    def test_read_changed_during_read_not_trusted(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        session = ReadSession()
+        read_tool = FileReadTool(DIR_NAME, session=session)
+        read_content = read_tool._read_content # pylint: disable=W0212
+
+        def read_and_change(file_name):
+            content = read_content(file_name)
+            with open(f"{DIR_NAME}/alice.txt", mode='a', encoding='utf-8') as fd:
+                fd.write("bob\n")
+            return content
+
+        read_tool._read_content = read_and_change # pylint: disable=W0212
+        content = read_tool.read_content("alice.txt")
+        assert session.get(os.path.abspath(f"{DIR_NAME}/alice.txt"))[0] is None
+        read_tool._read_content = read_content # pylint: disable=W0212
+        assert read_tool.read_content("alice.txt").endswith(" alice 199\n+bob")
+        assert content.endswith("alice 199\n")
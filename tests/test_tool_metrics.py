@@ -0,0 +1,159 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import json
+import os
+import pathlib
+import shutil
+import sys
+import urllib.request
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_content_cache import FileContentCache # pylint: disable=C0413
+from src.yacana_tools.file_list_tool import FileListTool # pylint: disable=C0413
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.file_search_tool import FileSearchTool # pylint: disable=C0413
+from src.yacana_tools.file_tree_tool import FileTreeTool # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from src.yacana_tools.tool_metrics import CallRecord, ToolMetrics # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestToolMetrics:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("alice")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_max_slowest(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_slowest' expected a non-negative integer"):
+            ToolMetrics(max_slowest=-1)
+
+    def test_tools_instrumented(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        calls = []
+        metrics = ToolMetrics(callback=calls.append)
+        read_tool = FileReadTool(DIR_NAME, cache=FileContentCache(), metrics=metrics)
+        write_tool = FileWriteTool(DIR_NAME, metrics=metrics)
+        list_tool = FileListTool(DIR_NAME, metrics=metrics)
+
+        # The instrumented function keeps the name and the signature of the tool function
+        assert read_tool.function_ref.__name__ == "read_content"
+        assert read_tool.function_ref("alice.txt") == "alice"
+        assert read_tool.function_ref("alice.txt") == "alice"
+        with pytest.raises(ToolError):
+            read_tool.function_ref("martin.txt")
+        write_tool.function_ref("bob.txt", "bob")
+        list_tool.function_ref(".")
+
+        assert [call.function for call in calls] == ["read_content", "read_content", "read_content", "write_content", "get_file_list"]
+        # The bytes read depend on the read path, only the whole file has to be read at least once
+        assert calls[0] == CallRecord("FileRead", "read_content", "alice.txt", calls[0].duration, calls[0].bytes_read, 0, 0, 1, 0, None)
+        assert calls[0].bytes_read >= 5
+        assert calls[1].cache_hits == 1 and calls[1].bytes_read == 0
+        assert calls[2].error == "ToolError" and calls[2].path == "martin.txt"
+        assert calls[3].bytes_written == 3
+        assert calls[4].entries_scanned == 3
+
+        snapshot = metrics.snapshot()
+        read_aggregate = next(aggregate for aggregate in snapshot["tools"] if aggregate["tool"] == "FileRead")
+        assert read_aggregate["calls"] == 3
+        assert read_aggregate["errors"] == {"ToolError": 1}
+        assert read_aggregate["bytes_read"] == calls[0].bytes_read
+        assert len(snapshot["slowest"]) == 5
+        assert json.loads(metrics.to_json())["tools"][0]["tool"] == "FileList"
+
+        prometheus = metrics.to_prometheus()
+        assert 'yacana_tools_calls_total{tool="FileRead",function="read_content"} 3' in prometheus
+        assert 'yacana_tools_errors_total{tool="FileRead",function="read_content",error="ToolError"} 1' in prometheus
+        assert 'yacana_tools_call_duration_seconds_bucket{tool="FileRead",function="read_content",le="+Inf"} 3' in prometheus
+
+    def test_search_path_recorded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        calls = []
+        metrics = ToolMetrics(callback=calls.append)
+        search_tool = FileSearchTool(DIR_NAME, metrics=metrics)
+        search_tool.function_ref("alice")
+        search_tool.function_ref("alice", "toto")
+        assert [call.path for call in calls] == [".", "toto"]
+
+    def test_callback_failed(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        def callback(call):
+            raise RuntimeError("callback")
+
+        # An error of the callback neither replaces the result nor the error of the call
+        metrics = ToolMetrics(callback=callback)
+        read_tool = FileReadTool(DIR_NAME, metrics=metrics)
+        assert read_tool.function_ref("alice.txt") == "alice"
+        with pytest.raises(ToolError, match="File does not exist."):
+            read_tool.function_ref("martin.txt")
+        assert metrics.snapshot()["tools"][0]["calls"] == 2
+
+    def test_threads_counted(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        calls = []
+        metrics = ToolMetrics(callback=calls.append)
+        tree_tool = FileTreeTool(DIR_NAME, max_workers=4, metrics=metrics)
+        tree_tool.function_ref(".")
+        assert calls[0].entries_scanned == 2
+
+    def test_export_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        metrics = ToolMetrics()
+        FileReadTool(DIR_NAME, metrics=metrics).function_ref("alice.txt")
+        metrics.write(f"{DIR_NAME}/metrics.prom")
+        metrics.write(f"{DIR_NAME}/metrics.json", "json")
+        with open(f"{DIR_NAME}/metrics.prom", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == metrics.to_prometheus()
+        with open(f"{DIR_NAME}/metrics.json", mode='r', encoding='utf-8') as fd:
+            assert json.load(fd)["tools"][0]["calls"] == 1
+        with pytest.raises(ValueError, match="Parameter 'export_format' expected one of prometheus, json"):
+            metrics.write(f"{DIR_NAME}/metrics.xml", "xml")
+
+        server = metrics.serve(port=0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                assert response.read().decode('utf-8') == metrics.to_prometheus()
+        finally:
+            server.shutdown()
+            server.server_close()
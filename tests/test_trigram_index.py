@@ -0,0 +1,149 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools import trigram_index as trigram_index_module # pylint: disable=C0413
+from src.yacana_tools.directory_index import DirectoryIndex # pylint: disable=C0413
+from src.yacana_tools.trigram_index import TrigramIndex, _load_regex_parser # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+INDEX_FILE_NAME = "tmp_trigram_index.json"
+
+class TestTrigramIndex:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(f"{DIR_NAME}/toto").mkdir(parents=True, exist_ok=True)
+        with open(f"{DIR_NAME}/alice.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Hello Alice")
+        with open(f"{DIR_NAME}/toto/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Hello Bob")
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+        if os.path.exists(INDEX_FILE_NAME):
+            os.remove(INDEX_FILE_NAME)
+
+    def test_init_failed_invalid_dir(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'root_dir' expected a valid directory"):
+            TrigramIndex("bob")
+
+    def test_candidates_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        index = TrigramIndex(DIR_NAME)
+        assert index.candidates(["hello"]) == ["alice.txt", os.path.join("toto", "bob.txt")]
+        assert index.candidates(["ALICE"]) == ["alice.txt"]
+        assert index.candidates(["hello"], "toto") == [os.path.join("toto", "bob.txt")]
+        assert index.candidates(["martin"]) == []
+        assert index.candidates(["al"]) is None
+
+    def test_refresh_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        index = TrigramIndex(DIR_NAME)
+        assert index.refresh() == 2
+        assert index.refresh() == 0
+        with open(f"{DIR_NAME}/toto/bob.txt", mode='w', encoding='utf-8') as fd:
+            fd.write("Hello Martin")
+        os.remove(f"{DIR_NAME}/alice.txt")
+        assert index.refresh() == 2
+        assert index.candidates(["martin"]) == [os.path.join("toto", "bob.txt")]
+        assert index.candidates(["alice"]) == []
+
+    def test_persistence_succeeded(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        index = TrigramIndex(DIR_NAME, index_file=INDEX_FILE_NAME)
+        index.refresh()
+        index.save()
+        loaded = TrigramIndex(DIR_NAME, index_file=INDEX_FILE_NAME)
+        assert len(loaded) == 2
+        assert loaded.refresh() == 0
+        assert loaded.candidates(["bob"]) == [os.path.join("toto", "bob.txt")]
+
+    def test_candidates_directory_index_succeeded(self, setup_and_teardown, monkeypatch):
+        """
+        TBC
+        """
+
+        with DirectoryIndex(DIR_NAME, use_inotify=False) as directory_index:
+            index = TrigramIndex(DIR_NAME, directory_index=directory_index)
+            # The refresh reads the sizes and modification times from the directory index
+            monkeypatch.setattr(trigram_index_module.os, "scandir", None)
+            assert index.candidates(["bob"]) == [os.path.join("toto", "bob.txt")]
+        with pytest.raises(ValueError, match="Parameter 'directory_index' expected an index of the same root directory"):
+            TrigramIndex(f"{DIR_NAME}/toto", directory_index=directory_index)
+
+    def test_literals_succeeded(self):
+        """
+        TBC
+        """
+
+        assert TrigramIndex.literals("a.b") == ["a.b"]
+        assert TrigramIndex.literals(r"def (\w+)\(self", regex=True) == ["def ", "(self"]
+        assert TrigramIndex.literals("alice|bob", regex=True) == []
+        assert TrigramIndex.literals("(", regex=True) == []
+
+    @pytest.mark.parametrize("version, name", [((3, 10), "sre_parse"), ((3, 11), "re._parser")])
+    def test_load_regex_parser_succeeded(self, monkeypatch, version, name):
+        """
+        TBC
+        """
+
+        imported = []
+        monkeypatch.setattr(trigram_index_module.sys, "version_info", version)
+        monkeypatch.setattr(trigram_index_module.importlib, "import_module", imported.append)
+        _load_regex_parser()
+        assert imported == [name]
+
+    def test_load_regex_parser_failed_missing(self, monkeypatch):
+        """
+        TBC
+        """
+
+        def import_module(name):
+            raise ImportError(name)
+
+        monkeypatch.setattr(trigram_index_module.importlib, "import_module", import_module)
+        assert _load_regex_parser() is None
+
+    @pytest.mark.parametrize("parser", [None, object()])
+    def test_literals_failed_parser(self, monkeypatch, parser):
+        """
+        TBC
+        """
+
+        # Without a working parser, a regular expression prunes no file
+        monkeypatch.setattr(trigram_index_module, "_sre_parse", parser)
+        assert TrigramIndex.literals(r"def (\w+)", regex=True) == []
+        assert TrigramIndex.literals("alice") == ["alice"]
@@ -0,0 +1,141 @@
+"""
+TBC
+"""
+
+# pylint: disable=C0301,W0613,W0621
+
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+path = os.getcwd()
+sys.path.append(path)
+from src.yacana_tools.file_read_tool import FileReadTool # pylint: disable=C0413
+from src.yacana_tools.file_write_tool import FileWriteTool # pylint: disable=C0413
+from src.yacana_tools.write_buffer import WriteBuffer # pylint: disable=C0413
+from yacana import ToolError # pylint: disable=C0413
+
+DIR_NAME = "tmp"
+
+class TestWriteBuffer:
+    """
+    TBC
+    """
+
+    @pytest.fixture
+    def setup_and_teardown(self):
+        """
+        TBC
+        """
+
+        pathlib.Path(DIR_NAME).mkdir(parents=True, exist_ok=True)
+
+        yield
+
+        shutil.rmtree(DIR_NAME, ignore_errors=True)
+
+    def test_init_failed_invalid_thresholds(self):
+        """
+        TBC
+        """
+
+        with pytest.raises(ValueError, match="Parameter 'max_bytes' expected a positive integer"):
+            WriteBuffer(0)
+        with pytest.raises(ValueError, match="Parameter 'max_age' expected a non-negative number"):
+            WriteBuffer(max_age=-1)
+
+    def test_put_coalesces_writes(self):
+        """
+        TBC
+        """
+
+        written = []
+        buffer = WriteBuffer(100, 60)
+        for content in ("alice", "bob", "martin"):
+            buffer.put("/tmp/alice.txt", content, lambda name, content: written.append((name, content)))
+        assert buffer.append("/tmp/alice.txt", "!") is True
+        assert buffer.append("/tmp/bob.txt", "!") is False
+        assert buffer.get("/tmp/alice.txt") == "martin!"
+        assert buffer.size == 7
+        assert not written
+        assert buffer.flush() == 1
+        assert written == [("/tmp/alice.txt", "martin!")]
+        assert len(buffer) == 0 and buffer.size == 0
+        assert buffer.writes == 4 and buffer.flushes == 1
+
+    def test_thresholds_flush(self):
+        """
+        TBC
+        """
+
+        written = []
+        buffer = WriteBuffer(10, 60)
+        buffer.put("/tmp/alice.txt", "alice", lambda name, content: written.append(name))
+        buffer.put("/tmp/bob.txt", "bob", lambda name, content: written.append(name))
+        assert not written
+        buffer.put("/tmp/martin.txt", "martin", lambda name, content: written.append(name))
+        assert written == ["/tmp/alice.txt"]
+        buffer.max_age = 0
+        time.sleep(0.01)
+        assert buffer.get("/tmp/bob.txt") is None
+        assert written == ["/tmp/alice.txt", "/tmp/bob.txt", "/tmp/martin.txt"]
+
+    def test_flush_failed_keeps_pending(self):
+        """
+        TBC
+        """
+
+        def writer(name, content):
+            raise PermissionError("Permission denied")
+
+        buffer = WriteBuffer()
+        buffer.put("/tmp/alice.txt", "alice", writer)
+        with pytest.raises(PermissionError):
+            buffer.flush()
+        assert buffer.get("/tmp/alice.txt") == "alice"
+
+    def test_tools_write_behind(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        with WriteBuffer() as buffer:
+            write_tool = FileWriteTool(DIR_NAME, force=True, write_buffer=buffer)
+            read_tool = FileReadTool(DIR_NAME, write_buffer=buffer)
+            for index in range(5):
+                assert write_tool.write_content("alice.txt", f"alice {index}\n") == "Content written to file 'alice.txt' (buffered write, fsync policy: none)."
+            write_tool.write_content("alice.txt", "bob\n", mode="append")
+            assert not os.path.exists(f"{DIR_NAME}/alice.txt")
+            assert read_tool.read_content("alice.txt") == "alice 4\nbob\n"
+            assert read_tool.read_content("alice.txt", offset=1, limit=1) == "bob\n"
+
+            # An edit writes the pending content first
+            assert write_tool.write_content("alice.txt", "martin", mode="replace", search="bob").startswith("Replaced 1 occurrence(s)")
+            with open(f"{DIR_NAME}/alice.txt", mode='r', encoding='utf-8') as fd:
+                assert fd.read() == "alice 4\nmartin\n"
+
+            write_tool.write_content("alice.txt", "alice 5\n")
+            with pytest.raises(ToolError, match="File already exists but cannot be overwritten."):
+                FileWriteTool(DIR_NAME, write_buffer=buffer).write_content("alice.txt", "alice 6\n")
+        with open(f"{DIR_NAME}/alice.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "alice 5\n"
+
+    def test_flush_at_exit(self, setup_and_teardown):
+        """
+        TBC
+        """
+
+        script = "\n".join([
+            "from src.yacana_tools.file_write_tool import FileWriteTool",
+            "from src.yacana_tools.write_buffer import WriteBuffer",
+            "buffer = WriteBuffer()",
+            f"FileWriteTool('{DIR_NAME}', write_buffer=buffer).write_content('alice.txt', 'alice')",
+        ])
+        subprocess.run([sys.executable, "-c", script], check=True, cwd=os.getcwd())
+        with open(f"{DIR_NAME}/alice.txt", mode='r', encoding='utf-8') as fd:
+            assert fd.read() == "alice"